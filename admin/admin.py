@@ -1,15 +1,30 @@
-from sqladmin import Admin, ModelView
+import hashlib
+import hmac
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from sqladmin import Admin, BaseView, ModelView, action, expose
 from wtforms import PasswordField
 from wtforms.validators import Optional
 from fastapi import Request
-from fastapi.responses import RedirectResponse
+from fastapi.responses import FileResponse, PlainTextResponse, RedirectResponse
 from sqladmin.authentication import AuthenticationBackend
-from core.security import hash_password, validate_password
+from sqlalchemy import Select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import joinedload, load_only, raiseload, undefer
+from core.config import settings
+from core.security import hash_password_async, validate_password_async
 from db.database import engine, new_session
-from db.models.task import TaskORM
+from db.maintenance import ROW_ESTIMATE_SQL
+from db.models.task import TaskORM, utcnow
 from db.models.user import UserOrm
+from repositories.task_archive_repository import TaskArchiveRepository
+from repositories.task_repository import TaskRepository
 from repositories.user_repository import UserRepository
 
+TEMPLATES_DIR = Path(__file__).resolve().parents[1] / "templates"
+
 
 class AdminAuth(AuthenticationBackend):
     def __init__(self, secret_key: str):
@@ -24,13 +39,15 @@ class AdminAuth(AuthenticationBackend):
             repo = UserRepository(session)
             user = await repo.get_by_email(username)
 
-        if not user or not validate_password(user.hashed_password, password):
+        if not user or not await validate_password_async(
+            user.hashed_password, password
+        ):
             return False
 
         if not user.is_admin:
             return False
 
-        request.session.update({"user_id": user.id})
+        request.session.update({"user_id": user.id, "validated_at": time.time()})
         return True
 
     async def logout(self, request: Request) -> bool:
@@ -43,14 +60,21 @@ class AdminAuth(AuthenticationBackend):
         if not user_id:
             return RedirectResponse(request.url_for("admin:login"), status_code=302)
 
+        # сессия подписана, поэтому недавно проверенному админу верим без БД;
+        # снятие прав вступает в силу не позже чем через principal_ttl_seconds
+        # отметка из будущего не продлевает доверие: такую сессию проверяем в БД
+        age = time.time() - request.session.get("validated_at", 0)
+        if 0 <= age < settings.admin_panel.principal_ttl_seconds:
+            return True
+
         async with new_session() as session:
-            repo = UserRepository(session)
-            user = await repo.get_by_id(user_id)
+            is_admin = await UserRepository(session).is_admin(user_id)
 
-        if not user or not user.is_admin:
+        if not is_admin:
             request.session.clear()
             return RedirectResponse(request.url_for("admin:login"), status_code=302)
 
+        request.session["validated_at"] = time.time()
         return True
 
 
@@ -90,11 +114,27 @@ class UserAdmin(ModelView, model=UserOrm):
             return
 
         if isinstance(raw, str):
-            data["hashed_password"] = hash_password(raw)
+            data["hashed_password"] = await hash_password_async(raw)
+
+    def list_query(self, request: Request) -> Select:
+        # задачи в списке пользователей не показываются, а lazy="selectin"
+        # дочитывал бы их все
+        return super().list_query(request).options(raiseload(UserOrm.tasks))
 
 
 class TasksAdmin(ModelView, model=TaskORM):
-    column_list = [c.name for c in TaskORM.__table__.columns]
+    column_list = [
+        TaskORM.id,
+        TaskORM.title,
+        TaskORM.status,
+        TaskORM.priority,
+        TaskORM.term_date,
+        TaskORM.author,
+    ]
+    # сортировка только по индексированным колонкам: иначе каждая страница —
+    # полная сортировка таблицы
+    column_sortable_list = [TaskORM.id, TaskORM.status, TaskORM.priority]
+    column_default_sort = ("id", True)
     name = "Задача"
     name_plural = "Задачи"
     icon = "fa-solid fa-tasks"
@@ -107,9 +147,164 @@ class TasksAdmin(ModelView, model=TaskORM):
         "author": "Автор",
     }
 
+    def __init__(self) -> None:
+        super().__init__()
+        # автор грузится JOIN'ом в list_query. Публичного способа отключить
+        # selectinload связей из column_list в sqladmin нет, а с ним грузились
+        # бы и все задачи автора (lazy="selectin"). _list_relations —
+        # внутренность sqladmin, поэтому версия закреплена в pyproject.toml
+        self._list_relations = []
+
+    def list_query(self, request: Request) -> Select:
+        return (
+            super()
+            .list_query(request)
+            .options(
+                # у автора только имя; его задачи (lazy="selectin") не нужны
+                joinedload(TaskORM.author).options(
+                    load_only(UserOrm.id, UserOrm.name), raiseload(UserOrm.tasks)
+                ),
+            )
+        )
+
+    async def count(self, request: Request, stmt: Select | None = None) -> int:
+        # на миллионах строк count(*) — проход по индексу на каждую страницу;
+        # без поиска берём оценку из sqlite_stat1 (обновляется ANALYZE)
+        if stmt is None:
+            try:
+                async with self.session_maker() as session:
+                    estimate = await session.scalar(
+                        text(ROW_ESTIMATE_SQL).bindparams(table=TaskORM.__tablename__)
+                    )
+            except OperationalError:  # ANALYZE ещё не выполнялся
+                estimate = None
+            if estimate is not None and estimate > settings.admin_panel.exact_count_limit:
+                return estimate
+        return await super().count(request, stmt)
+
+    def form_edit_query(self, request: Request) -> Select:
+        return super().form_edit_query(request).options(undefer(TaskORM.description))
+
+    # массовые операции — по одному UPDATE/DELETE на пачку, а не построчно
+    @action(
+        name="complete_overdue",
+        label="Завершить просроченные задачи авторов",
+        confirmation_message="Завершить все просроченные задачи авторов выбранных задач?",
+        add_in_detail=False,
+    )
+    async def complete_overdue(self, request: Request):
+        pks = [int(pk) for pk in request.query_params.get("pks", "").split(",") if pk]
+        affected = 0
+        async with new_session() as session:
+            repo = TaskRepository(session)
+            for author_id in await repo.author_ids(pks):
+                affected += await repo.complete_overdue(
+                    author_id, date.today(), settings.admin_panel.bulk_chunk_size
+                )
+        return await self._bulk_result(
+            request, "Просроченные задачи", f"Завершено задач: {affected}"
+        )
+
+    @action(
+        name="delete_old_completed",
+        label="Удалить старые завершённые задачи",
+        confirmation_message="Удалить все задачи, завершённые больше "
+        f"{settings.admin_panel.bulk_older_than_days} дней назад?",
+        add_in_detail=False,
+    )
+    async def delete_old_completed(self, request: Request):
+        cutoff = utcnow() - timedelta(days=settings.admin_panel.bulk_older_than_days)
+        async with new_session() as session:
+            affected = await TaskRepository(session).delete_completed_before(
+                cutoff, settings.admin_panel.bulk_chunk_size
+            )
+        return await self._bulk_result(
+            request, "Старые завершённые задачи", f"Удалено задач: {affected}"
+        )
+
+    @action(
+        name="archive_completed",
+        label="Перенести старые завершённые в архив",
+        confirmation_message="Перенести в архив завершённые задачи старше "
+        f"{settings.archive.after_days} дней?",
+        add_in_detail=False,
+    )
+    async def archive_completed(self, request: Request):
+        cutoff = utcnow() - timedelta(days=settings.archive.after_days)
+        async with new_session() as session:
+            moved = await TaskArchiveRepository(session).archive_completed(
+                cutoff, settings.archive.chunk_size
+            )
+        return await self._bulk_result(
+            request, "Архив задач", f"Перенесено в архив: {moved}"
+        )
+
+    async def _bulk_result(self, request: Request, title: str, message: str):
+        return await self.templates.TemplateResponse(
+            request,
+            "admin_bulk_result.html",
+            context={
+                "title": title,
+                "message": message,
+                "back_url": request.url_for("admin:list", identity=self.identity),
+            },
+        )
+
+
+class ProfilesAdmin(BaseView):
+    name = "Профили"
+    icon = "fa-solid fa-stopwatch"
+
+    @expose("/profiles/{filename}", methods=["GET"], identity="profile")
+    async def show(self, request: Request):
+        from core.profiling import profile_store
+
+        name = request.path_params["filename"]
+        if request.query_params.get("format") == "pstats":
+            path = profile_store.get(name)
+            if path is None:
+                return PlainTextResponse("Профиль не найден", status_code=404)
+            return FileResponse(path, filename=path.name)
+        text = profile_store.render_text(name)
+        if text is None:
+            return PlainTextResponse("Профиль не найден", status_code=404)
+        return PlainTextResponse(text)
+
+    # sqladmin обходит методы в обратном алфавитном порядке и берёт identity
+    # (ссылку пункта меню) у последнего, поэтому список — это "index"
+    @expose("/profiles", methods=["GET"], identity="profiles")
+    async def index(self, request: Request):
+        from core.profiling import profile_store
+
+        return await self.templates.TemplateResponse(
+            request,
+            "admin_profiles.html",
+            context={"profiles": profile_store.list()},
+        )
+
+
+def session_secret() -> str:
+    """Ключ подписи cookie сессии админки.
+
+    Без admin_panel.secret_key выводится из закрытого ключа JWT: одинаков во
+    всех воркерах и переживает перезапуск, а сам закрытый ключ в подпись не
+    попадает.
+    """
+    if settings.admin_panel.secret_key:
+        return settings.admin_panel.secret_key
+    private_key = settings.auth_jwt.private_key_path.read_bytes()
+    return hmac.new(private_key, b"admin-session", hashlib.sha256).hexdigest()
+
 
 def init_admin(app):
-    authentication_backend = AdminAuth(secret_key="...")
-    admin = Admin(app, engine, authentication_backend=authentication_backend)
+    authentication_backend = AdminAuth(secret_key=session_secret())
+    admin = Admin(
+        app,
+        engine,
+        authentication_backend=authentication_backend,
+        templates_dir=str(TEMPLATES_DIR),
+    )
     admin.add_view(UserAdmin)
     admin.add_view(TasksAdmin)
+    if settings.profiling.enabled:
+        admin.add_view(ProfilesAdmin)
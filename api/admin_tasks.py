@@ -0,0 +1,51 @@
+from datetime import date, timedelta
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.security import HTTPBearer
+
+from api.auth import get_current_admin_user
+from api.tasks import get_archive_repo, get_task_repo
+from core.config import settings
+from db.models.task import utcnow
+from db.schemas.task import BulkResult
+from repositories.task_archive_repository import TaskArchiveRepository
+from repositories.task_repository import TaskRepository
+
+http_bearer = HTTPBearer(auto_error=False)
+router = APIRouter(
+    tags=["Admin"],
+    prefix="/api/admin",
+    dependencies=[Depends(http_bearer), Depends(get_current_admin_user)],
+)
+
+
+@router.post("/users/{user_id}/tasks/complete-overdue", response_model=BulkResult)
+async def complete_overdue_tasks(
+    user_id: int, repo: TaskRepository = Depends(get_task_repo)
+):
+    affected = await repo.complete_overdue(
+        user_id, date.today(), settings.admin_panel.bulk_chunk_size
+    )
+    return BulkResult(affected=affected)
+
+
+@router.delete("/tasks/completed", response_model=BulkResult)
+async def delete_old_completed_tasks(
+    older_than_days: int = Query(ge=0),
+    repo: TaskRepository = Depends(get_task_repo),
+):
+    cutoff = utcnow() - timedelta(days=older_than_days)
+    affected = await repo.delete_completed_before(
+        cutoff, settings.admin_panel.bulk_chunk_size
+    )
+    return BulkResult(affected=affected)
+
+
+@router.post("/tasks/archive", response_model=BulkResult)
+async def archive_completed_tasks(
+    older_than_days: int = Query(default=settings.archive.after_days, ge=0),
+    archive: TaskArchiveRepository = Depends(get_archive_repo),
+):
+    cutoff = utcnow() - timedelta(days=older_than_days)
+    moved = await archive.archive_completed(cutoff, settings.archive.chunk_size)
+    return BulkResult(affected=moved)
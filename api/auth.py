@@ -1,19 +1,39 @@
 import asyncio
 import time
+import uuid
+from contextlib import asynccontextmanager
 from typing import Dict, Tuple
 
-from fastapi import APIRouter, Depends, Form, Header, HTTPException, status
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Body,
+    Depends,
+    Form,
+    Header,
+    HTTPException,
+    status,
+)
 from jwt.exceptions import InvalidTokenError
 from pydantic import EmailStr
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from starlette.requests import Request
 
 from core.config import settings
-from core.security import decode_jwt, encode_jwt, hash_password, validate_password
-from db.database import get_session
+from core.metrics import rate_limit_rejections
+from core.revocation import revocation_list
+from core.security import (
+    decode_jwt,
+    encode_jwt,
+    hash_password_async,
+    needs_rehash,
+    validate_password_async,
+)
+from db.database import get_session, get_session_maker, new_session
 from db.models.user import UserOrm
 from db.schemas.token import Token
 from db.schemas.user import UserCreate
+from repositories.revoked_token_repository import RevokedTokenRepository
 from repositories.user_repository import UserRepository
 
 router = APIRouter(tags=["Authentication"], prefix="/api")
@@ -31,6 +51,19 @@ async def get_user_repo(session: AsyncSession = Depends(get_session)) -> UserRep
     return UserRepository(session)
 
 
+async def get_revoked_token_repo(
+    session: AsyncSession = Depends(get_session),
+) -> RevokedTokenRepository:
+    return RevokedTokenRepository(session)
+
+
+@asynccontextmanager
+async def revoked_token_repo():
+    # для фоновой перестройки фильтра, вне запроса
+    async with new_session() as session:
+        yield RevokedTokenRepository(session)
+
+
 def base_url(request: Request) -> str:  # pragma: no cover
     return str(request.base_url).rstrip("/")
 
@@ -52,7 +85,7 @@ async def registration(
             status_code=status.HTTP_409_CONFLICT, detail="Email уже зарегистрирован."
         )
 
-    hashed_password = hash_password(user.password)
+    hashed_password = await hash_password_async(user.password)
     db_user = UserOrm(email=user.email, name=user.name, hashed_password=hashed_password)
     await repo.add_user(db_user)
     access_token = await create_access_token(db_user)
@@ -62,17 +95,36 @@ async def registration(
     )
 
 
+async def rehash_password(
+    session_maker: async_sessionmaker[AsyncSession],
+    user_id: int,
+    old_hash: bytes,
+    password: str,
+) -> None:
+    new_hash = await hash_password_async(password)
+    async with session_maker() as session:
+        await UserRepository(session).update_password_hash(user_id, old_hash, new_hash)
+
+
 async def validate_current_user(
+    background_tasks: BackgroundTasks,
     email: EmailStr = Form(...),
     password: str = Form(...),
     repo: UserRepository = Depends(get_user_repo),
+    session_maker: async_sessionmaker[AsyncSession] = Depends(get_session_maker),
 ) -> UserOrm:
     unauth_exc = HTTPException(
         status.HTTP_401_UNAUTHORIZED, detail="Некорректный юзернейм или пароль"
     )
     if not (user := await repo.get_by_email(email)):
         raise unauth_exc
-    if validate_password(user.hashed_password, password):
+    if await validate_password_async(user.hashed_password, password):
+        # cost хеша отличается от настроенного — пересчитываем после ответа,
+        # пока пароль в открытом виде есть только сейчас
+        if needs_rehash(user.hashed_password):
+            background_tasks.add_task(
+                rehash_password, session_maker, user.id, user.hashed_password, password
+            )
         return user
     else:
         raise unauth_exc
@@ -108,7 +160,8 @@ async def create_jwt(
     token_data: dict,
     expire_minutes: int,
 ) -> str:
-    jwt_payload = {TOKEN_TYPE_FIELD: token_type}
+    # jti — идентификатор токена для отзыва (logout)
+    jwt_payload = {TOKEN_TYPE_FIELD: token_type, "jti": uuid.uuid4().hex}
     jwt_payload.update(token_data)
     return encode_jwt(payload=jwt_payload, expire_minutes=expire_minutes)
 
@@ -148,13 +201,28 @@ async def get_user_from_sub(payload: dict, repo: UserRepository):
     return user
 
 
+async def ensure_not_revoked(
+    payload: dict, user: UserOrm, revoked: RevokedTokenRepository
+) -> None:
+    revoked_exc = HTTPException(status.HTTP_401_UNAUTHORIZED, detail="Токен отозван")
+    # iat в секундах: токены, выданные в ту же секунду, что и «выйти везде»,
+    # тоже считаются отозванными
+    valid_after = user.tokens_valid_after
+    if valid_after is not None and payload.get("iat", 0) <= valid_after:
+        raise revoked_exc
+    if await revocation_list.is_revoked(payload.get("jti"), revoked):
+        raise revoked_exc
+
+
 def get_auth_user_from_token_of_type(token_type: str):
     async def get_auth_user_from_token(
         payload: dict = Depends(get_current_token_payload),
         repo: UserRepository = Depends(get_user_repo),
     ) -> UserOrm:
         await validate_token_type(payload, token_type)
-        return await get_user_from_sub(payload, repo)
+        user = await get_user_from_sub(payload, repo)
+        await ensure_not_revoked(payload, user, RevokedTokenRepository(repo.session))
+        return user
 
     return get_auth_user_from_token
 
@@ -163,6 +231,16 @@ get_current_auth_user_for_refresh = get_auth_user_from_token_of_type(REFRESH_TOK
 get_current_auth_user_for_access = get_auth_user_from_token_of_type(ACCESS_TOKEN_TYPE)
 
 
+async def get_current_admin_user(
+    user: UserOrm = Depends(get_current_auth_user_for_access),
+) -> UserOrm:
+    if not user.is_admin:
+        raise HTTPException(
+            status.HTTP_403_FORBIDDEN, detail="Требуются права администратора"
+        )
+    return user
+
+
 async def rate_limiter(
     user: UserOrm = Depends(get_current_auth_user_for_access),
 ):  # pragma: no cover
@@ -179,12 +257,23 @@ async def rate_limiter(
             start = window_start
 
         if count >= RATE_LIMIT:
-
+            rate_limit_rejections.inc()
             raise HTTPException(status_code=429, detail="Слишком много запросов")
 
         _requests_count[key] = (count + 1, start)
 
 
+async def prune_rate_limits() -> int:
+    # без чистки в словаре навсегда остаётся каждый пользователь, заходивший хоть раз
+    now = int(time.time())
+    window_start = now - (now % WINDOW_SIZE)
+    async with _lock:
+        stale = [key for key, (_, start) in _requests_count.items() if start < window_start]
+        for key in stale:
+            del _requests_count[key]
+    return len(stale)
+
+
 @router.post("/login", response_model=Token)
 async def login(user: UserOrm = Depends(validate_current_user)):
     access_token = await create_access_token(user=user)
@@ -192,3 +281,31 @@ async def login(user: UserOrm = Depends(validate_current_user)):
     return Token(
         access_token=access_token, refresh_token=refresh_token, token_type="Bearer"
     )
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    refresh_token: str | None = Body(default=None, embed=True),
+    payload: dict = Depends(get_current_token_payload),
+    user: UserOrm = Depends(get_current_auth_user_for_access),
+    revoked: RevokedTokenRepository = Depends(get_revoked_token_repo),
+):
+    tokens = [payload]
+    if refresh_token:
+        try:
+            refresh_payload = decode_jwt(refresh_token)
+        except InvalidTokenError:
+            raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="Invalid token error")
+        if refresh_payload.get("sub") == payload.get("sub"):
+            tokens.append(refresh_payload)
+    for token in tokens:
+        if "jti" in token:
+            await revocation_list.revoke(token["jti"], user.id, token["exp"], revoked)
+
+
+@router.post("/logout/all", status_code=status.HTTP_204_NO_CONTENT)
+async def logout_everywhere(
+    user: UserOrm = Depends(get_current_auth_user_for_access),
+    repo: UserRepository = Depends(get_user_repo),
+):
+    await repo.invalidate_tokens(user, int(time.time()))
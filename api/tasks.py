@@ -1,9 +1,11 @@
 import math
+from datetime import date, timedelta
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Path, status
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, status
+from fastapi.responses import Response, StreamingResponse
 from fastapi.security import HTTPBearer
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from api.auth import (
     create_access_token,
@@ -11,27 +13,69 @@ from api.auth import (
     get_current_auth_user_for_refresh,
     rate_limiter,
 )
-from db.database import get_session
+from core.config import settings
+from core.invalidation import task_versions
+from core.pubsub import task_events
+from core.singleflight import SingleFlight
+from db.database import get_session, get_session_maker
+from db.models.enums import ChangeOp
 from db.models.task import TaskORM
 from db.models.user import UserOrm
 from db.schemas.task import (
     PaginatedTasks,
+    TaskChange,
+    TaskChanges,
     TaskOut,
+    TaskOutPartial,
     TaskOutPublic,
     TaskSchema,
+    TaskStats,
     TaskUpdate,
 )
 from db.schemas.token import Token
+from repositories.task_archive_repository import TaskArchiveRepository
+from repositories.task_change_repository import TaskChangeRepository
 from repositories.task_repository import TaskRepository
 
 http_bearer = HTTPBearer(auto_error=False)
 router = APIRouter(tags=["Tasks"], dependencies=[Depends(http_bearer)], prefix="/api")
+task_pages = SingleFlight("task_pages")
 
 
 async def get_task_repo(session: AsyncSession = Depends(get_session)) -> TaskRepository:
     return TaskRepository(session)
 
 
+async def get_archive_repo(
+    session: AsyncSession = Depends(get_session),
+) -> TaskArchiveRepository:
+    return TaskArchiveRepository(session)
+
+
+async def get_change_repo(
+    session: AsyncSession = Depends(get_session),
+) -> TaskChangeRepository:
+    return TaskChangeRepository(session)
+
+
+def parse_fields(
+    fields: str | None = Query(
+        default=None,
+        description="Список полей через запятую, например id,title,status",
+    ),
+) -> list[str] | None:
+    if fields is None:
+        return None
+    requested = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in requested if f not in TaskOutPublic.model_fields]
+    if not requested or unknown:
+        raise HTTPException(
+            422,
+            detail=f"Недопустимые поля: {', '.join(unknown) or fields!r}",
+        )
+    return requested
+
+
 async def get_owned_task(
     task_id: Annotated[int, Path(ge=1)],
     user: UserOrm = Depends(get_current_auth_user_for_access),
@@ -118,20 +162,230 @@ async def delete_todo(
     return
 
 
-@router.get("/todos/{page}/{limit}", response_model=PaginatedTasks)
+async def _due_page(
+    repo: TaskRepository,
+    user: UserOrm,
+    start: date | None,
+    end: date | None,
+    page: int,
+    limit: int,
+) -> PaginatedTasks:
+    items, total = await repo.get_open_due(user.id, start, end, page, limit)
+    pages = max(1, math.ceil(total / limit)) if total else 1
+    if page > 1 and not items:
+        raise HTTPException(
+            status.HTTP_404_NOT_FOUND, detail="Страница за доступным диапазоном"
+        )
+    return PaginatedTasks(
+        items=[TaskOutPublic.model_validate(it) for it in items],
+        page=page,
+        limit=limit,
+        total=total,
+        pages=pages,
+    )
+
+
+@router.get("/todos/overdue", response_model=PaginatedTasks)
+async def get_overdue_tasks(
+    user: UserOrm = Depends(get_current_auth_user_for_access),
+    page: int = Query(default=1, ge=1),
+    limit: int = Query(default=20, ge=1, le=100),
+    repo: TaskRepository = Depends(get_task_repo),
+):
+    yesterday = date.today() - timedelta(days=1)
+    return await _due_page(repo, user, None, yesterday, page, limit)
+
+
+@router.get("/todos/due-today", response_model=PaginatedTasks)
+async def get_tasks_due_today(
+    user: UserOrm = Depends(get_current_auth_user_for_access),
+    page: int = Query(default=1, ge=1),
+    limit: int = Query(default=20, ge=1, le=100),
+    repo: TaskRepository = Depends(get_task_repo),
+):
+    today = date.today()
+    return await _due_page(repo, user, today, today, page, limit)
+
+
+@router.get("/todos/due", response_model=PaginatedTasks)
+async def get_tasks_due_between(
+    start: date,
+    end: date,
+    user: UserOrm = Depends(get_current_auth_user_for_access),
+    page: int = Query(default=1, ge=1),
+    limit: int = Query(default=20, ge=1, le=100),
+    repo: TaskRepository = Depends(get_task_repo),
+):
+    if start > end:
+        raise HTTPException(422, detail="start должен быть не позже end")
+    return await _due_page(repo, user, start, end, page, limit)
+
+
+@router.get("/todos/stats", response_model=TaskStats)
+async def get_task_stats(
+    user: UserOrm = Depends(get_current_auth_user_for_access),
+    repo: TaskRepository = Depends(get_task_repo),
+):
+    return TaskStats(**await repo.stats(user.id, date.today()))
+
+
+@router.get("/todos/changes", response_model=TaskChanges)
+async def get_task_changes(
+    since: int = Query(default=0, ge=0, description="seq из прошлого ответа"),
+    user: UserOrm = Depends(get_current_auth_user_for_access),
+    changes: TaskChangeRepository = Depends(get_change_repo),
+):
+    if since < user.changes_compacted_through:
+        # нужных записей уже нет; seq берём до выгрузки, чтобы не потерять
+        # изменения, сделанные во время неё
+        return TaskChanges(
+            changes=[], since=await changes.last_seq(), has_more=False, full_resync=True
+        )
+    limit = settings.task_sync.changes_limit
+    rows = await changes.since(user.id, since, limit)
+    # по каждой задаче клиенту нужна только последняя запись
+    latest: dict[int, TaskChange] = {}
+    for seq, op, task_id, task in rows:
+        if task is None:
+            # задачу уже удалили: её надгробие дальше в журнале
+            op = ChangeOp.DELETE
+        latest.pop(task_id, None)
+        latest[task_id] = TaskChange(
+            seq=seq,
+            op=op,
+            task_id=task_id,
+            task=TaskOutPublic.model_validate(task) if op == ChangeOp.UPSERT else None,
+        )
+    return TaskChanges(
+        changes=list(latest.values()),
+        since=rows[-1].seq if rows else since,
+        has_more=len(rows) == limit,
+    )
+
+
+@router.get("/todos/events", response_class=StreamingResponse)
+async def stream_task_events(user: UserOrm = Depends(get_current_auth_user_for_access)):
+    """SSE: события {"op", "task_id"} по задачам пользователя после коммита.
+
+    Событие resync значит, что клиент отстал и часть событий выброшена:
+    состояние нужно дочитать через /api/todos/changes.
+    """
+    if task_events.subscriber_count(user.id) >= task_events.max_per_user:
+        raise HTTPException(
+            status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Слишком много открытых подключений к событиям",
+        )
+    return StreamingResponse(
+        task_events.sse(user.id, settings.events.heartbeat_seconds),
+        media_type="text/event-stream",
+        # X-Accel-Buffering: nginx иначе копит поток в буфере
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get(
+    "/todos/{page}/{limit}",
+    response_model=PaginatedTasks,
+    response_model_exclude_unset=True,
+)
 async def get_tasks_from_page(
     user: UserOrm = Depends(get_current_auth_user_for_access),
     page: int = Path(ge=1),
     limit: int = Path(ge=1, le=100),
-    repo: TaskRepository = Depends(get_task_repo),
+    fields: list[str] | None = Depends(parse_fields),
+    preview: int | None = Query(
+        default=None,
+        ge=1,
+        le=1000,
+        description="Вернуть description_preview из первых N символов описания "
+        "(добавляется и к fields без description)",
+    ),
+    include_archived: bool = Query(
+        default=False, description="Добавить задачи из архива завершённых"
+    ),
+    session_maker: async_sessionmaker[AsyncSession] = Depends(get_session_maker),
+):
+    if (preview or include_archived) and not fields:
+        fields = list(TaskOutPublic.model_fields)
+    elif preview and "description" not in fields:
+        # превью строится из колонки description: без неё preview пропал бы молча
+        fields = [*fields, "description"]
+
+    async def load_page() -> bytes:
+        # своя сессия: запрос-лидер может завершиться раньше остальных ждущих
+        async with session_maker() as session:
+            items, total = await TaskRepository(session).get_by_pages(
+                user_id=user.id,
+                page=page,
+                limit=limit,
+                fields=fields,
+                preview=preview,
+                include_archived=include_archived,
+            )
+        pages = max(1, math.ceil(total / limit)) if total else 1
+        if page > 1 and not items:
+            raise HTTPException(
+                status.HTTP_404_NOT_FOUND, detail="Страница за доступным диапазоном"
+            )
+        if fields:
+            public_items = [TaskOutPartial.model_validate(dict(it)) for it in items]
+        else:
+            public_items = [TaskOutPublic.model_validate(it) for it in items]
+        return PaginatedTasks(
+            items=public_items, page=page, limit=limit, total=total, pages=pages
+        ).model_dump_json(exclude_unset=True).encode()
+
+    # одинаковые одновременные запросы (вкладки, устройства) делят один запрос
+    # к базе и одну сериализацию. Версия данных в ключе: запрос, пришедший
+    # после записи, не получит страницу, прочитанную до неё
+    key = (
+        user.id,
+        page,
+        limit,
+        tuple(fields or ()),
+        preview,
+        include_archived,
+        task_versions.get(user.id),
+    )
+    body = await task_pages.do(key, load_page)
+    return Response(body, media_type="application/json")
+
+
+@router.get("/todos/archive/{page}/{limit}", response_model=PaginatedTasks)
+async def get_archived_tasks(
+    user: UserOrm = Depends(get_current_auth_user_for_access),
+    page: int = Path(ge=1),
+    limit: int = Path(ge=1, le=100),
+    archive: TaskArchiveRepository = Depends(get_archive_repo),
 ):
-    items, total = await repo.get_by_pages(user_id=user.id, page=page, limit=limit)
+    items, total = await archive.get_by_pages(user.id, page, limit)
     pages = max(1, math.ceil(total / limit)) if total else 1
     if page > 1 and not items:
         raise HTTPException(
             status.HTTP_404_NOT_FOUND, detail="Страница за доступным диапазоном"
         )
-    public_items = [TaskOutPublic.model_validate(it) for it in items]
     return PaginatedTasks(
-        items=public_items, page=page, limit=limit, total=total, pages=pages
+        items=[TaskOutPublic.model_validate(it) for it in items],
+        page=page,
+        limit=limit,
+        total=total,
+        pages=pages,
     )
+
+
+@router.post(
+    "/todos/archive/{task_id}/restore",
+    response_model=TaskOut,
+    response_model_exclude={"author_id"},
+    dependencies=[Depends(rate_limiter)],
+)
+async def restore_archived_task(
+    task_id: Annotated[int, Path(ge=1)],
+    user: UserOrm = Depends(get_current_auth_user_for_access),
+    archive: TaskArchiveRepository = Depends(get_archive_repo),
+    repo: TaskRepository = Depends(get_task_repo),
+):
+    restored_id = await archive.restore(task_id, user.id)
+    if restored_id is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Task not found")
+    return await repo.get_by_id(restored_id, with_description=True)
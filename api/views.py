@@ -1,16 +1,40 @@
+import math
 from pathlib import Path
 
 import httpx
-from fastapi import APIRouter, Form, Request
-from fastapi.responses import HTMLResponse, RedirectResponse
+import jinja2
+from fastapi import APIRouter, Depends, Form, Query, Request
+from fastapi.responses import HTMLResponse, RedirectResponse, Response
 from fastapi.templating import Jinja2Templates
 
-from api.auth import auth_header, base_url, get_token_from_cookie
+from api.auth import (
+    auth_header,
+    base_url,
+    get_current_auth_user_for_access,
+    get_token_from_cookie,
+)
+from api.tasks import get_task_repo
+from core.config import settings
+from core.fragment_cache import FragmentCache
+from core.invalidation import task_versions
+from core.static import static_files
+from db.models.user import UserOrm
+from db.schemas.task import TaskOutPublic
+from repositories.task_repository import TaskRepository
 
 router = APIRouter(tags=["Views"])
 PROJECT_ROOT  = Path(__file__).resolve().parents[1]     # .../ToDoListAPI
 TEMPLATES_DIR = PROJECT_ROOT / "templates"
-templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
+templates = Jinja2Templates(
+    env=jinja2.Environment(
+        loader=jinja2.FileSystemLoader(TEMPLATES_DIR),
+        autoescape=True,
+        auto_reload=settings.templates.auto_reload,
+    )
+)
+# ссылки на статику с отпечатком содержимого: кешируются браузером навсегда
+templates.env.globals["static_url"] = static_files.url
+fragment_cache = FragmentCache(settings.templates.fragment_cache_size)
 
 
 @router.get("/", response_class=HTMLResponse)
@@ -114,12 +138,40 @@ async def register_submit(
 
 
 @router.post("/logout")
-async def logout():
+async def logout(request: Request):
+    token = get_token_from_cookie(request)
+    if token:
+        # отзываем токен, иначе он остаётся действительным до exp
+        try:
+            async with httpx.AsyncClient(timeout=10.0) as client:
+                await client.post(
+                    f"{base_url(request)}/api/logout", headers=auth_header(token)
+                )
+        except httpx.HTTPError:
+            pass
     redirect = RedirectResponse(url="/", status_code=303)
     redirect.delete_cookie("access_token")
     return redirect
 
 
+def filter_tasks(items: list[dict], filter: str, q: str | None) -> list[dict]:
+    filtered = items
+    if q:
+        ql = q.lower()
+        filtered = [
+            t
+            for t in filtered
+            if ql
+            in (t.get("title", "").lower() + " " + (t.get("description") or "").lower())
+        ]
+
+    if filter == "active":
+        filtered = [t for t in filtered if t.get("status") == "active"]
+    elif filter == "done":
+        filtered = [t for t in filtered if t.get("status") == "completed"]
+    return filtered
+
+
 @router.get("/tasks", response_class=HTMLResponse)
 async def tasks_page(
     request: Request,
@@ -134,7 +186,7 @@ async def tasks_page(
 
     items: list[dict] = []
     meta = {"page": page, "pages": 1, "total": 0, "limit": limit}
-    stats = {"total": 0, "completed": 0, "active": 0}
+    stats = {"total": 0, "completed": 0, "active": 0, "overdue": 0}
 
     api_base = f"{base_url(request)}/api/todos"
     page_url = f"{api_base}/{page}/{limit}"
@@ -174,18 +226,14 @@ async def tasks_page(
         stats["total"] = int(meta["total"]) if meta["total"] is not None else 0
 
         if stats["total"] > 0:
+            # счётчики считает сервер по индексам, без выгрузки всех задач
             try:
                 async with httpx.AsyncClient(timeout=10.0) as client:
-                    all_url = f"{api_base}/1/{stats['total']}"
-                    r_all = await client.get(all_url, headers=auth_header(token))
-                if r_all.status_code == 200:
-                    all_items = r_all.json().get("items", [])
-                    stats["completed"] = sum(
-                        1 for t in all_items if t.get("status") == "completed"
-                    )
-                    stats["active"] = sum(
-                        1 for t in all_items if t.get("status") == "active"
+                    r_stats = await client.get(
+                        f"{api_base}/stats", headers=auth_header(token)
                     )
+                if r_stats.status_code == 200:
+                    stats.update(r_stats.json())
             except (httpx.TimeoutException, httpx.HTTPError):
                 pass
 
@@ -209,29 +257,65 @@ async def tasks_page(
             status_code=r.status_code,
         )
 
-    filtered = items
-    if q:
-        ql = q.lower()
-        filtered = [
-            t
-            for t in filtered
-            if ql
-            in (t.get("title", "").lower() + " " + (t.get("description") or "").lower())
-        ]
-
-    if filter == "active":
-        filtered = [t for t in filtered if t.get("status") == "active"]
-    elif filter == "done":
-        filtered = [t for t in filtered if t.get("status") == "completed"]
-
     return templates.TemplateResponse(
         "tasks.html",
         {
             "request": request,
-            "tasks": filtered,
+            "tasks": filter_tasks(items, filter, q),
             "q": q or "",
             "filter": filter,
             "meta": meta,
             "stats": stats,
         },
     )
+
+
+@router.get("/tasks/fragment", response_class=HTMLResponse)
+async def tasks_fragment(
+    request: Request,
+    page: int = Query(default=1, ge=1),
+    limit: int = Query(default=20, ge=1, le=100),
+    filter: str = "all",
+    q: str | None = None,
+    user: UserOrm = Depends(get_current_auth_user_for_access),
+    repo: TaskRepository = Depends(get_task_repo),
+):
+    """Только список задач — для подмены на странице без перерисовки макета.
+
+    Задачи читаются из репозитория напрямую, без HTTP-запроса к своему API.
+    Версия берётся до чтения: запись, попавшая между ними, сменит версию, и
+    устаревший фрагмент под новым ключом не окажется.
+    """
+    key = (user.id, task_versions.get(user.id), page, limit, filter, q or "")
+    etag = fragment_cache.etag(key)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    html = fragment_cache.get(key)
+    if html is None:
+        items, total = await repo.get_by_pages(user.id, page, limit)
+        tasks = [TaskOutPublic.model_validate(t).model_dump(mode="json") for t in items]
+        meta = {
+            "page": page,
+            "pages": max(1, math.ceil(total / limit)),
+            "total": total,
+            "limit": limit,
+        }
+        html = templates.get_template("partials/task_list.html").render(
+            tasks=filter_tasks(tasks, filter, q),
+            meta=meta,
+            filter=filter,
+            q=q or "",
+        )
+        fragment_cache.set(key, html)
+    return HTMLResponse(html, headers=headers)
+
+
+def precompile_templates() -> int:
+    # компиляция при старте воркера, а не на первом запросе каждой страницы;
+    # при auto_reload=False Jinja потом не проверяет mtime файлов
+    names = templates.env.list_templates(filter_func=lambda name: name.endswith(".html"))
+    for name in names:
+        templates.env.get_template(name)
+    return len(names)
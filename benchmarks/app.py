@@ -0,0 +1,89 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from api.auth import create_access_token, create_refresh_token, rate_limiter
+from core.security import hash_password
+from db.database import get_session, get_session_maker
+from db.migrations import migrate
+from db.models.enums import TaskPriority, TaskStatus
+from db.models.task import TaskORM
+from db.models.user import UserOrm
+from main import app
+
+BENCH_PASSWORD = "benchpass"
+
+
+def configure_app(db_path: Path):
+    """Направляет приложение на базу бенчмарка и отключает rate limiter."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    session_maker = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+    async def override_get_session():
+        async with session_maker() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override_get_session
+    app.dependency_overrides[get_session_maker] = lambda: session_maker
+    app.dependency_overrides[rate_limiter] = lambda: None
+    return app
+
+
+def seed_database(db_path: Path, users: int, tasks_per_user: int) -> list[dict]:
+    db_path.unlink(missing_ok=True)
+    migrate(str(db_path))
+    engine = create_engine(f"sqlite:///{db_path}")
+    # один bcrypt-хеш на всех: сидирование не должно упираться в CPU
+    hashed = hash_password(BENCH_PASSWORD)
+    statuses = list(TaskStatus)
+    priorities = list(TaskPriority)
+
+    with engine.begin() as conn:
+        conn.execute(
+            insert(UserOrm.__table__),
+            [
+                {
+                    "name": f"bench{i}",
+                    "email": f"bench{i}@example.com",
+                    "hashed_password": hashed,
+                    "is_admin": False,
+                }
+                for i in range(users)
+            ],
+        )
+        user_ids = conn.execute(select(UserOrm.id).order_by(UserOrm.id)).scalars().all()
+        if tasks_per_user:
+            conn.execute(
+                insert(TaskORM.__table__),
+                [
+                    {
+                        "title": f"task {n}",
+                        "description": "benchmark task " * 8,
+                        "status": statuses[n % len(statuses)],
+                        "priority": priorities[n % len(priorities)],
+                        "term_date": None,
+                        "author_id": user_id,
+                    }
+                    for user_id in user_ids
+                    for n in range(tasks_per_user)
+                ],
+            )
+        rows = conn.execute(select(TaskORM.author_id, TaskORM.id)).all()
+    engine.dispose()
+
+    task_ids: dict[int, list[int]] = {user_id: [] for user_id in user_ids}
+    for author_id, task_id in rows:
+        task_ids[author_id].append(task_id)
+    return [
+        {"id": user_id, "email": f"bench{i}@example.com", "task_ids": task_ids[user_id]}
+        for i, user_id in enumerate(user_ids)
+    ]
+
+
+async def issue_tokens(users: list[dict]) -> None:
+    for user in users:
+        principal = SimpleNamespace(email=user["email"])
+        user["access"] = await create_access_token(principal)
+        user["refresh"] = await create_refresh_token(principal)
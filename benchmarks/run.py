@@ -0,0 +1,277 @@
+"""Нагрузочный бенчмарк API.
+
+Пример:
+    python -m benchmarks.run --users 20 --tasks-per-user 200 --requests 500 \
+        --concurrency 20 --mode both --output bench_results.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import platform
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable
+
+import httpx
+
+from benchmarks.app import BENCH_PASSWORD, configure_app, issue_tokens, seed_database
+
+SCENARIOS = ("register", "login", "list", "create", "update", "delete", "refresh")
+
+
+def percentile(ordered: list[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(q * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict:
+    ordered = sorted(latencies)
+    ms = 1000.0
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "rps": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(ordered) / len(ordered) * ms, 3) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50) * ms, 3),
+        "p95_ms": round(percentile(ordered, 0.95) * ms, 3),
+        "p99_ms": round(percentile(ordered, 0.99) * ms, 3),
+        "max_ms": round(ordered[-1] * ms, 3) if ordered else 0.0,
+    }
+
+
+async def measure(
+    requests: int,
+    concurrency: int,
+    call: Callable[[int], Awaitable[httpx.Response]],
+) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await call(i)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies.append(time.perf_counter() - start)
+            errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def run_scenarios(
+    client: httpx.AsyncClient, users: list[dict], requests: int, concurrency: int
+) -> dict:
+    run_id = uuid.uuid4().hex[:8]
+    created: list[tuple[dict, int]] = []
+
+    def user_for(i: int) -> dict:
+        return users[i % len(users)]
+
+    def bearer(token: str) -> dict:
+        return {"Authorization": f"Bearer {token}"}
+
+    async def register(i):
+        return await client.post(
+            "/api/registration",
+            json={
+                "name": f"new{i}",
+                "email": f"bench-{run_id}-{i}@example.com",
+                "password": BENCH_PASSWORD,
+            },
+        )
+
+    async def login(i):
+        return await client.post(
+            "/api/login",
+            data={"email": user_for(i)["email"], "password": BENCH_PASSWORD},
+        )
+
+    async def list_page(i):
+        return await client.get("/api/todos/1/20", headers=bearer(user_for(i)["access"]))
+
+    async def create(i):
+        user = user_for(i)
+        response = await client.post(
+            "/api/todos",
+            json={"title": f"bench {i}", "description": "created by benchmark"},
+            headers=bearer(user["access"]),
+        )
+        if response.status_code == 201:
+            created.append((user, response.json()["id"]))
+        return response
+
+    async def update(i):
+        user = user_for(i)
+        if user["task_ids"]:
+            task_id = user["task_ids"][i % len(user["task_ids"])]
+        else:
+            # --tasks-per-user 0: правим задачи, созданные сценарием create.
+            # Своих у пользователя может не быть, если requests < users
+            user, task_id = created[i % len(created)]
+        return await client.put(
+            f"/api/todos/{task_id}",
+            json={"title": f"updated {i}"},
+            headers=bearer(user["access"]),
+        )
+
+    async def delete(i):
+        user, task_id = created[i]
+        return await client.delete(
+            f"/api/todos/{task_id}", headers=bearer(user["access"])
+        )
+
+    async def refresh(i):
+        return await client.post("/api/refresh", headers=bearer(user_for(i)["refresh"]))
+
+    calls = {
+        "register": register,
+        "login": login,
+        "list": list_page,
+        "create": create,
+        "update": update,
+        "delete": delete,
+        "refresh": refresh,
+    }
+    results = {}
+    seeded = any(user["task_ids"] for user in users)
+    for name in SCENARIOS:
+        count = requests
+        if name == "delete":
+            count = len(created)
+        elif name == "update" and not seeded and not created:
+            # обновлять нечего: задачи не засеяны, и create не создал ни одной
+            count = 0
+        results[name] = await measure(count, concurrency, calls[name])
+    return results
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_until_ready(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get("/openapi.json")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"uvicorn не поднялся за {timeout} с")
+
+
+async def run_inprocess(db: Path, users: list[dict], args) -> dict:
+    app = configure_app(db)
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        return await run_scenarios(client, users, args.requests, args.concurrency)
+
+
+async def run_uvicorn(db: Path, users: list[dict], args) -> dict:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.server", "--db", str(db), "--port", str(port)]
+    )
+    try:
+        await wait_until_ready(base_url)
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+            return await run_scenarios(client, users, args.requests, args.concurrency)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for mode, scenarios in current["results"].items():
+        for name, stats in scenarios.items():
+            base = baseline.get("results", {}).get(mode, {}).get(name)
+            if base and stats["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+                regressions.append(
+                    f"{mode}/{name}: p95 {base['p95_ms']:.1f} -> {stats['p95_ms']:.1f} ms"
+                )
+    return regressions
+
+
+async def main_async(args) -> dict:
+    modes = ["inprocess", "uvicorn"] if args.mode == "both" else [args.mode]
+    report = {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "users": args.users,
+            "tasks_per_user": args.tasks_per_user,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "results": {},
+    }
+    for mode in modes:
+        # каждый режим стартует с одинакового набора данных
+        users = seed_database(args.db, args.users, args.tasks_per_user)
+        await issue_tokens(users)
+        runner = run_inprocess if mode == "inprocess" else run_uvicorn
+        report["results"][mode] = await runner(args.db, users, args)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк ToDoList API")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--tasks-per-user", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument(
+        "--mode", choices=("inprocess", "uvicorn", "both"), default="inprocess"
+    )
+    parser.add_argument("--db", type=Path, default=Path("bench.db"))
+    parser.add_argument("--output", type=Path, default=Path("bench_results.json"))
+    parser.add_argument("--baseline", type=Path, help="JSON прошлого прогона")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="допустимый рост p95 (0.2 = 20%%)"
+    )
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+
+    for mode, scenarios in report["results"].items():
+        for name, stats in scenarios.items():
+            print(
+                f"{mode:9} {name:8} {stats['rps']:9.1f} req/s  "
+                f"p50 {stats['p50_ms']:8.2f}  p95 {stats['p95_ms']:8.2f}  "
+                f"p99 {stats['p99_ms']:8.2f} ms  errors {stats['errors']}"
+            )
+
+    if args.baseline:
+        regressions = compare(report, json.loads(args.baseline.read_text()), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import argparse
+import os
+from pathlib import Path
+
+import uvicorn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="uvicorn-сервер для бенчмарка")
+    parser.add_argument("--db", type=Path, required=True)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    # до импорта main: движок, lifespan (миграции, шина инвалидации,
+    # обслуживание) и админка должны работать с базой бенчмарка, а не с tasks.db
+    os.environ["DATABASE__PATH"] = str(args.db)
+    from benchmarks.app import configure_app
+
+    app = configure_app(args.db)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
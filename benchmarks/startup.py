@@ -0,0 +1,154 @@
+"""Бенчмарк холодного старта: импорт main и время до первого ответа uvicorn.
+
+Каждый прогон — новый процесс в отдельном каталоге, где лежит (или ещё нет)
+tasks.db. cold — базы нет и схема создаётся, warm — база уже есть.
+
+Пример:
+    python -m benchmarks.startup --runs 5
+    COMPONENTS__ADMIN=false COMPONENTS__VIEWS=false python -m benchmarks.startup
+"""
+
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parents[1]
+IMPORT_SNIPPET = (
+    "import time; started = time.perf_counter(); import main; "
+    "print((time.perf_counter() - started) * 1000)"
+)
+
+
+def free_port() -> int:
+    # не из benchmarks.run: тот импортирует main, а замеряемый импорт — в подпроцессе
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def subprocess_env() -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+    return env
+
+
+def measure_import(workdir: Path) -> float:
+    out = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        cwd=workdir,
+        env=subprocess_env(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def measure_first_response(workdir: Path, timeout: float = 30.0) -> float:
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "main:app",
+            "--port", str(port), "--log-level", "warning",
+        ],
+        cwd=workdir,
+        env=subprocess_env(),
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}") as client:
+            while time.perf_counter() - started < timeout:
+                try:
+                    client.get("/metrics").raise_for_status()
+                    return (time.perf_counter() - started) * 1000
+                except httpx.TransportError:
+                    time.sleep(0.005)
+        raise RuntimeError(f"uvicorn не ответил за {timeout} с")
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def summarize(samples: list[float]) -> dict:
+    return {
+        "median_ms": round(statistics.median(samples), 1),
+        "min_ms": round(min(samples), 1),
+        "max_ms": round(max(samples), 1),
+    }
+
+
+def run(runs: int) -> dict:
+    results: dict[str, list[float]] = {"import": [], "cold": [], "warm": []}
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as tmp:
+            workdir = Path(tmp)
+            results["import"].append(measure_import(workdir))
+            results["cold"].append(measure_first_response(workdir))
+            results["warm"].append(measure_first_response(workdir))
+    return {name: summarize(samples) for name, samples in results.items()}
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for name, stats in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base and stats["median_ms"] > base["median_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: median {base['median_ms']:.1f} -> {stats['median_ms']:.1f} ms"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк холодного старта")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", type=Path, default=Path("startup_results.json"))
+    parser.add_argument("--baseline", type=Path, help="JSON прошлого прогона")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="допустимый рост медианы"
+    )
+    args = parser.parse_args()
+
+    report = {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "runs": args.runs,
+            "components": {
+                key: value
+                for key, value in os.environ.items()
+                if key.startswith("COMPONENTS__")
+            },
+        },
+        "results": run(args.runs),
+    }
+    args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+
+    for name, stats in report["results"].items():
+        print(
+            f"{name:6} median {stats['median_ms']:8.1f}  "
+            f"min {stats['min_ms']:8.1f}  max {stats['max_ms']:8.1f} ms"
+        )
+
+    if args.baseline:
+        regressions = compare(report, json.loads(args.baseline.read_text()), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import asyncio
+import time
+from collections import deque
+
+from starlette.responses import JSONResponse
+
+from core.config import AdmissionClass
+from core.metrics import REGISTRY, Counter, Gauge, Histogram
+
+admission_in_flight = REGISTRY.register(
+    Gauge("admission_in_flight", "Выполняемые запросы по классам допуска", ("class",))
+)
+admission_queue_depth = REGISTRY.register(
+    Gauge("admission_queue_depth", "Запросы, ждущие допуска, по классам", ("class",))
+)
+admission_wait = REGISTRY.register(
+    Histogram(
+        "admission_wait_seconds",
+        "Ожидание допуска в очереди класса",
+        ("class",),
+        buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0),
+    )
+)
+admission_rejected = REGISTRY.register(
+    Counter(
+        "admission_rejected_total",
+        "Отказы 503: очередь полна (queue_full) или истекло ожидание (timeout)",
+        ("class", "reason"),
+    )
+)
+
+AUTH_PATHS = frozenset({"/api/login", "/api/registration"})
+# долгоживущие и дешёвые ответы: SSE держал бы место в лимите часами
+EXEMPT_PATHS = frozenset({"/metrics", "/api/todos/events"})
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+
+def classify(method: str, path: str) -> str | None:
+    """Класс допуска запроса; None — без ограничений."""
+    if path in EXEMPT_PATHS or path.startswith("/static/"):
+        return None
+    if path in AUTH_PATHS:
+        return "auth"
+    if path.startswith(("/api/admin/", "/admin")):
+        return "admin"
+    # HTML-страницы только проксируют в API, а API ограничен сам: лимит и на
+    # странице, и на её вложенном запросе мог бы заблокировать их друг о друга
+    if not path.startswith("/api/") and path != "/tasks/fragment":
+        return None
+    return "write" if method in WRITE_METHODS else "read"
+
+
+class Rejected(Exception):
+    def __init__(self, reason: str):
+        self.reason = reason
+
+
+class ConcurrencyLimit:
+    """Семафор с ограниченной FIFO-очередью и сроком ожидания.
+
+    Освободившееся место передаётся первому ждущему напрямую, минуя счётчик:
+    новый запрос не обгонит очередь.
+    """
+
+    def __init__(self, name: str, limit: int, queue_size: int, timeout: float):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> None:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            admission_in_flight.inc(self.name)
+            return
+        if len(self._waiters) >= self.queue_size:
+            raise Rejected("queue_full")
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        admission_queue_depth.inc(self.name)
+        started = time.perf_counter()
+        try:
+            # место, переданное одновременно с таймаутом, wait_for всё же вернёт
+            await asyncio.wait_for(waiter, self.timeout)
+        except asyncio.TimeoutError:
+            raise Rejected("timeout") from None
+        except asyncio.CancelledError:
+            # клиент ушёл в момент передачи места: вернуть его следующему
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            admission_wait.observe(time.perf_counter() - started, self.name)
+            admission_queue_depth.dec(self.name)
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+        admission_in_flight.dec(self.name)
+
+
+class AdmissionMiddleware:
+    """Допуск запросов по классам: auth, read, write, admin.
+
+    У класса свой лимит одновременных запросов и своя очередь, поэтому вход,
+    занятый bcrypt, не задерживает чтение списков. Полная очередь или истёкшее
+    ожидание — сразу 503 с Retry-After, пока задержка не выросла у всех.
+    """
+
+    def __init__(self, app, classes: dict[str, AdmissionClass], retry_after: int = 1):
+        self.app = app
+        self.retry_after = retry_after
+        self.limits = {
+            name: ConcurrencyLimit(
+                name, config.limit, config.queue_size, config.queue_timeout_ms / 1000
+            )
+            for name, config in classes.items()
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        limit = self.limits.get(classify(scope["method"], scope["path"]))
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+        try:
+            await limit.acquire()
+        except Rejected as exc:
+            admission_rejected.inc(limit.name, exc.reason)
+            response = JSONResponse(
+                {"detail": "Сервер перегружен, повторите запрос позже"},
+                status_code=503,
+                headers={"Retry-After": str(self.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limit.release()
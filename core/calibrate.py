@@ -0,0 +1,53 @@
+"""Подбор cost bcrypt под целевое время проверки пароля на этой машине.
+
+    python -m core.calibrate --target-ms 250
+
+Печатает время checkpw для каждого cost и рекомендуемое значение
+PASSWORD_HASHING__ROUNDS — наибольший cost, укладывающийся в цель.
+"""
+
+import argparse
+import statistics
+import time
+
+import bcrypt
+
+MIN_ROUNDS = 4
+MAX_ROUNDS = 20
+
+
+def measure(rounds: int, samples: int) -> float:
+    hashed = bcrypt.hashpw(b"calibration-password", bcrypt.gensalt(rounds))
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        bcrypt.checkpw(b"calibration-password", hashed)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def calibrate(target_ms: float, samples: int = 3, log=print) -> int:
+    chosen = MIN_ROUNDS
+    for rounds in range(MIN_ROUNDS, MAX_ROUNDS + 1):
+        ms = measure(rounds, samples)
+        log(f"rounds={rounds:2d}  {ms:9.1f} мс")
+        if ms > target_ms:
+            break
+        chosen = rounds
+    return chosen
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Подбор cost bcrypt")
+    parser.add_argument(
+        "--target-ms", type=float, default=250, help="целевое время проверки пароля"
+    )
+    parser.add_argument("--samples", type=int, default=3)
+    args = parser.parse_args()
+
+    rounds = calibrate(args.target_ms, args.samples)
+    print(f"PASSWORD_HASHING__ROUNDS={rounds}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import gzip
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from core.metrics import REGISTRY, Counter
+
+try:
+    import brotli
+except ImportError:  # brotli — необязательная зависимость, без неё только gzip
+    brotli = None
+
+compression_bytes = REGISTRY.register(
+    Counter(
+        "http_compression_bytes_total",
+        "Байты тел ответов до (in) и после (out) сжатия, по кодировкам",
+        ("encoding", "direction"),
+    )
+)
+
+# картинки, шрифты и архивы уже сжаты: второй раз только тратит CPU
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+# SSE: gzip-буфер задерживал бы события до заполнения блока
+SKIP_TYPES = ("text/event-stream",)
+
+
+def supported_encodings() -> tuple[str, ...]:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding: str, available=None) -> str | None:
+    """Кодировка из Accept-Encoding; при равных q предпочитаем br."""
+    available = supported_encodings() if available is None else available
+    weights = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                continue
+        weights[name.strip()] = q
+    best = None
+    for encoding in available:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > 0 and (best is None or q > best[1]):
+            best = (encoding, q)
+    return best[0] if best else None
+
+
+def is_compressible(content_type: str) -> bool:
+    content_type = content_type.lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES) and not content_type.startswith(
+        SKIP_TYPES
+    )
+
+
+def compress(body: bytes, encoding: str, level: int | None = None) -> bytes:
+    # для статики — максимальный уровень: сжимается один раз при старте
+    if encoding == "br":
+        return brotli.compress(body, quality=11 if level is None else level)
+    return gzip.compress(body, compresslevel=9 if level is None else level, mtime=0)
+
+
+class StreamEncoder:
+    """Потоковое сжатие: каждый кусок отдаётся сразу, а не копится до конца."""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.finish()
+        return self._zlib.compress(data) + self._zlib.flush()
+
+
+class CompressionMiddleware:
+    """gzip/brotli для ответов от minimum_size байт.
+
+    Ответ целиком (одно тело) сжимается за раз и получает Content-Length.
+    Потоковый ответ сжимается по кускам с flush после каждого, чтобы клиент
+    получал данные, не дожидаясь конца. Ответы с Content-Encoding (сжатая
+    заранее статика), несжимаемые типы и SSE проходят как есть.
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        encoder: StreamEncoder | None = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, encoder, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if "content-encoding" in headers or not is_compressible(
+                    headers.get("content-type", "")
+                ):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # заголовки уйдут вместе с первым куском тела
+                    start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if encoder is None:
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                encoder = StreamEncoder(encoding, self.gzip_level, self.brotli_quality)
+                headers = MutableHeaders(raw=start["headers"])
+                headers["content-encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    del headers["content-length"]
+                    data = encoder.chunk(body)
+                else:
+                    data = encoder.finish(body)
+                    headers["content-length"] = str(len(data))
+                await send(start)
+            else:
+                data = encoder.chunk(body) if more_body else encoder.finish(body)
+            compression_bytes.inc(encoding, "in", amount=len(body))
+            compression_bytes.inc(encoding, "out", amount=len(data))
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
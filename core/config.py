@@ -1,6 +1,7 @@
+import os
 from pathlib import Path
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -11,11 +12,173 @@ class AuthJWT(BaseModel):
     public_key_path: Path = ROOT / "public.pem"
     access_token_expire: int = 30
     refresh_token_expire_days: int = 7
+    # как часто фильтр отозванных токенов перечитывается из БД: столько же
+    # токен, отозванный в другом воркере, ещё принимается этим
+    revocation_refresh_seconds: float = 10
+    revocation_bloom_capacity: int = 100_000
+
+
+class PasswordHashing(BaseModel):
+    workers: int = max(1, os.cpu_count() or 1)
+    # cost bcrypt (2**rounds итераций); подобрать под железо: python -m core.calibrate
+    rounds: int = Field(default=12, ge=4, le=31)
+
+
+class Database(BaseModel):
+    # файл SQLite приложения; бенчмарк подменяет его через DATABASE__PATH
+    path: str = "tasks.db"
+
+
+class SQL(BaseModel):
+    # None — без ограничения; превышение пишется в лог как warning
+    query_budget: int | None = None
+    route_query_budgets: dict[str, int] = {}
+    # dev-режим: превышение бюджета роняет запрос с QueryBudgetExceeded
+    enforce_query_budget: bool = False
+    # порог медленного запроса; None — лог медленных запросов выключен
+    slow_query_ms: float | None = None
+
+
+class Profiling(BaseModel):
+    # выключено — middleware не подключается и ничего не стоит
+    enabled: bool = False
+    # значение заголовка X-Profile-Token, включающего профилирование запроса
+    token: str | None = None
+    sample_rate: float = 0.0
+    directory: Path = ROOT / "profiles"
+    max_files: int = 50
+
+
+class EventLoopMonitor(BaseModel):
+    enabled: bool = False
+    interval_ms: float = 50
+    # блокировка loop'а дольше порога пишется в лог вместе со стеком
+    threshold_ms: float = 100
+
+
+class Components(BaseModel):
+    # выключенные компоненты даже не импортируются: sqladmin, wtforms, Jinja2 и
+    # httpx заметно удлиняют холодный старт воркера
+    admin: bool = True
+    views: bool = True
+
+
+class Archive(BaseModel):
+    # завершённые задачи старше стольких дней переносятся в tasks_archive
+    after_days: int = 30
+    chunk_size: int = 2_000
+
+
+class TaskSync(BaseModel):
+    # записей журнала за один ответ /api/todos/changes
+    changes_limit: int = 500
+    # журнал старше стольких дней сжимается; клиенту, отставшему сильнее,
+    # /api/todos/changes ответит full_resync
+    retention_days: int = 30
+    compact_chunk_size: int = 5_000
+
+
+class Events(BaseModel):
+    # SSE-подключений на пользователя в одном воркере; сверх — 429
+    max_connections_per_user: int = 5
+    # событий в очереди подключения; переполнение заменяется одним resync
+    queue_size: int = 100
+    heartbeat_seconds: float = 15
+
+
+class AdmissionClass(BaseModel):
+    # одновременно выполняемых запросов класса в воркере
+    limit: int = Field(ge=1)
+    # ждущих свободного места; сверх — сразу 503
+    queue_size: int = Field(ge=0)
+    # дольше в очереди не ждём: клиенту полезнее быстрый 503, чем таймаут
+    queue_timeout_ms: int = Field(ge=1)
+
+
+class Admission(BaseModel):
+    # SSE, /metrics, статика и HTML-страницы (они сами ходят в API) не ограничиваются
+    enabled: bool = True
+    retry_after_seconds: int = 1
+    # вход и регистрация — bcrypt в пуле потоков, их число близко к числу ядер
+    auth: AdmissionClass = AdmissionClass(limit=4, queue_size=32, queue_timeout_ms=2000)
+    read: AdmissionClass = AdmissionClass(limit=64, queue_size=256, queue_timeout_ms=1000)
+    # SQLite пишет в один поток: больше параллельных записей — только дольше ожидание блокировки
+    write: AdmissionClass = AdmissionClass(limit=16, queue_size=128, queue_timeout_ms=2000)
+    admin: AdmissionClass = AdmissionClass(limit=4, queue_size=8, queue_timeout_ms=10000)
+
+
+class Templates(BaseModel):
+    # true — Jinja перечитывает изменённые шаблоны (разработка); в продакшене
+    # шаблоны компилируются один раз при старте и файлы больше не проверяются
+    auto_reload: bool = False
+    # отрендеренных фрагментов списка задач в памяти воркера
+    fragment_cache_size: int = 1_000
+
+
+class Compression(BaseModel):
+    enabled: bool = True
+    # меньшие ответы сжатие почти не уменьшает, а CPU тратит
+    minimum_size: int = 1024
+    # уровни для ответов API: сжимаются на каждый запрос, поэтому не максимум
+    gzip_level: int = Field(default=6, ge=1, le=9)
+    brotli_quality: int = Field(default=4, ge=0, le=11)
+
+
+class Invalidation(BaseModel):
+    # раз в столько миллисекунд воркер проверяет PRAGMA data_version: это
+    # верхняя граница задержки, с которой он видит записи других воркеров
+    poll_interval_ms: int = 50
+    # строки cache_invalidations старше этого удаляет планировщик
+    retention_seconds: float = 3600
+
+
+class Maintenance(BaseModel):
+    # задачи обслуживания базы выполняет один воркер за интервал (flock на
+    # файлы в lock_dir); перестройка фильтра отозванных токенов идёт всегда
+    enabled: bool = True
+    lock_dir: Path = ROOT / "locks"
+    jitter: float = Field(default=0.1, ge=0, lt=1)
+    optimize_seconds: float = 3600
+    checkpoint_seconds: float = 300
+    rate_limit_prune_seconds: float = 300
+    archive_seconds: float = 3600
+    changes_compact_seconds: float = 3600
+    invalidations_prune_seconds: float = 600
+    # столько секунд остановка ждёт выполняющиеся задачи, потом отменяет их
+    shutdown_timeout: float = 10
+
+
+class AdminPanel(BaseModel):
+    # ключ подписи cookie сессии; None — выводится из закрытого ключа JWT
+    secret_key: str | None = None
+    # столько секунд админ из подписанной сессии не перепроверяется в БД
+    principal_ttl_seconds: int = 60
+    # больше строк — список задач показывает оценку из sqlite_stat1 вместо count(*)
+    exact_count_limit: int = 100_000
+    # строк на одну транзакцию массовых операций над задачами
+    bulk_chunk_size: int = 2_000
+    # «удалить завершённые старше N дней» из админки
+    bulk_older_than_days: int = 90
 
 
 class Settings(BaseSettings):
     ALGORITHM: str
+    database: Database = Database()
     auth_jwt: AuthJWT = AuthJWT()
+    password_hashing: PasswordHashing = PasswordHashing()
+    sql: SQL = SQL()
+    profiling: Profiling = Profiling()
+    loop_monitor: EventLoopMonitor = EventLoopMonitor()
+    components: Components = Components()
+    admin_panel: AdminPanel = AdminPanel()
+    archive: Archive = Archive()
+    task_sync: TaskSync = TaskSync()
+    events: Events = Events()
+    invalidation: Invalidation = Invalidation()
+    compression: Compression = Compression()
+    templates: Templates = Templates()
+    admission: Admission = Admission()
+    maintenance: Maintenance = Maintenance()
 
     model_config = SettingsConfigDict(
         env_file=str(ROOT / ".env"),
@@ -0,0 +1,51 @@
+import hashlib
+from collections import OrderedDict
+from typing import Hashable
+
+from core.invalidation import invalidation_bus
+from core.metrics import REGISTRY, Counter
+
+fragment_cache_requests = REGISTRY.register(
+    Counter(
+        "fragment_cache_requests_total",
+        "Обращения к кешу HTML-фрагментов: hit, miss",
+        ("result",),
+    )
+)
+
+
+class FragmentCache:
+    """LRU отрендеренных HTML-фрагментов.
+
+    В ключ входит версия данных пользователя (core.invalidation.task_versions),
+    поэтому явной инвалидации нет: после записи задач ключ меняется, а старые
+    фрагменты вытесняются по LRU. Память ограничена maxsize фрагментами.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._items: OrderedDict[Hashable, str] = OrderedDict()
+
+    def get(self, key: Hashable) -> str | None:
+        html = self._items.get(key)
+        if html is None:
+            fragment_cache_requests.inc("miss")
+            return None
+        self._items.move_to_end(key)
+        fragment_cache_requests.inc("hit")
+        return html
+
+    def set(self, key: Hashable, html: str) -> None:
+        self._items[key] = html
+        self._items.move_to_end(key)
+        if len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    @staticmethod
+    def etag(key: Hashable) -> str:
+        # версии считает каждый процесс сам: origin не даёт двум воркерам
+        # выдать одинаковый ETag для разных данных
+        digest = hashlib.blake2b(
+            repr((invalidation_bus.origin, key)).encode(), digest_size=12
+        ).hexdigest()
+        return f'"{digest}"'
@@ -0,0 +1,190 @@
+import asyncio
+import itertools
+import logging
+import sqlite3
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from typing import Callable
+
+from core.config import settings
+from core.metrics import REGISTRY, Counter, Histogram
+
+logger = logging.getLogger("app.invalidation")
+
+invalidation_delay = REGISTRY.register(
+    Histogram(
+        "cache_invalidation_delay_seconds",
+        "Задержка от коммита до получения инвалидации другим воркером",
+        buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+    )
+)
+invalidations_received = REGISTRY.register(
+    Counter(
+        "cache_invalidations_received_total",
+        "Инвалидации, полученные из шины, по темам",
+        ("topic",),
+    )
+)
+
+# подписчик темы RESET получает key=None: часть событий потеряна, сбросить всё
+RESET = "*"
+POLL_SQL = (
+    "SELECT seq, topic, key, origin, created_at FROM cache_invalidations "
+    "WHERE seq > ? ORDER BY seq LIMIT 1000"
+)
+LAST_SEQ_SQL = "SELECT seq FROM sqlite_sequence WHERE name = 'cache_invalidations'"
+
+
+class InvalidationBus:
+    """Шина инвалидации кешей между воркерами через таблицу cache_invalidations.
+
+    Запись в таблицу идёт в транзакции самой мутации (db.models.cache_invalidation),
+    после коммита своему процессу событие раздаётся сразу. Остальные воркеры
+    раз в poll_interval спрашивают PRAGMA data_version на своём соединении — он
+    меняется, только если базу закоммитило другое соединение, — и лишь тогда
+    читают новые строки. Задержка распространения ограничена poll_interval
+    плюс время одного SELECT.
+    """
+
+    def __init__(self, poll_interval: float):
+        self.poll_interval = poll_interval
+        # строки своего процесса пришли уже локально, из опроса их пропускаем
+        self.origin = uuid.uuid4().hex
+        self._handlers: dict[str, list[Callable[[str | None], None]]] = defaultdict(list)
+        self._remote_handlers: dict[str, list[Callable[[str | None], None]]] = (
+            defaultdict(list)
+        )
+        self._conn: sqlite3.Connection | None = None
+        self._data_version: int | None = None
+        self._last_seq = 0
+        self._task: asyncio.Task | None = None
+
+    def subscribe(
+        self,
+        topic: str,
+        handler: Callable[[str | None], None],
+        remote_only: bool = False,
+    ) -> None:
+        """remote_only — только события других воркеров: свои подписчик уже
+        обработал сам, например разослал точные события задач после коммита."""
+        handlers = self._remote_handlers if remote_only else self._handlers
+        handlers[topic].append(handler)
+
+    def dispatch(self, topic: str, key: str | None, remote: bool = False) -> None:
+        handlers = self._handlers.get(topic, [])
+        if remote:
+            handlers = handlers + self._remote_handlers.get(topic, [])
+        for handler in handlers:
+            try:
+                handler(key)
+            except Exception:
+                logger.exception("обработчик инвалидации %s упал", topic)
+
+    def _connect(self, database: str) -> None:
+        self._conn = sqlite3.connect(database, check_same_thread=False)
+        self._conn.execute("PRAGMA busy_timeout = 1000")
+        self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        row = self._conn.execute(LAST_SEQ_SQL).fetchone()
+        self._last_seq = row[0] if row else 0
+
+    def _read_changes(self) -> list[tuple] | None:
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._data_version:
+            return None
+        self._data_version = version
+        rows = []
+        while True:
+            batch = self._conn.execute(POLL_SQL, (self._last_seq,)).fetchall()
+            rows.extend(batch)
+            if batch:
+                self._last_seq = batch[-1][0]
+            if len(batch) < 1000:
+                return rows
+
+    async def poll(self) -> int:
+        # чтение — в потоке: event loop не ждёт файловых блокировок SQLite
+        expected = self._last_seq + 1
+        rows = await asyncio.to_thread(self._read_changes)
+        if not rows:
+            return 0
+        if rows[0][0] > expected:
+            # воркер отстал дольше срока хранения: строки уже удалены
+            logger.warning("пропущены инвалидации %s..%s", expected, rows[0][0] - 1)
+            self.dispatch(RESET, None, remote=True)
+        now = time.time()
+        for _, topic, key, origin, created_at in rows:
+            if origin == self.origin:
+                continue
+            invalidation_delay.observe(max(0.0, now - created_at))
+            invalidations_received.inc(topic)
+            self.dispatch(topic, key, remote=True)
+        return len(rows)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.poll()
+            except Exception:
+                logger.exception("не удалось прочитать cache_invalidations")
+
+    async def start(self, database: str) -> None:
+        await asyncio.to_thread(self._connect, database)
+        self._task = asyncio.create_task(self._run(), name="invalidation-bus")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class DataVersions:
+    """Версии данных по ключу (id пользователя) для ключей кешей и ETag.
+
+    Версии выдаются из одного возрастающего счётчика, поэтому ключ, вытесненный
+    из LRU и появившийся снова, не получит уже выданную версию, и старые записи
+    кеша не оживут. Память ограничена maxsize ключами.
+    """
+
+    def __init__(self, maxsize: int = 10_000):
+        self.maxsize = maxsize
+        self._counter = itertools.count(1)
+        self._versions: OrderedDict[int, int] = OrderedDict()
+
+    def get(self, key: int) -> int:
+        version = self._versions.get(key)
+        if version is None:
+            return self.bump(key)
+        self._versions.move_to_end(key)
+        return version
+
+    def bump(self, key: int) -> int:
+        version = self._versions[key] = next(self._counter)
+        self._versions.move_to_end(key)
+        if len(self._versions) > self.maxsize:
+            self._versions.popitem(last=False)
+        return version
+
+    def reset(self) -> None:
+        self._versions.clear()
+
+    def invalidate(self, key: str | None) -> None:
+        if key is None:
+            self.reset()
+        else:
+            self.bump(int(key))
+
+
+invalidation_bus = InvalidationBus(settings.invalidation.poll_interval_ms / 1000)
+# версия задач пользователя: меняется при любой записи его задач в любом воркере
+task_versions = DataVersions()
+invalidation_bus.subscribe("tasks", task_versions.invalidate)
+invalidation_bus.subscribe(RESET, task_versions.invalidate)
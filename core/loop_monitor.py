@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass
+
+from core.metrics import REGISTRY, Counter, Gauge, Histogram
+
+logger = logging.getLogger("app.loop")
+
+event_loop_lag = REGISTRY.register(
+    Histogram(
+        "event_loop_lag_seconds",
+        "Задержка пробуждения таймера event loop'а",
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+    )
+)
+event_loop_lag_last = REGISTRY.register(
+    Gauge("event_loop_lag_last_seconds", "Последняя измеренная задержка event loop'а")
+)
+event_loop_blocked = REGISTRY.register(
+    Counter("event_loop_blocked_total", "Блокировки event loop'а дольше порога")
+)
+
+
+@dataclass
+class BlockedCall:
+    seconds: float
+    stack: str
+
+
+class LoopMonitor:
+    """Сторож event loop'а.
+
+    Корутина-пульс каждые interval секунд отмечается и меряет задержку своего
+    пробуждения. Отдельный поток следит за пульсом: если loop не отвечает дольше
+    threshold, поток снимает стек потока loop'а — это и есть блокирующий вызов.
+    """
+
+    def __init__(self, interval: float = 0.05, threshold: float = 0.1):
+        self.interval = interval
+        self.threshold = threshold
+        self.blocked: deque[BlockedCall] = deque(maxlen=50)
+        self._last_beat = time.monotonic()
+        self._reported = False
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    async def _heartbeat(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            event_loop_lag.observe(lag)
+            event_loop_lag_last.set(lag)
+            if lag > self.threshold:
+                event_loop_blocked.inc()
+            self._last_beat = time.monotonic()
+            self._reported = False
+
+    def _watchdog(self) -> None:
+        while not self._stop.wait(self.interval / 2):
+            stalled = time.monotonic() - self._last_beat - self.interval
+            if stalled <= self.threshold or self._reported:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            self._reported = True
+            stack = "".join(traceback.format_stack(frame))
+            self.blocked.append(BlockedCall(seconds=stalled, stack=stack))
+            logger.warning(
+                "event loop заблокирован дольше %.0f мс:\n%s", stalled * 1000, stack
+            )
+
+    def start(self) -> None:
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._thread = threading.Thread(
+            target=self._watchdog, name="loop-watchdog", daemon=True
+        )
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,203 @@
+"""Метрики в формате Prometheus.
+
+Все изменения метрик происходят в потоке event loop'а, поэтому обходимся без
+блокировок: обновление — это одна операция над dict/list. Гистограммы имеют
+фиксированный набор бакетов, так что память не растёт с числом наблюдений.
+"""
+
+import time
+from bisect import bisect_left
+from typing import Iterable
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+
+    def header(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+
+
+class Counter(Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        super().__init__(name, documentation, labelnames)
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def get(self, *labels) -> float:
+        return self.values.get(labels, 0)
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        for labels, value in self.values.items():
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    type_name = "gauge"
+
+    def dec(self, *labels, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels) -> None:
+        self.values[labels] = value
+
+
+class Histogram(Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple = (),
+        buckets: tuple = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [счётчики по бакетам (+Inf последним), сумма, количество]
+        self.series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, *labels) -> int:
+        series = self.series.get(labels)
+        return series[2] if series else 0
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        for labels, (counts, total, count) in self.series.items():
+            cumulative = 0
+            bounds = [_number(b) for b in self.buckets] + ["+Inf"]
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                label_str = _labels(self.labelnames, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{label_str} {cumulative}")
+            label_str = _labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {_number(total)}")
+            lines.append(f"{self.name}_count{label_str} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: list[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+http_request_duration = REGISTRY.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Время обработки HTTP-запроса",
+        ("method", "route"),
+    )
+)
+http_requests_in_flight = REGISTRY.register(
+    Gauge("http_requests_in_flight", "Запросы в обработке")
+)
+http_responses_total = REGISTRY.register(
+    Counter(
+        "http_responses_total",
+        "Ответы по маршрутам и кодам статуса",
+        ("method", "route", "status"),
+    )
+)
+db_pool_checkout_wait = REGISTRY.register(
+    Histogram(
+        "db_pool_checkout_wait_seconds",
+        "Ожидание соединения из пула БД",
+        buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+    )
+)
+rate_limit_rejections = REGISTRY.register(
+    Counter("rate_limit_rejections_total", "Запросы, отклонённые rate limiter'ом")
+)
+password_hash_queue_depth = REGISTRY.register(
+    Gauge(
+        "password_hash_queue_depth",
+        "bcrypt-операции в очереди и в работе",
+    )
+)
+
+
+def route_label(scope: dict) -> str:
+    # шаблон пути вместо сырого URL, чтобы число серий не росло с id задач
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    return scope.get("root_path") or "<unmatched>"
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec()
+            route = route_label(scope)
+            method = scope["method"]
+            http_request_duration.observe(time.perf_counter() - started, method, route)
+            http_responses_total.inc(method, route, str(status_code))
@@ -0,0 +1,102 @@
+import asyncio
+import cProfile
+import hmac
+import io
+import pstats
+import random
+import re
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from starlette.datastructures import Headers
+
+from core.config import settings
+
+PROFILE_HEADER = "x-profile-token"
+
+
+class ProfileStore:
+    """Кольцевой буфер .pstats-файлов на диске: хранятся последние max_files."""
+
+    def __init__(self, directory: Path, max_files: int):
+        self.directory = directory
+        self.max_files = max_files
+
+    def save(self, profiler: cProfile.Profile, method: str, path: str, ms: float) -> str:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_") or "root"
+        name = f"{stamp}-{method}-{slug[:60]}-{ms:.0f}ms.pstats"
+        profiler.dump_stats(self.directory / name)
+        for old in self.list()[self.max_files :]:
+            old.unlink(missing_ok=True)
+        return name
+
+    def list(self) -> list[Path]:
+        if not self.directory.exists():
+            return []
+        return sorted(self.directory.glob("*.pstats"), reverse=True)
+
+    def get(self, name: str) -> Path | None:
+        path = self.directory / Path(name).name
+        return path if path.suffix == ".pstats" and path.exists() else None
+
+    def render_text(self, name: str, limit: int = 60) -> str | None:
+        path = self.get(name)
+        if path is None:
+            return None
+        out = io.StringIO()
+        stats = pstats.Stats(str(path), stream=out)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+        return out.getvalue()
+
+
+profile_store = ProfileStore(settings.profiling.directory, settings.profiling.max_files)
+
+
+class ProfilingMiddleware:
+    """Профилирует запрос cProfile'ом по заголовку X-Profile-Token или по sampling.
+
+    cProfile видит весь поток, поэтому одновременно профилируется не больше
+    одного запроса, а в отчёт попадают и конкурентные корутины. Middleware
+    подключается только при settings.profiling.enabled.
+    """
+
+    def __init__(self, app, store: ProfileStore = profile_store):
+        self.app = app
+        self.store = store
+        self.active = False
+
+    def _wants_profile(self, scope) -> bool:
+        token = settings.profiling.token
+        if token:
+            supplied = Headers(scope=scope).get(PROFILE_HEADER)
+            if supplied and hmac.compare_digest(supplied, token):
+                return True
+        rate = settings.profiling.sample_rate
+        return rate > 0 and random.random() < rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.active or not self._wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        self.active = True
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.disable()
+            self.active = False
+            ms = (time.perf_counter() - started) * 1000
+            await asyncio.get_running_loop().run_in_executor(
+                None,
+                self.store.save,
+                profiler,
+                scope["method"],
+                scope["path"],
+                ms,
+            )
@@ -0,0 +1,141 @@
+import asyncio
+import json
+from collections import defaultdict
+from typing import AsyncIterator
+
+from core.config import settings
+from core.invalidation import RESET, invalidation_bus
+from core.metrics import REGISTRY, Counter, Gauge
+
+event_subscribers = REGISTRY.register(
+    Gauge("event_subscribers", "Открытые подписки на события задач (SSE)")
+)
+events_dropped = REGISTRY.register(
+    Counter(
+        "events_dropped_total",
+        "События, выброшенные из-за переполненной очереди медленного клиента",
+    )
+)
+
+# клиенту, потерявшему события, остаётся перечитать дельту: /api/todos/changes
+RESYNC = "resync"
+
+
+class TooManySubscriptions(Exception):
+    pass
+
+
+class Subscription:
+    """Очередь событий одного подключения.
+
+    Очередь ограничена: если клиент не успевает читать, накопленное
+    выбрасывается и вместо него он получит одно событие resync. Память на
+    подключение не зависит от скорости клиента и потока изменений.
+    """
+
+    def __init__(self, user_id: int, queue_size: int):
+        self.user_id = user_id
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def put(self, event: dict) -> None:
+        if self.overflowed:
+            events_dropped.inc()
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            events_dropped.inc(amount=self.queue.qsize() + 1)
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            # будим читателя, чтобы он отправил resync
+            self.queue.put_nowait({"type": RESYNC})
+
+    async def get(self) -> dict:
+        event = await self.queue.get()
+        if event.get("type") == RESYNC:
+            self.overflowed = False
+        return event
+
+
+class Broker:
+    """Pub/sub внутри процесса: события задач расходятся по подпискам владельца.
+
+    Все вызовы — в потоке event loop'а, поэтому без блокировок. Подписки
+    живут в памяти воркера: о записях в других воркерах он узнаёт из шины
+    инвалидации (см. publish_remote).
+    """
+
+    def __init__(self, max_per_user: int, queue_size: int):
+        self.max_per_user = max_per_user
+        self.queue_size = queue_size
+        self._subscriptions: dict[int, set[Subscription]] = defaultdict(set)
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscriptions = self._subscriptions[user_id]
+        if len(subscriptions) >= self.max_per_user:
+            raise TooManySubscriptions(user_id)
+        subscription = Subscription(user_id, self.queue_size)
+        subscriptions.add(subscription)
+        event_subscribers.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self._subscriptions.get(subscription.user_id)
+        if subscriptions is None or subscription not in subscriptions:
+            return
+        subscriptions.discard(subscription)
+        event_subscribers.dec()
+        if not subscriptions:
+            del self._subscriptions[subscription.user_id]
+
+    def publish(self, user_id: int, event: dict) -> None:
+        for subscription in self._subscriptions.get(user_id, ()):
+            subscription.put(dict(event))
+
+    def publish_all(self, event: dict) -> None:
+        for subscriptions in self._subscriptions.values():
+            for subscription in subscriptions:
+                subscription.put(dict(event))
+
+    def publish_remote(self, key: str | None) -> None:
+        """Запись задач в другом воркере. В шине только id пользователя, без
+        id задач, поэтому клиент получает resync и перечитывает дельту.
+        key=None — часть инвалидаций потеряна, resync получают все."""
+        if key is None:
+            self.publish_all({"type": RESYNC})
+        else:
+            self.publish(int(key), {"type": RESYNC})
+
+    def subscriber_count(self, user_id: int) -> int:
+        return len(self._subscriptions.get(user_id, ()))
+
+    async def sse(self, user_id: int, heartbeat: float) -> AsyncIterator[str]:
+        """Поток в формате text/event-stream; комментарий-пульс раз в heartbeat
+        секунд не даёт прокси закрыть простаивающее соединение.
+
+        Подписка создаётся внутри генератора: если клиент отключится раньше,
+        чем поток начнётся, finally не выполнится, и подписка осталась бы висеть.
+        """
+        try:
+            subscription = self.subscribe(user_id)
+        except TooManySubscriptions:
+            return
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                kind = event.pop("type", "task")
+                yield f"event: {kind}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            self.unsubscribe(subscription)
+
+
+task_events = Broker(settings.events.max_connections_per_user, settings.events.queue_size)
+invalidation_bus.subscribe("tasks", task_events.publish_remote, remote_only=True)
+invalidation_bus.subscribe(RESET, task_events.publish_remote, remote_only=True)
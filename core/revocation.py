@@ -0,0 +1,74 @@
+import time
+from typing import Protocol
+
+from core.bloom import BloomFilter
+from core.config import settings
+from core.invalidation import invalidation_bus
+from core.metrics import REGISTRY, Counter
+
+token_revocation_checks = REGISTRY.register(
+    Counter(
+        "token_revocation_checks_total",
+        "Проверки отзыва токена: отсечено фильтром, отозван, ложное срабатывание",
+        ("result",),
+    )
+)
+
+
+class RevokedTokens(Protocol):
+    async def add(self, jti: str, user_id: int, expires_at: int) -> None: ...
+    async def exists(self, jti: str) -> bool: ...
+    async def active_jtis(self, now: int) -> list[str]: ...
+    async def prune(self, now: int) -> int: ...
+
+
+class RevocationList:
+    """Фильтр Блума перед таблицей revoked_tokens.
+
+    Почти все токены не отозваны, и фильтр отвечает «точно нет» без обращения
+    к БД; в таблицу идём только при срабатывании фильтра. Отзывы этого процесса
+    попадают в фильтр сразу, отзывы других воркеров — через шину инвалидации
+    (settings.invalidation.poll_interval_ms). Перестройка планировщиком
+    (settings.auth_jwt.revocation_refresh_seconds) остаётся страховкой и
+    чистит истёкшие записи.
+    """
+
+    def __init__(self, capacity: int = settings.auth_jwt.revocation_bloom_capacity):
+        self.capacity = capacity
+        self.bloom = BloomFilter(capacity)
+        self.rebuilt_at: float | None = None
+        # отзывы, сделанные во время перестройки, не должны пропасть из фильтра
+        self._recent: list[str] = []
+
+    async def is_revoked(self, jti: str | None, repo: RevokedTokens) -> bool:
+        if jti is None or jti not in self.bloom:
+            token_revocation_checks.inc("negative")
+            return False
+        revoked = await repo.exists(jti)
+        token_revocation_checks.inc("revoked" if revoked else "false_positive")
+        return revoked
+
+    async def revoke(self, jti: str, user_id: int, expires_at: int, repo: RevokedTokens):
+        await repo.add(jti, user_id, expires_at)
+        self.note_revoked(jti)
+
+    def note_revoked(self, jti: str) -> None:
+        self.bloom.add(jti)
+        self._recent.append(jti)
+
+    async def rebuild(self, repo: RevokedTokens) -> int:
+        # истёкшие записи не нужны ни в таблице, ни в фильтре
+        now = int(time.time())
+        recent = self._recent = []
+        await repo.prune(now)
+        jtis = await repo.active_jtis(now)
+        bloom = BloomFilter(max(self.capacity, 2 * len(jtis)))
+        for jti in [*jtis, *recent]:
+            bloom.add(jti)
+        self.bloom = bloom
+        self.rebuilt_at = time.monotonic()
+        return len(jtis)
+
+
+revocation_list = RevocationList()
+invalidation_bus.subscribe("revoked_tokens", revocation_list.note_revoked)
@@ -0,0 +1,169 @@
+import asyncio
+import fcntl
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from core.metrics import REGISTRY, Counter, Histogram
+
+logger = logging.getLogger("app.maintenance")
+
+maintenance_job_duration = REGISTRY.register(
+    Histogram(
+        "maintenance_job_duration_seconds",
+        "Время выполнения фоновых задач обслуживания",
+        ("job",),
+        buckets=(0.001, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0, 120.0, 600.0),
+    )
+)
+maintenance_job_runs = REGISTRY.register(
+    Counter(
+        "maintenance_job_runs_total",
+        "Запуски задач обслуживания: ok, error, skipped (выполнил другой воркер)",
+        ("job", "result"),
+    )
+)
+
+
+@dataclass
+class Job:
+    name: str
+    func: Callable[[], Awaitable[object]]
+    interval: float
+    # доля интервала: воркеры, стартовавшие вместе, не бьют в базу одновременно
+    jitter: float = 0.1
+    # задачи над общей базой выполняет один воркер за интервал
+    exclusive: bool = False
+
+    def delay(self) -> float:
+        return self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+
+class JobLock:
+    """flock на файл задачи плюс время последнего запуска внутри него.
+
+    Воркеры uvicorn — отдельные процессы, поэтому asyncio.Lock не годится.
+    Занятый замок значит, что задачу прямо сейчас выполняет другой воркер;
+    свежая отметка — что выполнил недавно. В обоих случаях запуск пропускается.
+    """
+
+    def __init__(self, path: Path, interval: float):
+        self.path = path
+        self.interval = interval
+        self._fd: int | None = None
+
+    def acquire(self) -> bool:
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        try:
+            last_run = float(os.read(fd, 32) or 0)
+        except ValueError:
+            last_run = 0.0
+        # половина интервала: джиттер не должен отдавать запуск второму воркеру
+        if time.time() - last_run < self.interval / 2:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def release(self, ran_at: float) -> None:
+        fd, self._fd = self._fd, None
+        os.ftruncate(fd, 0)
+        os.pwrite(fd, repr(ran_at).encode(), 0)
+        os.close(fd)
+
+
+class Scheduler:
+    """Периодические задачи обслуживания внутри процесса приложения.
+
+    У каждой задачи свой цикл: пауза с джиттером, затем запуск. Упавшая задача
+    пишется в лог и запускается снова через интервал. stop() прерывает паузы
+    сразу, а выполняющимся задачам даёт timeout секунд на завершение.
+    """
+
+    def __init__(self, lock_dir: Path):
+        self.lock_dir = lock_dir
+        self.jobs: list[Job] = []
+        self._tasks: list[asyncio.Task] = []
+        self._running: set[asyncio.Task] = set()
+        self._stopping = asyncio.Event()
+
+    def add(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[object]],
+        interval: float,
+        jitter: float = 0.1,
+        exclusive: bool = False,
+    ) -> Job:
+        job = Job(name, func, interval, jitter, exclusive)
+        self.jobs.append(job)
+        return job
+
+    def _lock_for(self, job: Job) -> JobLock:
+        return JobLock(self.lock_dir / f"maintenance-{job.name}.lock", job.interval)
+
+    async def run_job(self, job: Job) -> str:
+        lock = self._lock_for(job) if job.exclusive else None
+        if lock is not None and not lock.acquire():
+            maintenance_job_runs.inc(job.name, "skipped")
+            return "skipped"
+        started = time.perf_counter()
+        result = "ok"
+        try:
+            await job.func()
+        except Exception:
+            result = "error"
+            logger.exception("задача обслуживания %s упала", job.name)
+        finally:
+            duration = time.perf_counter() - started
+            if lock is not None:
+                lock.release(time.time())
+            maintenance_job_duration.observe(duration, job.name)
+            maintenance_job_runs.inc(job.name, result)
+        logger.info("задача обслуживания %s: %s за %.3f с", job.name, result, duration)
+        return result
+
+    async def _loop(self, job: Job) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._stopping.wait(), job.delay())
+                return
+            except asyncio.TimeoutError:
+                pass
+            # отдельная задача: stop() отменяет цикл, но не прерывает запуск
+            run = asyncio.create_task(self.run_job(job), name=job.name)
+            self._running.add(run)
+            try:
+                await asyncio.shield(run)
+            finally:
+                self._running.discard(run)
+
+    def start(self) -> None:
+        self.lock_dir.mkdir(parents=True, exist_ok=True)
+        self._stopping.clear()
+        self._tasks = [
+            asyncio.create_task(self._loop(job), name=f"maintenance-{job.name}")
+            for job in self.jobs
+        ]
+
+    async def stop(self, timeout: float = 10) -> None:
+        self._stopping.set()
+        running = list(self._running)
+        if running:
+            _, pending = await asyncio.wait(running, timeout=timeout)
+            for task in pending:
+                logger.warning("задача обслуживания %s прервана", task.get_name())
+                task.cancel()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, *running, return_exceptions=True)
+        self._tasks = []
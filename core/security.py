@@ -1,27 +1,83 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from functools import cache
 
 import bcrypt
 import jwt
 
 from core.config import settings
+from core.metrics import password_hash_queue_depth
 
+# bcrypt занимает CPU на сотни миллисекунд — считаем его вне event loop
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hashing.workers, thread_name_prefix="bcrypt"
+)
 
-def hash_password(password: str) -> bytes:
-    salt = bcrypt.gensalt()
+
+def hash_password(password: str, rounds: int | None = None) -> bytes:
+    salt = bcrypt.gensalt(rounds or settings.password_hashing.rounds)
     pwd_bytes: bytes = password.encode()
     return bcrypt.hashpw(pwd_bytes, salt)
 
 
+def hash_rounds(hashed_password: bytes) -> int:
+    # формат $2b$12$<salt+hash>: cost — между вторым и третьим '$'
+    return int(hashed_password.split(b"$")[2])
+
+
+def needs_rehash(hashed_password: bytes) -> bool:
+    return hash_rounds(hashed_password) != settings.password_hashing.rounds
+
+
 def validate_password(hashed_password: bytes, password: str) -> bool:
     return bcrypt.checkpw(password.encode(), hashed_password)
 
 
+async def _run_password_job(fn, *args):
+    password_hash_queue_depth.inc()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, fn, *args)
+    finally:
+        password_hash_queue_depth.dec()
+
+
+async def hash_password_async(password: str) -> bytes:
+    return await _run_password_job(hash_password, password)
+
+
+async def validate_password_async(hashed_password: bytes, password: str) -> bool:
+    return await _run_password_job(validate_password, hashed_password, password)
+
+
+# ключи читаются и разбираются один раз при первом использовании, а не при
+# импорте модуля: разбор RSA PEM стоит ~60 мс, а jwt.encode делает его на
+# каждый вызов, если передать ему строку
+@cache
+def read_private_key():
+    algorithm = jwt.get_algorithm_by_name(settings.ALGORITHM)
+    return algorithm.prepare_key(settings.auth_jwt.private_key_path.read_text())
+
+
+@cache
+def read_public_key():
+    algorithm = jwt.get_algorithm_by_name(settings.ALGORITHM)
+    return algorithm.prepare_key(settings.auth_jwt.public_key_path.read_text())
+
+
+async def load_keys() -> None:
+    await asyncio.to_thread(read_private_key)
+    await asyncio.to_thread(read_public_key)
+
+
 def encode_jwt(
     payload: dict,
-    private_key: str = settings.auth_jwt.private_key_path.read_text(),
+    private_key: str | None = None,
     algorithm: str = settings.ALGORITHM,
     expire_minutes: int = settings.auth_jwt.access_token_expire,
 ):
+    private_key = private_key or read_private_key()
     to_encode = payload.copy()
     now = datetime.now(timezone.utc)
     expire = now + timedelta(minutes=expire_minutes)
@@ -32,7 +88,8 @@ def encode_jwt(
 
 def decode_jwt(
     token: str,
-    public_key: str = settings.auth_jwt.public_key_path.read_text(),
+    public_key: str | None = None,
     algorithm: str = settings.ALGORITHM,
 ):
+    public_key = public_key or read_public_key()
     return jwt.decode(token, public_key, algorithms=[algorithm])
@@ -0,0 +1,50 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+from core.metrics import REGISTRY, Counter
+
+T = TypeVar("T")
+
+singleflight_calls = REGISTRY.register(
+    Counter(
+        "singleflight_calls_total",
+        "Вызовы через single-flight: leader выполнил работу, shared получил его результат",
+        ("name", "result"),
+    )
+)
+
+
+class SingleFlight:
+    """Одинаковые одновременные вызовы выполняются один раз.
+
+    Первый вызов с ключом запускает работу отдельной задачей, остальные ждут её
+    результат или исключение. Задача не привязана к запросу-лидеру: его
+    отключение не отменит работу для остальных. После завершения ключ
+    освобождается — это не кеш, следующий вызов выполнится заново.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.create_task(func(), name=f"singleflight-{self.name}")
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+            singleflight_calls.inc(self.name, "leader")
+        else:
+            singleflight_calls.inc(self.name, "shared")
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # все ждущие могли отключиться: исключение не должно уйти в лог как
+        # «never retrieved»
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self) -> int:
+        return len(self._calls)
@@ -0,0 +1,98 @@
+import hashlib
+import mimetypes
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+
+from core.compression import choose_encoding, compress, is_compressible, supported_encodings
+from core.config import ROOT, settings
+
+# URL с отпечатком содержимого никогда не меняется: браузер не перепроверяет его
+IMMUTABLE = "public, max-age=31536000, immutable"
+# по имени без отпечатка — каждый раз сверка по ETag
+REVALIDATE = "no-cache"
+# у каждой кодировки свой ETag: тела разные, а сильный ETag обещает побайтовое
+# совпадение — иначе кеш мог бы ответить 304 на gzip-копию клиенту без gzip
+ETAG_SUFFIXES = {"gzip": "-gz", "br": "-br"}
+
+
+@dataclass
+class Asset:
+    body: bytes
+    media_type: str
+    digest: str
+    fingerprinted: str
+    # кодировка -> заранее сжатое тело
+    variants: dict[str, bytes] = field(default_factory=dict)
+
+    def etag(self, encoding: str | None) -> str:
+        return f'"{self.digest}{ETAG_SUFFIXES.get(encoding, "")}"'
+
+
+class FingerprintedStaticFiles(StaticFiles):
+    """Статика из памяти: URL с хешем содержимого и сжатые при старте копии.
+
+    styles.css отдаётся и как styles.<hash>.css с immutable-кешем на год —
+    шаблоны ссылаются на этот адрес через static_url(). gzip и brotli
+    считаются один раз с максимальным уровнем, а не на каждый запрос.
+    Файлы, которых не было при старте, отдаёт обычный StaticFiles.
+    """
+
+    def __init__(self, directory: Path, minimum_size: int):
+        super().__init__(directory=directory)
+        self.minimum_size = minimum_size
+        self.assets: dict[str, Asset] = {}
+        self.urls: dict[str, str] = {}
+        self.load(Path(directory))
+
+    def load(self, directory: Path) -> None:
+        for file in sorted(p for p in directory.rglob("*") if p.is_file()):
+            name = file.relative_to(directory).as_posix()
+            body = file.read_bytes()
+            digest = hashlib.sha256(body).hexdigest()[:12]
+            path = PurePosixPath(name)
+            fingerprinted = str(path.with_name(f"{path.stem}.{digest}{path.suffix}"))
+            media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            asset = Asset(body, media_type, digest, fingerprinted)
+            if is_compressible(media_type) and len(body) >= self.minimum_size:
+                for encoding in supported_encodings():
+                    compressed = compress(body, encoding)
+                    if len(compressed) < len(body):
+                        asset.variants[encoding] = compressed
+            self.assets[name] = self.assets[fingerprinted] = asset
+            self.urls[name] = f"/static/{fingerprinted}"
+
+    def url(self, name: str) -> str:
+        return self.urls.get(name, f"/static/{name}")
+
+    async def get_response(self, path: str, scope) -> Response:
+        name = Path(path).as_posix()
+        asset = self.assets.get(name)
+        if asset is None:
+            return await super().get_response(path, scope)
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405)
+        request_headers = Headers(scope=scope)
+        encoding = choose_encoding(
+            request_headers.get("accept-encoding", ""), tuple(asset.variants)
+        )
+        etag = asset.etag(encoding)
+        headers = {
+            "cache-control": IMMUTABLE if name == asset.fingerprinted else REVALIDATE,
+            "etag": etag,
+        }
+        if asset.variants:
+            headers["vary"] = "Accept-Encoding"
+        if etag in request_headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
+        if encoding is not None:
+            headers["content-encoding"] = encoding
+        body = asset.variants.get(encoding, asset.body)
+        return Response(body, media_type=asset.media_type, headers=headers)
+
+
+static_files = FingerprintedStaticFiles(ROOT / "static", settings.compression.minimum_size)
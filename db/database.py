@@ -1,12 +1,47 @@
-from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
-                                    create_async_engine)
+import asyncio
+import time
+
+from sqlalchemy import Engine, event
+from sqlalchemy.ext.asyncio import (AsyncEngine, AsyncSession,
+                                    async_sessionmaker, create_async_engine)
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from core.config import settings
+from core.metrics import db_pool_checkout_wait
+from db.migrations import SCHEMA_VERSION, migrate
+from db.slow_query import install_slow_query_log
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            db_pool_checkout_wait.observe(time.perf_counter() - started)
+
+
+@event.listens_for(Engine, "connect")
+def _enable_foreign_keys(dbapi_connection, connection_record):
+    # SQLite по умолчанию не проверяет внешние ключи, и ON DELETE CASCADE
+    # не срабатывает: строки удалённого пользователя достались бы новому
+    # с тем же id (users без AUTOINCREMENT). Включается на каждое соединение
+    # до первой транзакции — внутри транзакции PRAGMA ничего не делает
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys = ON")
+    cursor.close()
+
 
 engine = create_async_engine(
-    "sqlite+aiosqlite:///tasks.db",
+    f"sqlite+aiosqlite:///{settings.database.path}",
     echo=False,
+    poolclass=InstrumentedQueuePool,
 )
 
+if settings.sql.slow_query_ms is not None:
+    install_slow_query_log(engine.sync_engine, settings.sql.slow_query_ms)
+
 new_session = async_sessionmaker(
     bind=engine,
     class_=AsyncSession,
@@ -18,11 +53,41 @@ class Base(DeclarativeBase):
     pass
 
 
-async def create_tables():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)  # ← без ()
+class SchemaVersionMismatch(RuntimeError):
+    pass
+
+
+async def check_schema(bind: AsyncEngine = engine) -> bool:
+    """Проверяет версию схемы вместо create_all на каждом старте.
+
+    Совпадающая версия стоит одного PRAGMA. Пустая база создаётся миграциями
+    целиком; базу с данными и устаревшей схемой приложение не трогает —
+    её обновляют через ``python migrate.py``. Возвращает True, если схема
+    создавалась.
+    """
+    async with bind.connect() as conn:
+        version = (await conn.exec_driver_sql("PRAGMA user_version")).scalar()
+        has_tables = (
+            await conn.exec_driver_sql(
+                "SELECT count(*) FROM sqlite_master WHERE type = 'table'"
+            )
+        ).scalar()
+    if version == SCHEMA_VERSION:
+        return False
+    if version == 0 and not has_tables:
+        await asyncio.to_thread(migrate, bind.url.database)
+        return True
+    raise SchemaVersionMismatch(
+        f"версия схемы базы {version}, приложение ожидает {SCHEMA_VERSION}: "
+        "выполните python migrate.py"
+    )
 
 
 async def get_session() -> AsyncSession:
     async with new_session() as session:
         yield session
+
+
+def get_session_maker() -> async_sessionmaker[AsyncSession]:
+    # для работы после ответа (BackgroundTasks): сессия запроса к тому времени закрыта
+    return new_session
@@ -0,0 +1,90 @@
+import asyncio
+import logging
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger("app.maintenance")
+
+# строк на индекс, которые читает ANALYZE внутри optimize: на больших таблицах
+# полный ANALYZE идёт секундами, а для оценок планировщика хватает выборки
+ANALYSIS_LIMIT = 1000
+
+# оценка числа строк таблицы по sqlite_stat1 без прохода по ней. Первое число
+# stat — строки, попавшие в индекс: у частичного индекса это только его
+# строки, поэтому такие индексы пропускаем и берём максимум по остальным.
+# NULL — ANALYZE ещё не видел таблицу
+ROW_ESTIMATE_SQL = """
+SELECT max(CAST(stat AS INTEGER)) FROM sqlite_stat1
+WHERE tbl = :table
+  AND coalesce(idx, '') NOT IN (
+    SELECT name FROM pragma_index_list(:table) WHERE partial
+  )
+"""
+
+
+async def optimize(engine: AsyncEngine) -> None:
+    """Обновляет sqlite_stat1 для таблиц, где статистика устарела.
+
+    По ней планировщик выбирает индексы, а админка оценивает число задач.
+    ANALYZE сначала читает, потом пишет: если между этим закоммитит другой
+    писатель, SQLite сразу вернёт «database is locked», не дожидаясь
+    busy_timeout. Поэтому блокировка на запись берётся заранее.
+    """
+    async with engine.connect() as conn:
+        await conn.exec_driver_sql(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+        await conn.exec_driver_sql("BEGIN IMMEDIATE")
+        await conn.exec_driver_sql("PRAGMA optimize")
+        await conn.commit()
+
+
+async def checkpoint(engine: AsyncEngine) -> tuple[int, int, int]:
+    """Переносит WAL в основной файл и обрезает его.
+
+    Автоматический checkpoint не успевает, пока читатели держат старые снимки,
+    и -wal растёт. TRUNCATE ждёт читателей не дольше busy_timeout, а при
+    неудаче возвращает busy=1 — тогда попробуем в следующий раз.
+    """
+    async with engine.connect() as conn:
+        busy, log_pages, checkpointed = (
+            await conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+        ).one()
+    if busy:
+        logger.warning(
+            "wal_checkpoint занят читателями: перенесено %s из %s страниц",
+            checkpointed,
+            log_pages,
+        )
+    return busy, log_pages, checkpointed
+
+
+async def prune_invalidations(
+    engine: AsyncEngine, older_than: float, chunk_size: int = 5_000
+) -> int:
+    """Удаляет прочитанный хвост шины инвалидации диапазонами seq.
+
+    created_at растёт вместе с seq, поэтому граница — первая свежая строка, и
+    до неё SQLite доходит, не просматривая таблицу целиком. Коммит на
+    порцию: запросы воркеров не ждут одну длинную транзакцию.
+    """
+    async with engine.connect() as conn:
+        boundary = (
+            await conn.exec_driver_sql(
+                "SELECT coalesce("
+                "(SELECT seq FROM cache_invalidations WHERE created_at >= ? "
+                "ORDER BY seq LIMIT 1), "
+                "(SELECT max(seq) + 1 FROM cache_invalidations), 0)",
+                (older_than,),
+            )
+        ).scalar_one()
+    deleted = 0
+    while True:
+        async with engine.begin() as conn:
+            res = await conn.exec_driver_sql(
+                "DELETE FROM cache_invalidations WHERE seq < "
+                "min(?, (SELECT min(seq) FROM cache_invalidations) + ?)",
+                (boundary, chunk_size),
+            )
+        deleted += res.rowcount
+        if res.rowcount < chunk_size:
+            return deleted
+        await asyncio.sleep(0)
@@ -0,0 +1,135 @@
+"""Версионированные миграции схемы SQLite.
+
+Миграция — модуль vNNNN_*.py с VERSION, NAME, функцией upgrade(conn) и
+необязательной estimate(conn) для --dry-run. Номер применённой версии лежит в
+PRAGMA user_version (его проверяет приложение при старте), история — в таблице
+schema_migrations. Раннер работает через stdlib sqlite3 в autocommit-режиме:
+по умолчанию каждая миграция выполняется в своей транзакции BEGIN IMMEDIATE
+вместе с записью в историю, а миграции с TRANSACTIONAL = False (например,
+смена journal_mode) управляют транзакциями сами.
+"""
+
+import importlib
+import pkgutil
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from types import ModuleType
+from typing import Callable
+
+MIGRATIONS_TABLE_DDL = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    applied_at TEXT NOT NULL,
+    duration_ms REAL NOT NULL
+)
+"""
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    module: ModuleType
+
+    @property
+    def transactional(self) -> bool:
+        return getattr(self.module, "TRANSACTIONAL", True)
+
+    def upgrade(self, conn: sqlite3.Connection) -> None:
+        self.module.upgrade(conn)
+
+    def estimate(self, conn: sqlite3.Connection) -> str:
+        estimate = getattr(self.module, "estimate", None)
+        return estimate(conn) if estimate else "мгновенно"
+
+
+def discover() -> list[Migration]:
+    migrations = []
+    for info in pkgutil.iter_modules(__path__):
+        if not info.name.startswith("v"):
+            continue
+        module = importlib.import_module(f"{__name__}.{info.name}")
+        migrations.append(Migration(module.VERSION, module.NAME, module))
+    migrations.sort(key=lambda m: m.version)
+    versions = [m.version for m in migrations]
+    if versions != list(range(1, len(migrations) + 1)):
+        raise RuntimeError(f"номера миграций должны идти подряд с 1: {versions}")
+    return migrations
+
+
+MIGRATIONS = discover()
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+
+def connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, isolation_level=None)
+    # ждём завершения записей приложения, а не падаем с "database is locked"
+    conn.execute("PRAGMA busy_timeout = 30000")
+    return conn
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def pending(conn: sqlite3.Connection) -> list[Migration]:
+    version = current_version(conn)
+    return [m for m in MIGRATIONS if m.version > version]
+
+
+def _record(conn: sqlite3.Connection, migration: Migration, duration: float) -> None:
+    conn.execute(MIGRATIONS_TABLE_DDL)
+    conn.execute(
+        "INSERT OR REPLACE INTO schema_migrations (version, name, applied_at, duration_ms) "
+        "VALUES (?, ?, ?, ?)",
+        (
+            migration.version,
+            migration.name,
+            datetime.now(timezone.utc).isoformat(),
+            round(duration * 1000, 2),
+        ),
+    )
+    conn.execute(f"PRAGMA user_version = {migration.version}")
+
+
+def apply(conn: sqlite3.Connection, migration: Migration) -> float:
+    started = time.perf_counter()
+    if not migration.transactional:
+        migration.upgrade(conn)
+        conn.execute("BEGIN IMMEDIATE")
+        _record(conn, migration, time.perf_counter() - started)
+        conn.execute("COMMIT")
+        return time.perf_counter() - started
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        migration.upgrade(conn)
+        _record(conn, migration, time.perf_counter() - started)
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+    return time.perf_counter() - started
+
+
+def migrate(
+    path: str,
+    dry_run: bool = False,
+    log: Callable[[str], None] = lambda line: None,
+) -> list[Migration]:
+    conn = connect(path)
+    try:
+        todo = pending(conn)
+        for migration in todo:
+            if dry_run:
+                log(f"{migration.version:04d} {migration.name}: {migration.estimate(conn)}")
+                continue
+            log(f"{migration.version:04d} {migration.name} ...")
+            duration = apply(conn, migration)
+            log(f"{migration.version:04d} готово за {duration * 1000:.0f} мс")
+        return todo
+    finally:
+        conn.close()
@@ -0,0 +1,46 @@
+import sqlite3
+
+from db.maintenance import ROW_ESTIMATE_SQL
+
+# скорость CREATE INDEX, замеренная на tasks с 1 млн строк (~0.7 млн строк/с);
+# всё это время индекс держит блокировку записи
+ROWS_PER_SECOND = 700_000
+
+
+def _exists(conn: sqlite3.Connection, kind: str, name: str) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = ? AND name = ?", (kind, name)
+    ).fetchone()
+    return row is not None
+
+
+def table_rows(conn: sqlite3.Connection, table: str) -> int:
+    # после ANALYZE число строк есть в sqlite_stat1 — без прохода по таблице
+    if _exists(conn, "table", "sqlite_stat1"):
+        (rows,) = conn.execute(ROW_ESTIMATE_SQL, {"table": table}).fetchone()
+        if rows is not None:
+            return rows
+    return conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+
+
+def create_index(
+    conn: sqlite3.Connection,
+    name: str,
+    table: str,
+    columns: list[str],
+    where: str | None = None,
+) -> None:
+    sql = f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+    if where:
+        sql += f" WHERE {where}"
+    conn.execute(sql)
+
+
+def estimate_index(conn: sqlite3.Connection, name: str, table: str) -> str:
+    if _exists(conn, "index", name):
+        return "индекс уже есть"
+    if not _exists(conn, "table", table):
+        return f"таблица {table} ещё не создана: мгновенно"
+    rows = table_rows(conn, table)
+    seconds = rows / ROWS_PER_SECOND
+    return f"CREATE INDEX {name}: ~{rows} строк, ~{seconds:.1f} с блокировки записи"
@@ -0,0 +1,39 @@
+# схема на момент введения миграций; IF NOT EXISTS, чтобы базы, созданные
+# ещё через create_all, принимали baseline без изменений
+VERSION = 1
+NAME = "baseline"
+
+STATEMENTS = (
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER NOT NULL,
+        name VARCHAR NOT NULL,
+        email VARCHAR NOT NULL,
+        hashed_password BLOB NOT NULL,
+        is_admin BOOLEAN DEFAULT '0' NOT NULL,
+        PRIMARY KEY (id),
+        UNIQUE (email)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS tasks (
+        id INTEGER NOT NULL,
+        title VARCHAR NOT NULL,
+        description VARCHAR,
+        status VARCHAR(9) DEFAULT 'new' NOT NULL,
+        priority VARCHAR(6) DEFAULT 'normal' NOT NULL,
+        term_date DATE,
+        author_id INTEGER NOT NULL,
+        PRIMARY KEY (id),
+        FOREIGN KEY(author_id) REFERENCES users (id) ON DELETE CASCADE
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_tasks_status ON tasks (status)",
+    "CREATE INDEX IF NOT EXISTS ix_tasks_author_id ON tasks (author_id)",
+    "CREATE INDEX IF NOT EXISTS ix_tasks_priority ON tasks (priority)",
+)
+
+
+def upgrade(conn):
+    for statement in STATEMENTS:
+        conn.execute(statement)
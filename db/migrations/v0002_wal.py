@@ -0,0 +1,9 @@
+# WAL: читатели не ждут писателя, в том числе во время построения индексов.
+# journal_mode нельзя менять внутри транзакции
+VERSION = 2
+NAME = "journal_mode=WAL"
+TRANSACTIONAL = False
+
+
+def upgrade(conn):
+    conn.execute("PRAGMA journal_mode = WAL")
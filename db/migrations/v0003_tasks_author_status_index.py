@@ -0,0 +1,14 @@
+from db.migrations._indexes import create_index, estimate_index
+
+# выборки задач пользователя по статусу; (author_id, id) отдельно не нужен —
+# ix_tasks_author_id в SQLite уже хранит rowid и отдаёт ORDER BY id
+VERSION = 3
+NAME = "index tasks (author_id, status)"
+
+
+def upgrade(conn):
+    create_index(conn, "ix_tasks_author_id_status", "tasks", ["author_id", "status"])
+
+
+def estimate(conn):
+    return estimate_index(conn, "ix_tasks_author_id_status", "tasks")
@@ -0,0 +1,21 @@
+VERSION = 4
+NAME = "revoked_tokens, users.tokens_valid_after"
+
+STATEMENTS = (
+    """
+    CREATE TABLE revoked_tokens (
+        jti VARCHAR NOT NULL,
+        user_id INTEGER NOT NULL,
+        expires_at INTEGER NOT NULL,
+        PRIMARY KEY (jti),
+        FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE
+    )
+    """,
+    "CREATE INDEX ix_revoked_tokens_expires_at ON revoked_tokens (expires_at)",
+    "ALTER TABLE users ADD COLUMN tokens_valid_after INTEGER",
+)
+
+
+def upgrade(conn):
+    for statement in STATEMENTS:
+        conn.execute(statement)
@@ -0,0 +1,29 @@
+# у уже завершённых задач completed_at остаётся NULL — архивация для них
+# смотрит на term_date, так что массовый UPDATE в миграции не нужен
+VERSION = 5
+NAME = "tasks.completed_at, tasks_archive"
+
+STATEMENTS = (
+    "ALTER TABLE tasks ADD COLUMN completed_at DATETIME",
+    """
+    CREATE TABLE tasks_archive (
+        id INTEGER NOT NULL,
+        title VARCHAR NOT NULL,
+        description VARCHAR,
+        status VARCHAR(9) NOT NULL,
+        priority VARCHAR(6) NOT NULL,
+        term_date DATE,
+        author_id INTEGER NOT NULL,
+        completed_at DATETIME,
+        archived_at DATETIME NOT NULL,
+        PRIMARY KEY (id),
+        FOREIGN KEY(author_id) REFERENCES users (id) ON DELETE CASCADE
+    )
+    """,
+    "CREATE INDEX ix_tasks_archive_author_id ON tasks_archive (author_id)",
+)
+
+
+def upgrade(conn):
+    for statement in STATEMENTS:
+        conn.execute(statement)
@@ -0,0 +1,23 @@
+from db.migrations._indexes import create_index, estimate_index
+
+# просроченные и ближайшие задачи пользователя: в индекс попадают только
+# незавершённые, поэтому он не растёт вместе с историей выполненных задач.
+# status в конце ключа: SQLite перепроверяет условие частичного индекса по
+# строке таблицы, а так счётчики сроков считаются по одному индексу.
+# Условие должно совпадать с OPEN_TASKS_WHERE в db/models/task.py
+VERSION = 6
+NAME = "partial index tasks (author_id, term_date) for open tasks"
+
+
+def upgrade(conn):
+    create_index(
+        conn,
+        "ix_tasks_open_author_id_term_date",
+        "tasks",
+        ["author_id", "term_date", "status"],
+        where="status != 'COMPLETED'",
+    )
+
+
+def estimate(conn):
+    return estimate_index(conn, "ix_tasks_open_author_id_term_date", "tasks")
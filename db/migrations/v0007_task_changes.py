@@ -0,0 +1,28 @@
+# журнал изменений для дельта-синхронизации. Задачи, созданные до него, в
+# журнале не записаны: их владельцам первая синхронизация отдаёт full_resync
+VERSION = 7
+NAME = "task_changes, users.changes_compacted_through"
+
+STATEMENTS = (
+    """
+    CREATE TABLE task_changes (
+        seq INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        task_id INTEGER NOT NULL,
+        op VARCHAR(6) NOT NULL,
+        changed_at DATETIME NOT NULL,
+        FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE
+    )
+    """,
+    "CREATE INDEX ix_task_changes_user_id ON task_changes (user_id)",
+    "ALTER TABLE users ADD COLUMN changes_compacted_through INTEGER DEFAULT '0' NOT NULL",
+    """
+    UPDATE users SET changes_compacted_through = 1
+    WHERE EXISTS (SELECT 1 FROM tasks WHERE tasks.author_id = users.id)
+    """,
+)
+
+
+def upgrade(conn):
+    for statement in STATEMENTS:
+        conn.execute(statement)
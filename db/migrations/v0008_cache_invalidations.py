@@ -0,0 +1,20 @@
+# шина инвалидации кешей между воркерами, см. core.invalidation
+VERSION = 8
+NAME = "cache_invalidations"
+
+STATEMENTS = (
+    """
+    CREATE TABLE cache_invalidations (
+        seq INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+        topic VARCHAR NOT NULL,
+        "key" VARCHAR NOT NULL,
+        origin VARCHAR NOT NULL,
+        created_at FLOAT NOT NULL
+    )
+    """,
+)
+
+
+def upgrade(conn):
+    for statement in STATEMENTS:
+        conn.execute(statement)
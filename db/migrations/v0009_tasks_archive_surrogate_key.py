@@ -0,0 +1,52 @@
+from db.migrations._indexes import ROWS_PER_SECOND, _exists, table_rows
+
+# id в tasks без AUTOINCREMENT переиспользуется: задача с тем же id могла
+# попасть в архив второй раз, и INSERT падал на первичном ключе, останавливая
+# архивацию. Теперь у архивной строки свой ключ archive_id, а исходный id —
+# обычная индексированная колонка. SQLite не меняет первичный ключ через
+# ALTER TABLE, поэтому таблица пересоздаётся с копированием строк
+VERSION = 9
+NAME = "tasks_archive.archive_id surrogate key"
+
+COLUMNS = (
+    "id, title, description, status, priority, term_date, author_id, "
+    "completed_at, archived_at"
+)
+
+STATEMENTS = (
+    """
+    CREATE TABLE tasks_archive_new (
+        archive_id INTEGER NOT NULL,
+        id INTEGER NOT NULL,
+        title VARCHAR NOT NULL,
+        description VARCHAR,
+        status VARCHAR(9) NOT NULL,
+        priority VARCHAR(6) NOT NULL,
+        term_date DATE,
+        author_id INTEGER NOT NULL,
+        completed_at DATETIME,
+        archived_at DATETIME NOT NULL,
+        PRIMARY KEY (archive_id),
+        FOREIGN KEY(author_id) REFERENCES users (id) ON DELETE CASCADE
+    )
+    """,
+    f"INSERT INTO tasks_archive_new ({COLUMNS}) SELECT {COLUMNS} FROM tasks_archive",
+    "DROP TABLE tasks_archive",
+    "ALTER TABLE tasks_archive_new RENAME TO tasks_archive",
+    "CREATE INDEX ix_tasks_archive_author_id ON tasks_archive (author_id)",
+    "CREATE INDEX ix_tasks_archive_id ON tasks_archive (id)",
+)
+
+
+def upgrade(conn):
+    for statement in STATEMENTS:
+        conn.execute(statement)
+
+
+def estimate(conn):
+    if not _exists(conn, "table", "tasks_archive"):
+        return "таблица tasks_archive ещё не создана: мгновенно"
+    rows = table_rows(conn, "tasks_archive")
+    # копирование строк и построение двух индексов — порядка трёх CREATE INDEX
+    seconds = 3 * rows / ROWS_PER_SECOND
+    return f"пересоздание tasks_archive: ~{rows} строк, ~{seconds:.1f} с блокировки записи"
@@ -0,0 +1,30 @@
+from db.migrations._indexes import ROWS_PER_SECOND, _exists, table_rows
+
+# до включения PRAGMA foreign_keys (db/database.py) ON DELETE CASCADE не
+# срабатывал: строки удалённых пользователей остались и достались бы новому
+# пользователю с тем же id. Удаляем их один раз; дальше каскад работает сам
+VERSION = 10
+NAME = "drop rows of deleted users"
+
+CHILD_TABLES = (
+    ("tasks", "author_id"),
+    ("tasks_archive", "author_id"),
+    ("task_changes", "user_id"),
+    ("revoked_tokens", "user_id"),
+)
+
+
+def upgrade(conn):
+    for table, column in CHILD_TABLES:
+        conn.execute(f"DELETE FROM {table} WHERE {column} NOT IN (SELECT id FROM users)")
+
+
+def estimate(conn):
+    # проход по индексу внешнего ключа каждой таблицы; при --dry-run части
+    # таблиц ещё нет — их создадут предыдущие миграции пустыми
+    rows = sum(
+        table_rows(conn, table)
+        for table, _ in CHILD_TABLES
+        if _exists(conn, "table", table)
+    )
+    return f"поиск строк удалённых пользователей: ~{rows} строк, ~{rows / ROWS_PER_SECOND:.1f} с"
@@ -0,0 +1,80 @@
+import time
+
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Mapped, Session, mapped_column
+
+from core.invalidation import invalidation_bus
+from db.database import Base
+from db.models.task import TaskORM
+
+
+class CacheInvalidationORM(Base):
+    """Шина инвалидации кешей между воркерами (см. core.invalidation).
+
+    Строка пишется в транзакции мутации: откатилась запись — не ушла и
+    инвалидация. seq — AUTOINCREMENT, воркеры читают хвост после своего seq.
+    """
+
+    __tablename__ = "cache_invalidations"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    seq: Mapped[int] = mapped_column(primary_key=True)
+    # tasks — key = id пользователя; revoked_tokens — key = jti
+    topic: Mapped[str]
+    key: Mapped[str]
+    # InvalidationBus.origin процесса-автора: себе он раздаёт событие сразу
+    origin: Mapped[str]
+    # unix-время: по нему получатели меряют задержку распространения
+    created_at: Mapped[float]
+
+
+INVALIDATIONS = CacheInvalidationORM.__table__
+PENDING_INVALIDATIONS = "cache_invalidations"
+
+
+def invalidation_rows(topic: str, keys) -> list[dict]:
+    created_at = time.time()
+    return [
+        {
+            "topic": topic,
+            "key": str(key),
+            "origin": invalidation_bus.origin,
+            "created_at": created_at,
+        }
+        for key in dict.fromkeys(keys)
+    ]
+
+
+async def record_invalidation(session: AsyncSession, topic: str, keys) -> None:
+    """Для записей мимо ORM-flush: массовых UPDATE/DELETE и core-запросов."""
+    rows = invalidation_rows(topic, keys)
+    if rows:
+        await session.execute(insert(INVALIDATIONS), rows)
+        session.sync_session.info.setdefault(PENDING_INVALIDATIONS, []).extend(rows)
+
+
+@event.listens_for(Session, "after_flush")
+def _record_invalidations(session: Session, flush_context):
+    # любой ORM-flush задач: репозитории, формы админки. Тему для пользователей
+    # добавлять вместе с первым кешем, который на неё подпишется: без
+    # подписчиков это лишняя запись на каждый flush
+    changed = [*session.new, *session.deleted]
+    changed += [obj for obj in session.dirty if session.is_modified(obj)]
+    rows = invalidation_rows(
+        "tasks", (obj.author_id for obj in changed if isinstance(obj, TaskORM))
+    )
+    if rows:
+        session.connection().execute(insert(INVALIDATIONS), rows)
+        session.info.setdefault(PENDING_INVALIDATIONS, []).extend(rows)
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_invalidations(session: Session):
+    for row in session.info.pop(PENDING_INVALIDATIONS, ()):
+        invalidation_bus.dispatch(row["topic"], row["key"])
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_invalidations(session: Session):
+    session.info.pop(PENDING_INVALIDATIONS, None)
@@ -1,17 +1,39 @@
 from sqlalchemy import Enum as SAEnum
-from sqlalchemy import ForeignKey, Date
+from sqlalchemy import ForeignKey, Date, Index, event, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from db.database import Base
 from db.models.enums import TaskPriority, TaskStatus
-from datetime import date
+from datetime import date, datetime, timezone
+
+
+def utcnow() -> datetime:
+    # SQLite хранит DateTime без зоны: пишем наивное UTC-время
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+# условие частичного индекса по срокам. SQLite применяет частичный индекс, только
+# если в запросе стоит то же условие с литералом, а не с параметром
+OPEN_TASKS_WHERE = "status != 'COMPLETED'"
+
 
 class TaskORM(Base):
     __tablename__ = "tasks"
+    # индексы добавляются миграциями (db/migrations); здесь — для create_all в тестах
+    __table_args__ = (
+        Index("ix_tasks_author_id_status", "author_id", "status"),
+        Index(
+            "ix_tasks_open_author_id_term_date",
+            "author_id",
+            "term_date",
+            "status",
+            sqlite_where=text(OPEN_TASKS_WHERE),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     title: Mapped[str]
-    description: Mapped[str | None]
+    description: Mapped[str | None] = mapped_column(deferred=True)
 
     status: Mapped[TaskStatus] = mapped_column(
         SAEnum(TaskStatus, name="task_status"),
@@ -32,6 +54,46 @@ class TaskORM(Base):
         ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
     )
     author: Mapped["UserOrm"] = relationship(back_populates="tasks")
+    # когда задача стала COMPLETED; по нему завершённые уходят в архив
+    completed_at: Mapped[datetime | None]
 
     def __str__(self):
         return f"Задача {self.title}"
+
+
+@event.listens_for(TaskORM.status, "set")
+def _track_completion(target: TaskORM, value, oldvalue, initiator):
+    # ловит и API, и формы админки; массовые UPDATE ставят completed_at сами
+    if value == TaskStatus.COMPLETED and oldvalue != TaskStatus.COMPLETED:
+        target.completed_at = utcnow()
+    elif value != TaskStatus.COMPLETED:
+        target.completed_at = None
+
+
+class TaskArchiveORM(Base):
+    """Завершённые задачи, вынесенные из tasks: горячая таблица и её индексы
+    не растут за счёт строк, которые почти не читают.
+
+    id — исходный id задачи. Он не уникален: без AUTOINCREMENT SQLite выдаёт
+    id удалённой задачи новой, и та тоже может попасть в архив. Поэтому у
+    архивной строки свой ключ archive_id.
+    """
+
+    __tablename__ = "tasks_archive"
+
+    archive_id: Mapped[int] = mapped_column(primary_key=True)
+    id: Mapped[int] = mapped_column(index=True)
+    title: Mapped[str]
+    description: Mapped[str | None]
+    status: Mapped[TaskStatus] = mapped_column(
+        SAEnum(TaskStatus, name="task_status"), nullable=False
+    )
+    priority: Mapped[TaskPriority] = mapped_column(
+        SAEnum(TaskPriority, name="task_priority"), nullable=False
+    )
+    term_date: Mapped[date | None] = mapped_column(Date)
+    author_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    completed_at: Mapped[datetime | None]
+    archived_at: Mapped[datetime] = mapped_column(default=utcnow)
@@ -0,0 +1,96 @@
+from datetime import datetime
+
+from sqlalchemy import Enum as SAEnum
+from sqlalchemy import ForeignKey, event, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Mapped, Session, mapped_column
+
+from core.pubsub import task_events
+from db.database import Base
+from db.models.cache_invalidation import record_invalidation
+from db.models.enums import ChangeOp
+from db.models.task import TaskORM, utcnow
+from db.models.user import UserOrm
+
+
+class TaskChangeORM(Base):
+    """Журнал изменений задач для дельта-синхронизации клиентов.
+
+    seq — AUTOINCREMENT: номера не переиспользуются после удаления строк, так
+    что since клиента не может указать на чужую запись. Удаление задачи
+    оставляет запись-надгробие с op=DELETE.
+    """
+
+    __tablename__ = "task_changes"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    seq: Mapped[int] = mapped_column(primary_key=True)
+    # ix_task_changes_user_id хранит rowid (= seq): user_id = ? AND seq > ?
+    # идёт одним диапазоном по индексу
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    # без внешнего ключа: надгробие переживает саму задачу
+    task_id: Mapped[int]
+    op: Mapped[ChangeOp] = mapped_column(SAEnum(ChangeOp, name="change_op"))
+    changed_at: Mapped[datetime] = mapped_column(default=utcnow)
+
+
+CHANGES = TaskChangeORM.__table__
+# изменения транзакции ждут в session.info до коммита: подписчики не должны
+# узнать о том, что потом откатится
+PENDING_EVENTS = "task_events"
+
+
+def change_rows(op: ChangeOp, rows) -> list[dict]:
+    # rows — пары (task_id, user_id)
+    changed_at = utcnow()
+    return [
+        {"user_id": user_id, "task_id": task_id, "op": op, "changed_at": changed_at}
+        for task_id, user_id in rows
+    ]
+
+
+async def record_changes(session: AsyncSession, op: ChangeOp, rows) -> None:
+    """Журнал для массовых запросов мимо ORM: строки RETURNING (task_id, user_id)."""
+    values = change_rows(op, rows)
+    if values:
+        await session.execute(insert(CHANGES), values)
+        session.sync_session.info.setdefault(PENDING_EVENTS, []).extend(values)
+        await record_invalidation(session, "tasks", (row["user_id"] for row in values))
+
+
+@event.listens_for(Session, "after_flush")
+def _record_task_changes(session: Session, flush_context):
+    # в той же транзакции, что и сама запись задачи: через репозиторий,
+    # формы админки — любой ORM-flush. Массовые UPDATE/DELETE мимо ORM
+    # пишут журнал сами через record_changes
+    upserts = [obj for obj in session.new if isinstance(obj, TaskORM)]
+    upserts += [
+        obj
+        for obj in session.dirty
+        if isinstance(obj, TaskORM) and session.is_modified(obj)
+    ]
+    # задачи удалённого пользователя: журнал уходит каскадом вместе с ним
+    gone_users = {obj.id for obj in session.deleted if isinstance(obj, UserOrm)}
+    deletes = [
+        obj
+        for obj in session.deleted
+        if isinstance(obj, TaskORM) and obj.author_id not in gone_users
+    ]
+    rows = change_rows(ChangeOp.UPSERT, ((t.id, t.author_id) for t in upserts))
+    rows += change_rows(ChangeOp.DELETE, ((t.id, t.author_id) for t in deletes))
+    if rows:
+        session.connection().execute(insert(CHANGES), rows)
+        session.info.setdefault(PENDING_EVENTS, []).extend(rows)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_task_changes(session: Session):
+    for row in session.info.pop(PENDING_EVENTS, ()):
+        task_events.publish(row["user_id"], {"op": row["op"], "task_id": row["task_id"]})
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_task_changes(session: Session):
+    session.info.pop(PENDING_EVENTS, None)
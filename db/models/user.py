@@ -11,6 +11,10 @@ class UserOrm(Base):
     email: Mapped[str] = mapped_column(unique=True)
     hashed_password: Mapped[bytes]
     is_admin: Mapped[bool] = mapped_column(Boolean, default=False, server_default="0")
+    # unix-время «выхода со всех устройств»: токены с iat раньше недействительны
+    tokens_valid_after: Mapped[int | None]
+    # журнал изменений до этого seq сжат: клиенту с меньшим since нужна полная выгрузка
+    changes_compacted_through: Mapped[int] = mapped_column(default=0, server_default="0")
     tasks: Mapped[list["TaskORM"]] = relationship(
         back_populates="author", cascade="all, delete-orphan", lazy="selectin"
     )
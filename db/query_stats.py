@@ -0,0 +1,135 @@
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+from core.config import settings
+from core.metrics import route_label
+
+logger = logging.getLogger("app.sql")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryStats:
+    def __init__(self, parent: "QueryStats | None" = None, keep_statements=False):
+        self.parent = parent
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.slowest_statement: str | None = None
+        self.statements: list[str] | None = [] if keep_statements else None
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.total += duration
+        if duration >= self.slowest:
+            self.slowest = duration
+            self.slowest_statement = statement
+        if self.statements is not None:
+            self.statements.append(statement)
+        if self.parent is not None:
+            self.parent.record(statement, duration)
+
+    def server_timing(self) -> str:
+        return (
+            f'db;dur={self.total * 1000:.2f};desc="{self.count} queries", '
+            f"db-slowest;dur={self.slowest * 1000:.2f}"
+        )
+
+    def report(self) -> str:
+        lines = [f"{self.count} queries, {self.total * 1000:.2f} ms"]
+        lines.extend(self.statements or [])
+        return "\n".join(lines)
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - context._query_started)
+
+
+@contextmanager
+def capture_queries() -> Iterator[QueryStats]:
+    """Считает SQL-запросы внутри блока, включая запросы вложенных HTTP-запросов."""
+    stats = QueryStats(parent=_current.get(), keep_statements=True)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def query_budget_for(route: str) -> int | None:
+    return settings.sql.route_query_budgets.get(route, settings.sql.query_budget)
+
+
+class QueryStatsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(parent=_current.get())
+        token = _current.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                budget = query_budget_for(route_label(scope))
+                if (
+                    settings.sql.enforce_query_budget
+                    and budget is not None
+                    and stats.count > budget
+                ):
+                    raise QueryBudgetExceeded(
+                        f"{scope['method']} {route_label(scope)}: "
+                        f"{stats.count} запросов при бюджете {budget}"
+                    )
+                MutableHeaders(scope=message).append(
+                    "Server-Timing", stats.server_timing()
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            route = route_label(scope)
+            budget = query_budget_for(route)
+            over_budget = budget is not None and stats.count > budget
+            logger.log(
+                logging.WARNING if over_budget else logging.INFO,
+                json.dumps(
+                    {
+                        "event": "request_sql",
+                        "method": scope["method"],
+                        "route": route,
+                        "queries": stats.count,
+                        "db_ms": round(stats.total * 1000, 2),
+                        "slowest_ms": round(stats.slowest * 1000, 2),
+                        "slowest": stats.slowest_statement,
+                        "budget": budget,
+                    },
+                    ensure_ascii=False,
+                ),
+            )
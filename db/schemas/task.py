@@ -2,7 +2,7 @@ from typing import Optional
 
 from pydantic import BaseModel, field_validator, ConfigDict, field_serializer, Field
 
-from db.models.enums import TaskPriority, TaskStatus
+from db.models.enums import ChangeOp, TaskPriority, TaskStatus
 from datetime import date
 
 class TaskSchema(BaseModel):
@@ -54,9 +54,49 @@ class TaskOutPublic(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class TaskOutPartial(BaseModel):
+    id: Optional[int] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    description_preview: Optional[str] = None
+    status: Optional[TaskStatus] = None
+    priority: Optional[TaskPriority] = None
+    term_date: Optional[date] = None
+
+
 class PaginatedTasks(BaseModel):
-    items: list[TaskOutPublic]
+    items: list[TaskOutPublic | TaskOutPartial]
     page: int
     limit: int
     total: int
     pages: int
+
+
+class BulkResult(BaseModel):
+    affected: int
+
+
+class TaskStats(BaseModel):
+    total: int
+    new: int
+    active: int
+    completed: int
+    overdue: int
+    due_today: int
+
+
+class TaskChange(BaseModel):
+    seq: int
+    op: ChangeOp
+    task_id: int
+    # текущее состояние для upsert; у надгробий (delete) отсутствует
+    task: Optional[TaskOutPublic] = None
+
+
+class TaskChanges(BaseModel):
+    changes: list[TaskChange]
+    # since для следующего запроса
+    since: int
+    has_more: bool
+    # журнал до since уже сжат: перечитать задачи постранично и продолжить с since
+    full_resync: bool = False
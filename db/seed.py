@@ -0,0 +1,202 @@
+"""Генератор синтетических данных для tasks.db.
+
+Пример (≈2 млн задач у 5000 пользователей):
+    python -m db.seed --db tasks.db --users 5000 --tasks 2000000 --reset
+"""
+
+import argparse
+import random
+import sqlite3
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterator
+
+from core.security import hash_password
+from db.migrations import migrate
+from db.models.enums import TaskPriority, TaskStatus
+from db.models.task import TaskORM
+from db.models.user import UserOrm
+
+# SAEnum хранит имена членов перечисления, а не значения
+STATUS_WEIGHTS = {
+    TaskStatus.COMPLETED.name: 60,
+    TaskStatus.NEW.name: 25,
+    TaskStatus.ACTIVE.name: 15,
+}
+PRIORITY_WEIGHTS = {
+    TaskPriority.NORMAL.name: 55,
+    TaskPriority.LOW.name: 25,
+    TaskPriority.HIGH.name: 20,
+}
+WORDS = (
+    "купить позвонить отчёт релиз код ревью встреча план бюджет клиент "
+    "починить тест деплой письмо документ счёт дизайн созвон задача идея"
+).split()
+DEFAULT_PASSWORD = "password"
+
+
+def _tasks(
+    rng: random.Random, count: int, user_ids: list[int], today: date
+) -> Iterator[tuple]:
+    statuses, status_w = zip(*STATUS_WEIGHTS.items())
+    priorities, priority_w = zip(*PRIORITY_WEIGHTS.items())
+    # тексты и даты берём из заранее собранных пулов: генерация строк
+    # на каждую задачу в разы медленнее самой вставки
+    titles = [" ".join(rng.choices(WORDS, k=rng.randint(1, 5))) for _ in range(4096)]
+    descriptions = [None] * 30 + [
+        " ".join(rng.choices(WORDS, k=rng.randint(3, 30))) for _ in range(65)
+    ]
+    # ~5% длинных заметок, как у пользователей, вставляющих большие тексты
+    descriptions += [" ".join(rng.choices(WORDS, k=rng.randint(300, 600))) for _ in range(5)]
+    # срок: чаще в прошлом (просроченные/закрытые), реже в ближайшем будущем
+    term_dates = [None] * 20 + [
+        (today + timedelta(days=int(rng.triangular(-365, 120, 0)))).isoformat()
+        for _ in range(80)
+    ]
+    n_users = len(user_ids)
+    batch = 10_000
+    for start in range(0, count, batch):
+        size = min(batch, count - start)
+        status_col = rng.choices(statuses, status_w, k=size)
+        priority_col = rng.choices(priorities, priority_w, k=size)
+        title_col = rng.choices(titles, k=size)
+        description_col = rng.choices(descriptions, k=size)
+        term_date_col = rng.choices(term_dates, k=size)
+        for i in range(size):
+            # степенное распределение: у немногих пользователей много задач
+            author_id = user_ids[int(n_users * rng.random() ** 2)]
+            yield (
+                title_col[i],
+                description_col[i],
+                status_col[i],
+                priority_col[i],
+                term_date_col[i],
+                author_id,
+            )
+
+
+def seed(
+    db_path: Path,
+    users: int,
+    tasks: int,
+    password: str = DEFAULT_PASSWORD,
+    batch_size: int = 100_000,
+    seed_value: int = 42,
+    reset: bool = False,
+) -> dict:
+    if reset:
+        db_path.unlink(missing_ok=True)
+    migrate(str(db_path))
+
+    rng = random.Random(seed_value)
+    started = time.perf_counter()
+    # один bcrypt на весь набор вместо bcrypt на каждого пользователя
+    hashed = hash_password(password)
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        previous = {
+            pragma: conn.execute(f"PRAGMA {pragma}").fetchone()[0]
+            for pragma in ("journal_mode", "synchronous")
+        }
+        conn.execute("PRAGMA journal_mode=MEMORY")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-262144")
+
+        tasks_table = TaskORM.__tablename__
+        indexes = conn.execute(
+            "SELECT name, sql FROM sqlite_master "
+            "WHERE type='index' AND tbl_name=? AND sql IS NOT NULL",
+            (tasks_table,),
+        ).fetchall()
+
+        conn.execute("BEGIN")
+        first_user = conn.execute(
+            f"SELECT COALESCE(MAX(id), 0) + 1 FROM {UserOrm.__tablename__}"
+        ).fetchone()[0]
+        conn.executemany(
+            f"INSERT INTO {UserOrm.__tablename__} "
+            "(name, email, hashed_password, is_admin) VALUES (?, ?, ?, 0)",
+            (
+                (f"user{n}", f"user{n}@example.com", hashed)
+                for n in range(first_user, first_user + users)
+            ),
+        )
+        user_ids = [
+            row[0]
+            for row in conn.execute(
+                f"SELECT id FROM {UserOrm.__tablename__} WHERE id >= ?", (first_user,)
+            )
+        ]
+        # вторичные индексы дешевле перестроить один раз, чем обновлять на каждой вставке
+        for name, _ in indexes:
+            conn.execute(f'DROP INDEX "{name}"')
+
+        insert_sql = (
+            f"INSERT INTO {tasks_table} "
+            "(title, description, status, priority, term_date, author_id) "
+            "VALUES (?, ?, ?, ?, ?, ?)"
+        )
+        rows = _tasks(rng, tasks, user_ids, date.today())
+        inserted = 0
+        while inserted < tasks:
+            chunk = [row for _, row in zip(range(batch_size), rows)]
+            conn.executemany(insert_sql, chunk)
+            inserted += len(chunk)
+
+        for _, ddl in indexes:
+            conn.execute(ddl)
+        # задачи вставлены мимо журнала изменений: как и в миграции v0007,
+        # их владельцам первая синхронизация должна отдать full_resync
+        conn.execute(
+            f"UPDATE {UserOrm.__tablename__} SET changes_compacted_through = 1 "
+            f"WHERE id >= ? AND EXISTS (SELECT 1 FROM {tasks_table} "
+            f"WHERE {tasks_table}.author_id = {UserOrm.__tablename__}.id)",
+            (first_user,),
+        )
+        conn.execute("COMMIT")
+        conn.execute("ANALYZE")
+
+        conn.execute(f"PRAGMA journal_mode={previous['journal_mode']}")
+        conn.execute(f"PRAGMA synchronous={previous['synchronous']}")
+    finally:
+        conn.close()
+
+    return {
+        "users": len(user_ids),
+        "tasks": inserted,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Засев tasks.db синтетическими данными")
+    parser.add_argument("--db", type=Path, default=Path("tasks.db"))
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--password", default=DEFAULT_PASSWORD)
+    parser.add_argument("--batch-size", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--reset", action="store_true", help="удалить базу перед засевом"
+    )
+    args = parser.parse_args()
+
+    stats = seed(
+        args.db,
+        users=args.users,
+        tasks=args.tasks,
+        password=args.password,
+        batch_size=args.batch_size,
+        seed_value=args.seed,
+        reset=args.reset,
+    )
+    print(
+        f"{stats['users']} пользователей, {stats['tasks']} задач "
+        f"за {stats['seconds']} с → {args.db}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import json
+import logging
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import greenlet
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("app.sql.slow")
+
+REPOSITORIES_DIR = str(Path(__file__).resolve().parents[1] / "repositories")
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "REPLACE")
+
+# EXPLAIN выполняется на отдельном соединении вне event loop
+_explain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+
+
+def redact(parameters):
+    def mask(value):
+        if value is None or isinstance(value, bool):
+            return value
+        if isinstance(value, (str, bytes)):
+            return f"<{type(value).__name__}:{len(value)}>"
+        return f"<{type(value).__name__}>"
+
+    if isinstance(parameters, dict):
+        return {key: mask(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [mask(value) for value in parameters]
+    return mask(parameters)
+
+
+def _frames(frame):
+    # синхронный код async-движка крутится в дочернем greenlet'е,
+    # а корутины репозиториев — в стеке родительского
+    current = greenlet.getcurrent()
+    while True:
+        while frame is not None:
+            yield frame
+            frame = frame.f_back
+        current = current.parent
+        if current is None:
+            return
+        frame = current.gr_frame
+
+
+def calling_repository_method() -> str | None:
+    for frame in _frames(sys._getframe(1)):
+        code = frame.f_code
+        if code.co_filename.startswith(REPOSITORIES_DIR):
+            module = frame.f_globals.get("__name__", "")
+            return f"{module}.{code.co_qualname}"
+    return None
+
+
+def explain_query_plan(database: str, statement: str, parameters) -> list[str]:
+    conn = sqlite3.connect(f"file:{database}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    except sqlite3.Error as e:
+        return [f"EXPLAIN failed: {e}"]
+    finally:
+        conn.close()
+    return [row[-1] for row in rows]
+
+
+class SlowQueryLog:
+    def __init__(self, engine: Engine, threshold_ms: float):
+        self.engine = engine
+        self.threshold = threshold_ms / 1000
+        self.database = engine.url.database
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+
+    def remove(self) -> None:
+        event.remove(self.engine, "before_cursor_execute", self._before)
+        event.remove(self.engine, "after_cursor_execute", self._after)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        context._slow_query_started = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - context._slow_query_started
+        if duration < self.threshold:
+            return
+        entry = {
+            "event": "slow_query",
+            "ms": round(duration * 1000, 2),
+            "statement": statement,
+            "params": redact(parameters),
+            "caller": calling_repository_method(),
+        }
+        explainable = (
+            not executemany
+            and self.database
+            and self.database != ":memory:"
+            and statement.lstrip().upper().startswith(EXPLAINABLE)
+        )
+        if explainable:
+            _explain_executor.submit(self._explain_and_log, entry, parameters)
+        else:
+            logger.warning(json.dumps(entry, ensure_ascii=False))
+
+    def _explain_and_log(self, entry: dict, parameters) -> None:
+        entry["plan"] = explain_query_plan(self.database, entry["statement"], parameters)
+        logger.warning(json.dumps(entry, ensure_ascii=False))
+
+
+def install_slow_query_log(engine: Engine, threshold_ms: float) -> SlowQueryLog:
+    return SlowQueryLog(engine, threshold_ms)
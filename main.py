@@ -1,34 +1,179 @@
+import time
 from contextlib import asynccontextmanager
-from pathlib import Path
+from datetime import timedelta
 from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 import uvicorn
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 
-from admin.admin import init_admin
-from api.auth import router as auth_router
+from api.admin_tasks import router as admin_tasks_router
+from api.auth import prune_rate_limits, revoked_token_repo, router as auth_router
+from api.metrics import router as metrics_router
 from api.tasks import router as task_router
-from api.views import router as view_router
-from db.database import create_tables
+from core.admission import AdmissionMiddleware
+from core.compression import CompressionMiddleware
+from core.config import settings
+from core.invalidation import invalidation_bus
+from core.metrics import MetricsMiddleware
+from core.revocation import revocation_list
+from core.scheduler import Scheduler
+from core.security import load_keys
+from core.static import static_files
+from db import maintenance
+from db.database import check_schema, engine, new_session
+from db.models.task import utcnow
+from db.query_stats import QueryStatsMiddleware
+from repositories.task_archive_repository import TaskArchiveRepository
+from repositories.task_change_repository import TaskChangeRepository
+
+
+async def refresh_revocations():
+    async with revoked_token_repo() as repo:
+        await revocation_list.rebuild(repo)
+
+
+async def archive_completed():
+    async with new_session() as session:
+        await TaskArchiveRepository(session).archive_completed(
+            utcnow() - timedelta(days=settings.archive.after_days),
+            settings.archive.chunk_size,
+        )
+
+
+async def compact_changes():
+    async with new_session() as session:
+        await TaskChangeRepository(session).compact(
+            utcnow() - timedelta(days=settings.task_sync.retention_days),
+            settings.task_sync.compact_chunk_size,
+        )
+
+
+def maintenance_scheduler() -> Scheduler:
+    config = settings.maintenance
+    scheduler = Scheduler(config.lock_dir)
+    # без перестройки фильтр не увидит токены, отозванные другими воркерами
+    scheduler.add(
+        "revocation_rebuild",
+        refresh_revocations,
+        settings.auth_jwt.revocation_refresh_seconds,
+        config.jitter,
+    )
+    if not config.enabled:
+        return scheduler
+    # лимиты у каждого воркера свои, остальное — общая база
+    scheduler.add(
+        "rate_limit_prune", prune_rate_limits, config.rate_limit_prune_seconds, config.jitter
+    )
+    scheduler.add(
+        "optimize",
+        lambda: maintenance.optimize(engine),
+        config.optimize_seconds,
+        config.jitter,
+        exclusive=True,
+    )
+    scheduler.add(
+        "wal_checkpoint",
+        lambda: maintenance.checkpoint(engine),
+        config.checkpoint_seconds,
+        config.jitter,
+        exclusive=True,
+    )
+    scheduler.add(
+        "archive",
+        archive_completed,
+        config.archive_seconds,
+        config.jitter,
+        exclusive=True,
+    )
+    scheduler.add(
+        "changes_compact",
+        compact_changes,
+        config.changes_compact_seconds,
+        config.jitter,
+        exclusive=True,
+    )
+    scheduler.add(
+        "invalidations_prune",
+        lambda: maintenance.prune_invalidations(
+            engine, time.time() - settings.invalidation.retention_seconds
+        ),
+        config.invalidations_prune_seconds,
+        config.jitter,
+        exclusive=True,
+    )
+    return scheduler
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await create_tables()
-    print("Tables Created")
-    yield
+    if await check_schema():
+        print("Tables Created")
+    await load_keys()
+    await refresh_revocations()
+    # до планировщика и первых запросов: seq, с которого воркер читает шину
+    await invalidation_bus.start(engine.url.database)
+    if settings.components.views:
+        from api.views import precompile_templates
 
-BASE_DIR   = Path(__file__).resolve().parent
-STATIC_DIR = BASE_DIR / "static"
+        precompile_templates()
+    scheduler = maintenance_scheduler()
+    scheduler.start()
+    monitor = None
+    if settings.loop_monitor.enabled:
+        from core.loop_monitor import LoopMonitor
+
+        monitor = LoopMonitor(
+            interval=settings.loop_monitor.interval_ms / 1000,
+            threshold=settings.loop_monitor.threshold_ms / 1000,
+        )
+        monitor.start()
+    yield
+    await scheduler.stop(settings.maintenance.shutdown_timeout)
+    await invalidation_bus.stop()
+    if monitor is not None:
+        await monitor.stop()
 
 app = FastAPI(debug=True, lifespan=lifespan)
 
-app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+app.mount("/static", static_files, name="static")
 app.include_router(auth_router)
 app.include_router(task_router)
-app.include_router(view_router)
+app.include_router(admin_tasks_router)
+app.include_router(metrics_router)
+# админка и HTML-страницы импортируются, только если включены
+if settings.components.views:
+    from api.views import router as view_router
+
+    app.include_router(view_router)
+if settings.profiling.enabled:
+    from core.profiling import ProfilingMiddleware
+
+    app.add_middleware(ProfilingMiddleware)
+if settings.compression.enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression.minimum_size,
+        gzip_level=settings.compression.gzip_level,
+        brotli_quality=settings.compression.brotli_quality,
+    )
+app.add_middleware(QueryStatsMiddleware)
+# снаружи QueryStats и сжатия, но внутри метрик: отказы 503 тоже считаются
+if settings.admission.enabled:
+    app.add_middleware(
+        AdmissionMiddleware,
+        classes={
+            "auth": settings.admission.auth,
+            "read": settings.admission.read,
+            "write": settings.admission.write,
+            "admin": settings.admission.admin,
+        },
+        retry_after=settings.admission.retry_after_seconds,
+    )
+app.add_middleware(MetricsMiddleware)
 app.add_middleware(ProxyHeadersMiddleware, trusted_hosts="*")
-init_admin(app)
+if settings.components.admin:
+    from admin.admin import init_admin
+
+    init_admin(app)
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,31 @@
+"""Миграции схемы tasks.db.
+
+    python migrate.py              # применить все новые миграции
+    python migrate.py --dry-run    # показать, что будет сделано, и оценку времени
+"""
+
+import argparse
+
+from db.migrations import SCHEMA_VERSION, connect, current_version, migrate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Миграции схемы SQLite")
+    parser.add_argument("--db", default="tasks.db")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    try:
+        version = current_version(conn)
+    finally:
+        conn.close()
+    print(f"{args.db}: версия {version}, последняя {SCHEMA_VERSION}")
+
+    applied = migrate(args.db, dry_run=args.dry_run, log=print)
+    if not applied:
+        print("схема актуальна")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.models.cache_invalidation import record_invalidation
+from db.models.revoked_token import RevokedTokenORM
+
+
+class RevokedTokenRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def add(self, jti: str, user_id: int, expires_at: int) -> None:
+        await self.session.merge(
+            RevokedTokenORM(jti=jti, user_id=user_id, expires_at=expires_at)
+        )
+        # остальные воркеры добавят jti в свои фильтры, не дожидаясь перестройки
+        await record_invalidation(self.session, "revoked_tokens", [jti])
+        await self.session.commit()
+
+    async def exists(self, jti: str) -> bool:
+        res = await self.session.execute(
+            select(RevokedTokenORM.jti).where(RevokedTokenORM.jti == jti)
+        )
+        return res.scalar_one_or_none() is not None
+
+    async def active_jtis(self, now: int) -> list[str]:
+        res = await self.session.execute(
+            select(RevokedTokenORM.jti).where(RevokedTokenORM.expires_at > now)
+        )
+        return list(res.scalars().all())
+
+    async def prune(self, now: int) -> int:
+        res = await self.session.execute(
+            delete(RevokedTokenORM).where(RevokedTokenORM.expires_at <= now)
+        )
+        await self.session.commit()
+        return res.rowcount
@@ -0,0 +1,101 @@
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.models.enums import ChangeOp
+from db.models.task import TaskArchiveORM, TaskORM, utcnow
+from db.models.task_change import record_changes
+from repositories.task_repository import completed_before
+
+TASKS = TaskORM.__table__
+ARCHIVE = TaskArchiveORM.__table__
+
+
+class TaskArchiveRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def archive_completed(self, cutoff: datetime, chunk_size: int) -> int:
+        # пачка начинается с DELETE ... RETURNING: транзакция сразу пишущая,
+        # и SQLite не приходится повышать чтение до записи (SQLITE_BUSY в WAL)
+        moved = 0
+        after_id = 0
+        while True:
+            ids = (
+                select(TaskORM.id)
+                .where(TaskORM.id > after_id, *completed_before(cutoff))
+                .order_by(TaskORM.id)
+                .limit(chunk_size)
+                .scalar_subquery()
+            )
+            res = await self.session.execute(
+                delete(TASKS).where(TASKS.c.id.in_(ids)).returning(*TASKS.c)
+            )
+            rows = [dict(row) for row in res.mappings()]
+            if rows:
+                archived_at = utcnow()
+                await self.session.execute(
+                    insert(ARCHIVE), [{**row, "archived_at": archived_at} for row in rows]
+                )
+                # из списка задач архивные пропадают — для клиентов это удаление
+                await record_changes(
+                    self.session,
+                    ChangeOp.DELETE,
+                    [(row["id"], row["author_id"]) for row in rows],
+                )
+            await self.session.commit()
+            moved += len(rows)
+            if len(rows) < chunk_size:
+                return moved
+            after_id = max(row["id"] for row in rows)
+            await asyncio.sleep(0)
+
+    async def restore(self, task_id: int, user_id: int) -> int | None:
+        # задача с этим id могла быть в архиве несколько раз — берём последнюю
+        latest = (
+            select(func.max(ARCHIVE.c.archive_id))
+            .where(ARCHIVE.c.id == task_id, ARCHIVE.c.author_id == user_id)
+            .scalar_subquery()
+        )
+        res = await self.session.execute(
+            delete(ARCHIVE)
+            .where(ARCHIVE.c.archive_id == latest)
+            .returning(*(ARCHIVE.c[column.key] for column in TASKS.c))
+        )
+        row = res.mappings().first()
+        if row is None:
+            await self.session.rollback()
+            return None
+        values = dict(row)
+        # иначе ближайший запуск архивации по старому completed_at вернёт
+        # задачу в архив: возраст восстановленной считаем с момента восстановления
+        values["completed_at"] = utcnow()
+        # id без AUTOINCREMENT мог достаться новой задаче — тогда выдаём новый
+        if await self.session.scalar(select(TaskORM.id).where(TaskORM.id == task_id)):
+            values.pop("id")
+        res = await self.session.execute(insert(TASKS).values(values).returning(TASKS.c.id))
+        restored_id = res.scalar_one()
+        await record_changes(self.session, ChangeOp.UPSERT, [(restored_id, user_id)])
+        await self.session.commit()
+        return restored_id
+
+    async def get_by_pages(
+        self, user_id: int, page: int, limit: int
+    ) -> tuple[list[TaskArchiveORM], int]:
+        res = await self.session.execute(
+            select(TaskArchiveORM)
+            .where(TaskArchiveORM.author_id == user_id)
+            .order_by(TaskArchiveORM.id.desc(), TaskArchiveORM.archive_id.desc())
+            .offset((page - 1) * limit)
+            .limit(limit)
+        )
+        total = await self.session.scalar(
+            select(func.count()).select_from(
+                select(TaskArchiveORM.archive_id)
+                .where(TaskArchiveORM.author_id == user_id)
+                .subquery()
+            )
+        )
+        return list(res.scalars().all()), total
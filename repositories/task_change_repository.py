@@ -0,0 +1,86 @@
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import delete, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer
+
+from db.models.task import TaskORM
+from db.models.task_change import TaskChangeORM
+from db.models.user import UserOrm
+
+
+class TaskChangeRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def since(self, user_id: int, since: int, limit: int) -> list:
+        # один диапазон по ix_task_changes_user_id; текущее состояние задачи
+        # подтягивается поиском по первичному ключу tasks
+        res = await self.session.execute(
+            select(TaskChangeORM.seq, TaskChangeORM.op, TaskChangeORM.task_id, TaskORM)
+            .outerjoin(
+                TaskORM,
+                (TaskORM.id == TaskChangeORM.task_id) & (TaskORM.author_id == user_id),
+            )
+            .options(undefer(TaskORM.description))
+            .where(TaskChangeORM.user_id == user_id, TaskChangeORM.seq > since)
+            .order_by(TaskChangeORM.seq)
+            .limit(limit)
+        )
+        return list(res.all())
+
+    async def last_seq(self) -> int:
+        # последний выданный seq; max(seq) после сжатия журнала может быть меньше
+        seq = await self.session.scalar(
+            text("SELECT seq FROM sqlite_sequence WHERE name = :name"),
+            {"name": TaskChangeORM.__tablename__},
+        )
+        return seq or 0
+
+    async def compact(self, cutoff: datetime, chunk_size: int) -> int:
+        """Удаляет записи журнала старше cutoff.
+
+        Удаляется только префикс по seq, поэтому границу удалённого описывает
+        одно число. Сначала его получают владельцы удаляемых записей
+        (users.changes_compacted_through), и лишь затем записи удаляются —
+        клиент с since ниже границы не получит неполную дельту.
+        """
+        first_fresh = await self.session.scalar(
+            select(TaskChangeORM.seq)
+            .where(TaskChangeORM.changed_at >= cutoff)
+            .order_by(TaskChangeORM.seq)
+            .limit(1)
+        )
+        through = (first_fresh - 1) if first_fresh is not None else await self.last_seq()
+        await self.session.execute(
+            update(UserOrm)
+            .where(
+                UserOrm.id.in_(
+                    select(TaskChangeORM.user_id)
+                    .where(TaskChangeORM.seq <= through)
+                    .distinct()
+                ),
+                UserOrm.changes_compacted_through < through,
+            )
+            .values(changes_compacted_through=through)
+        )
+        await self.session.commit()
+
+        removed = 0
+        while True:
+            seqs = (
+                select(TaskChangeORM.seq)
+                .where(TaskChangeORM.seq <= through)
+                .order_by(TaskChangeORM.seq)
+                .limit(chunk_size)
+                .scalar_subquery()
+            )
+            res = await self.session.execute(
+                delete(TaskChangeORM).where(TaskChangeORM.seq.in_(seqs))
+            )
+            await self.session.commit()
+            removed += res.rowcount
+            if res.rowcount < chunk_size:
+                return removed
+            await asyncio.sleep(0)
@@ -1,7 +1,30 @@
-from sqlalchemy import delete, func, select, update
+import asyncio
+from datetime import date, datetime
+from typing import Sequence
+
+from sqlalchemy import Delete, Update, delete, func, select, text, union_all, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer
+
+from db.models.enums import ChangeOp, TaskStatus
+from db.models.task import OPEN_TASKS_WHERE, TaskArchiveORM, TaskORM, utcnow
+from db.models.task_change import record_changes
+
+# description отложена (deferred), поэтому после записи перечитываем её явно
+TASK_COLUMNS = [column.key for column in TaskORM.__table__.columns]
+
+
+def completed_before(cutoff: datetime) -> tuple:
+    # у задач, завершённых до появления completed_at, возраст считаем по сроку
+    return (
+        TaskORM.status == TaskStatus.COMPLETED,
+        func.coalesce(TaskORM.completed_at, TaskORM.term_date) < cutoff,
+    )
 
-from db.models.task import TaskORM
+
+# дословно условие ix_tasks_open_author_id_term_date: с привязанным
+# параметром вместо литерала SQLite частичный индекс не выберет
+OPEN_TASKS = text(OPEN_TASKS_WHERE)
 
 
 class TaskRepository:
@@ -12,7 +35,7 @@ class TaskRepository:
         self.session.add(task)
         await self.session.flush()
         await self.session.commit()
-        await self.session.refresh(task)
+        await self.session.refresh(task, attribute_names=TASK_COLUMNS)
         return task
 
     async def update_task(self, task: TaskORM, **fields):
@@ -20,11 +43,16 @@ class TaskRepository:
             setattr(task, k, v)
         await self.session.flush()
         await self.session.commit()
-        await self.session.refresh(task)
+        await self.session.refresh(task, attribute_names=TASK_COLUMNS)
         return task
 
-    async def get_by_id(self, task_id: int) -> TaskORM | None:
-        res = await self.session.execute(select(TaskORM).where(TaskORM.id == task_id))
+    async def get_by_id(
+        self, task_id: int, with_description: bool = False
+    ) -> TaskORM | None:
+        stmt = select(TaskORM).where(TaskORM.id == task_id)
+        if with_description:
+            stmt = stmt.options(undefer(TaskORM.description))
+        res = await self.session.execute(stmt)
         return res.scalar_one_or_none()
 
     async def delete_task(self, task: TaskORM) -> None:
@@ -32,21 +60,205 @@ class TaskRepository:
         await self.session.commit()
 
     async def get_by_pages(
-        self, user_id: int, page: int, limit: int
-    ) -> tuple[list[TaskORM], int]:
+        self,
+        user_id: int,
+        page: int,
+        limit: int,
+        fields: Sequence[str] | None = None,
+        preview: int | None = None,
+        include_archived: bool = False,
+    ) -> tuple[list, int]:
         offset = (page - 1) * limit
+        if include_archived:
+            items = await self._page_with_archive(user_id, offset, limit, fields, preview)
+            total = await self._count(TaskORM, user_id) + await self._count(
+                TaskArchiveORM, user_id
+            )
+            return items, total
+        # при fields читаем с диска только запрошенные колонки
+        if fields:
+            items_stmt = select(
+                *(self._column(TaskORM, name, preview) for name in fields)
+            )
+        else:
+            items_stmt = select(TaskORM).options(undefer(TaskORM.description))
         items_stmt = (
-            select(TaskORM)
-            .where(TaskORM.author_id == user_id)
+            items_stmt.where(TaskORM.author_id == user_id)
             .order_by(TaskORM.id.desc())
             .offset(offset)
             .limit(limit)
         )
         res = await self.session.execute(items_stmt)
-        items = res.scalars().all()
-        total_stmt = select(func.count()).select_from(
-            select(TaskORM.id).where(TaskORM.author_id == user_id).subquery()
-        )
-        total_res = await self.session.execute(total_stmt)
-        total: int = total_res.scalar_one()
+        items = res.mappings().all() if fields else res.scalars().all()
+        total: int = await self._count(TaskORM, user_id)
         return items, total
+
+    async def _page_with_archive(
+        self,
+        user_id: int,
+        offset: int,
+        limit: int,
+        fields: Sequence[str],
+        preview: int | None,
+    ) -> list:
+        # из каждой таблицы берём не больше offset + limit строк по индексу,
+        # и только их объединяем и сортируем
+        parts = [
+            select(
+                *(self._column(model, name, preview) for name in fields),
+                model.id.label("sort_id"),
+            )
+            .where(model.author_id == user_id)
+            .order_by(model.id.desc())
+            .limit(offset + limit)
+            .subquery()
+            for model in (TaskORM, TaskArchiveORM)
+        ]
+        merged = union_all(*(select(part) for part in parts)).subquery()
+        stmt = (
+            select(*(column for column in merged.c if column.name != "sort_id"))
+            .order_by(merged.c.sort_id.desc())
+            .offset(offset)
+            .limit(limit)
+        )
+        res = await self.session.execute(stmt)
+        return res.mappings().all()
+
+    async def get_open_due(
+        self,
+        user_id: int,
+        start: date | None,
+        end: date | None,
+        page: int,
+        limit: int,
+    ) -> tuple[list[TaskORM], int]:
+        """Незавершённые задачи со сроком в [start, end], ранние первыми.
+
+        Границы включительны, None — без границы. Задачи без срока не попадают.
+        Оба запроса идут по ix_tasks_open_author_id_term_date, count — без
+        чтения строк таблицы.
+        """
+        where = [TaskORM.author_id == user_id, OPEN_TASKS, TaskORM.term_date.is_not(None)]
+        if start is not None:
+            where.append(TaskORM.term_date >= start)
+        if end is not None:
+            where.append(TaskORM.term_date <= end)
+        res = await self.session.execute(
+            select(TaskORM)
+            .options(undefer(TaskORM.description))
+            .where(*where)
+            # порядок ключа индекса: внутри дня сначала ACTIVE, потом NEW
+            .order_by(TaskORM.term_date, TaskORM.status, TaskORM.id)
+            .offset((page - 1) * limit)
+            .limit(limit)
+        )
+        total = await self.session.scalar(select(func.count()).where(*where))
+        return list(res.scalars().all()), total
+
+    async def stats(self, user_id: int, today: date) -> dict[str, int]:
+        # по статусам — из ix_tasks_author_id_status, сроки — из частичного
+        # индекса; строки таблицы не читаются ни одним из двух запросов
+        res = await self.session.execute(
+            select(TaskORM.status, func.count())
+            .where(TaskORM.author_id == user_id)
+            .group_by(TaskORM.status)
+        )
+        stats = {status.value: 0 for status in TaskStatus}
+        for status, count in res.all():
+            stats[status.value] = count
+        stats["total"] = sum(stats.values())
+        overdue, due_today = (
+            await self.session.execute(
+                select(
+                    func.count().filter(TaskORM.term_date < today),
+                    func.count().filter(TaskORM.term_date == today),
+                ).where(
+                    TaskORM.author_id == user_id,
+                    OPEN_TASKS,
+                    TaskORM.term_date <= today,
+                )
+            )
+        ).one()
+        stats["overdue"] = overdue
+        stats["due_today"] = due_today
+        return stats
+
+    async def _count(self, model, user_id: int) -> int:
+        res = await self.session.execute(
+            select(func.count()).select_from(
+                select(model.id).where(model.author_id == user_id).subquery()
+            )
+        )
+        return res.scalar_one()
+
+    @staticmethod
+    def _column(model, name: str, preview: int | None):
+        if name == "description" and preview:
+            # обрезаем описание в SQL, полный текст в Python не попадает
+            return func.substr(model.description, 1, preview).label(
+                "description_preview"
+            )
+        return getattr(model, name)
+
+    async def author_ids(self, task_ids: Sequence[int]) -> list[int]:
+        res = await self.session.execute(
+            select(TaskORM.author_id).where(TaskORM.id.in_(task_ids)).distinct()
+        )
+        return list(res.scalars().all())
+
+    async def _run_chunked(self, build, chunk_size: int, op: ChangeOp) -> int:
+        # каждая пачка — своя короткая транзакция: блокировка записи SQLite
+        # отпускается между пачками, и запросы пользователей не ждут всю операцию.
+        # Пачки идут по возрастанию id с продолжением после последнего
+        # обработанного, чтобы не просматривать заново уже пропущенные строки.
+        # Запросы идут мимо ORM, поэтому журнал изменений пишется здесь же
+        affected = 0
+        after_id = 0
+        while True:
+            res = await self.session.execute(
+                build(chunk_size, after_id)
+                .returning(TaskORM.id, TaskORM.author_id)
+                .execution_options(synchronize_session=False)
+            )
+            rows = res.all()
+            await record_changes(self.session, op, rows)
+            await self.session.commit()
+            affected += len(rows)
+            if len(rows) < chunk_size:
+                return affected
+            after_id = max(task_id for task_id, _ in rows)
+            await asyncio.sleep(0)
+
+    @staticmethod
+    def _chunk_ids(limit: int, after_id: int, *where):
+        return (
+            select(TaskORM.id)
+            .where(TaskORM.id > after_id, *where)
+            .order_by(TaskORM.id)
+            .limit(limit)
+            .scalar_subquery()
+        )
+
+    async def complete_overdue(self, user_id: int, today: date, chunk_size: int) -> int:
+        def build(limit: int, after_id: int) -> Update:
+            ids = self._chunk_ids(
+                limit,
+                after_id,
+                TaskORM.author_id == user_id,
+                TaskORM.status != TaskStatus.COMPLETED,
+                TaskORM.term_date < today,
+            )
+            return (
+                update(TaskORM)
+                .where(TaskORM.id.in_(ids))
+                .values(status=TaskStatus.COMPLETED, completed_at=utcnow())
+            )
+
+        return await self._run_chunked(build, chunk_size, ChangeOp.UPSERT)
+
+    async def delete_completed_before(self, cutoff: datetime, chunk_size: int) -> int:
+        def build(limit: int, after_id: int) -> Delete:
+            ids = self._chunk_ids(limit, after_id, *completed_before(cutoff))
+            return delete(TaskORM).where(TaskORM.id.in_(ids))
+
+        return await self._run_chunked(build, chunk_size, ChangeOp.DELETE)
@@ -1,10 +1,13 @@
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
 
 from db.models.user import UserOrm
 
 
 class UserRepository:
+    # задачи пользователя (lazy="selectin") для аутентификации не нужны:
+    # без raiseload каждый запрос API дочитывал бы их все вторым SELECT
     def __init__(self, session: AsyncSession):
         self.session = session
 
@@ -20,9 +23,33 @@ class UserRepository:
 
     async def get_by_email(self, email) -> UserOrm | None:
         result = await self.session.execute(
-            select(UserOrm).where(UserOrm.email == email)
+            select(UserOrm)
+            .where(UserOrm.email == email)
+            .options(raiseload(UserOrm.tasks))
         )
         return result.scalars().first()
 
+    async def is_admin(self, user_id: int) -> bool:
+        res = await self.session.execute(
+            select(UserOrm.is_admin).where(UserOrm.id == user_id)
+        )
+        return bool(res.scalar_one_or_none())
+
     async def get_by_id(self, user_id: int) -> UserOrm | None:
-        return await self.session.get(UserOrm, user_id)
\ No newline at end of file
+        return await self.session.get(
+            UserOrm, user_id, options=[raiseload(UserOrm.tasks)]
+        )
+
+    async def invalidate_tokens(self, user: UserOrm, issued_before: int) -> None:
+        user.tokens_valid_after = issued_before
+        await self.session.commit()
+
+    async def update_password_hash(self, user_id: int, old: bytes, new: bytes) -> bool:
+        # условие на старый хеш: не затираем пароль, сменённый параллельно
+        res = await self.session.execute(
+            update(UserOrm)
+            .where(UserOrm.id == user_id, UserOrm.hashed_password == old)
+            .values(hashed_password=new)
+        )
+        await self.session.commit()
+        return res.rowcount == 1
@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager, contextmanager
 from datetime import date
 
 import pytest
@@ -7,15 +8,24 @@ from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 
 from api.auth import rate_limiter
+from core.config import settings
+from core.loop_monitor import LoopMonitor
 from core.security import hash_password
 from db.models.enums import TaskStatus, TaskPriority
 from db.models.task import TaskORM
 from db.models.user import UserOrm
 from main import app
-from db.database import Base, get_session
+from db.database import Base, get_session, get_session_maker
+from db.query_stats import capture_queries
 
 test_db_url = "sqlite+aiosqlite:///./test.db"
 
+# любой эндпоинт, сделавший больше запросов к БД, роняет тест
+settings.sql.query_budget = 8
+settings.sql.enforce_query_budget = True
+# минимальный cost bcrypt: тестам не нужна стойкость хешей
+settings.password_hashing.rounds = 4
+
 test_engine = create_async_engine(test_db_url)
 TestSessionLocal = async_sessionmaker(bind=test_engine,expire_on_commit=False)
 
@@ -37,12 +47,10 @@ async def clear_tables(test_db_session):
 
     tables = reversed(Base.metadata.sorted_tables)
 
-    await test_db_session.execute(text("PRAGMA foreign_keys=OFF"))
-
+    # дочерние таблицы раньше родительских: внешние ключи включены
     for table in tables:
         await test_db_session.execute(text(f"DELETE FROM {table.name};"))
 
-    await test_db_session.execute(text("PRAGMA foreign_keys=ON"))
     await test_db_session.commit()
 
 @pytest_asyncio.fixture
@@ -52,6 +60,7 @@ async def client(test_db_session):
             yield session
 
     app.dependency_overrides[get_session] = override_get_session
+    app.dependency_overrides[get_session_maker] = lambda: TestSessionLocal
     app.dependency_overrides[rate_limiter] = lambda: None
 
     transport = ASGITransport(app=app)
@@ -114,3 +123,28 @@ async def create_task_for_user(test_db_session):
         await test_db_session.refresh(task)
         return task
     return _create_task
+
+@pytest.fixture
+def max_queries():
+    @contextmanager
+    def _max_queries(budget: int):
+        with capture_queries() as stats:
+            yield stats
+        assert stats.count <= budget, stats.report()
+
+    return _max_queries
+
+
+@pytest.fixture
+def no_loop_blocking():
+    @asynccontextmanager
+    async def _no_loop_blocking(threshold: float = 0.1):
+        monitor = LoopMonitor(interval=0.01, threshold=threshold)
+        monitor.start()
+        try:
+            yield monitor
+        finally:
+            await monitor.stop()
+        assert not monitor.blocked, monitor.blocked[0].stack
+
+    return _no_loop_blocking
@@ -0,0 +1,135 @@
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi.responses import RedirectResponse
+from sqlalchemy import func, select, text
+
+from admin.admin import AdminAuth, TasksAdmin
+from core.config import settings
+from db.models.enums import TaskStatus
+from db.models.task import TaskORM, utcnow
+from tests.conftest import TestSessionLocal
+
+
+@pytest.fixture
+def admin_client(client, user_factory):
+    async def _admin_client():
+        admin = await user_factory(
+            email="admin@example.com", password="adminpass", is_admin=True
+        )
+        response = await client.post(
+            "/api/login", data={"email": admin.email, "password": "adminpass"}
+        )
+        token = response.json()["access_token"]
+        client.headers.update({"Authorization": f"Bearer {token}"})
+        return client
+
+    return _admin_client
+
+
+@pytest.mark.asyncio
+async def test_bulk_endpoints_require_admin(authorized_client):
+    client, user = authorized_client
+    response = await client.post(f"/api/admin/users/{user.id}/tasks/complete-overdue")
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_complete_overdue_in_chunks(
+    admin_client, user_factory, create_task_for_user, test_db_session, monkeypatch
+):
+    monkeypatch.setattr(settings.admin_panel, "bulk_chunk_size", 2)
+    # три порции: UPDATE, журнал изменений и шина инвалидации на каждую
+    monkeypatch.setitem(
+        settings.sql.route_query_budgets,
+        "/api/admin/users/{user_id}/tasks/complete-overdue",
+        12,
+    )
+    client = await admin_client()
+    user = await user_factory(email="owner@example.com")
+    yesterday = date.today() - timedelta(days=1)
+    for _ in range(5):
+        await create_task_for_user(user, term_date=yesterday)
+    await create_task_for_user(user, term_date=date.today() + timedelta(days=1))
+
+    response = await client.post(f"/api/admin/users/{user.id}/tasks/complete-overdue")
+    assert response.status_code == 200, response.text
+    assert response.json() == {"affected": 5}
+
+    completed = await test_db_session.scalar(
+        select(func.count()).where(TaskORM.status == TaskStatus.COMPLETED)
+    )
+    assert completed == 5
+
+
+@pytest.mark.asyncio
+async def test_delete_old_completed(
+    admin_client, user_factory, create_task_for_user, test_db_session, monkeypatch
+):
+    monkeypatch.setattr(settings.admin_panel, "bulk_chunk_size", 2)
+    client = await admin_client()
+    user = await user_factory(email="owner@example.com")
+    old = date.today() - timedelta(days=40)
+    for _ in range(3):
+        task = await create_task_for_user(user, status=TaskStatus.COMPLETED)
+        task.completed_at = utcnow() - timedelta(days=40)
+    await create_task_for_user(user, status=TaskStatus.NEW, term_date=old)
+    # срок давно прошёл, но выполнена только что — не трогаем
+    await create_task_for_user(user, status=TaskStatus.COMPLETED, term_date=old)
+    await test_db_session.commit()
+
+    response = await client.delete(
+        "/api/admin/tasks/completed", params={"older_than_days": 30}
+    )
+    assert response.status_code == 200, response.text
+    assert response.json() == {"affected": 3}
+    assert await test_db_session.scalar(select(func.count(TaskORM.id))) == 2
+
+
+@pytest.mark.asyncio
+async def test_admin_count_estimate_ignores_partial_index(
+    user_factory, create_task_for_user, test_db_session, monkeypatch
+):
+    user = await user_factory()
+    for _ in range(3):
+        await create_task_for_user(user, status=TaskStatus.COMPLETED)
+    await create_task_for_user(user, status=TaskStatus.NEW)
+    view = TasksAdmin()
+    view.session_maker = TestSessionLocal
+    view.is_async = True
+    monkeypatch.setattr(settings.admin_panel, "exact_count_limit", 0)
+
+    # в ix_tasks_open_author_id_term_date только одна незавершённая задача;
+    # его строку статистики ставим первой — порядок строк ANALYZE не задан
+    for statement in (
+        "ANALYZE",
+        "CREATE TEMP TABLE stat AS SELECT * FROM sqlite_stat1 "
+        "ORDER BY idx = 'ix_tasks_open_author_id_term_date' DESC",
+        "DELETE FROM sqlite_stat1",
+        "INSERT INTO sqlite_stat1 SELECT * FROM stat",
+        "DROP TABLE stat",
+    ):
+        await test_db_session.execute(text(statement))
+    await test_db_session.commit()
+    try:
+        assert await view.count(request=None) == 4
+    finally:
+        await test_db_session.execute(text("DELETE FROM sqlite_stat1"))
+        await test_db_session.commit()
+
+
+@pytest.mark.asyncio
+async def test_admin_session_from_future_is_rechecked(user_factory, monkeypatch):
+    monkeypatch.setattr("admin.admin.new_session", TestSessionLocal)
+    user = await user_factory(is_admin=False)
+    auth = AdminAuth(secret_key="test")
+    # подделанная отметка проверки из будущего не должна пропускать без БД
+    request = SimpleNamespace(
+        session={"user_id": user.id, "validated_at": time.time() + 3600},
+        url_for=lambda name: "/admin/login",
+    )
+    response = await auth.authenticate(request)
+    assert isinstance(response, RedirectResponse)
+    assert request.session == {}
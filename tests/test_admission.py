@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from starlette.responses import PlainTextResponse
+
+from core.admission import (
+    AdmissionMiddleware,
+    ConcurrencyLimit,
+    Rejected,
+    admission_queue_depth,
+    admission_rejected,
+    classify,
+)
+from core.config import AdmissionClass
+
+
+def test_classify():
+    assert classify("POST", "/api/login") == "auth"
+    assert classify("GET", "/api/todos/1/20") == "read"
+    assert classify("GET", "/tasks/fragment") == "read"
+    assert classify("PUT", "/api/todos/5") == "write"
+    assert classify("POST", "/api/admin/tasks/archive") == "admin"
+    assert classify("GET", "/admin/users/list") == "admin"
+    for path in ("/api/todos/events", "/metrics", "/static/styles.css", "/tasks"):
+        assert classify("GET", path) is None
+
+
+@pytest.mark.asyncio
+async def test_limit_queues_in_order_and_rejects():
+    limit = ConcurrencyLimit("test", limit=1, queue_size=2, timeout=1)
+    await limit.acquire()
+    order = []
+
+    async def waiter(n):
+        await limit.acquire()
+        order.append(n)
+
+    waiters = [asyncio.create_task(waiter(n)) for n in (1, 2)]
+    await asyncio.sleep(0)
+    assert admission_queue_depth.get("test") == 2
+    with pytest.raises(Rejected) as exc:
+        await limit.acquire()
+    assert exc.value.reason == "queue_full"
+
+    limit.release()
+    limit.release()
+    await asyncio.gather(*waiters)
+    assert order == [1, 2]
+    assert admission_queue_depth.get("test") == 0
+
+    short = ConcurrencyLimit("test", limit=1, queue_size=1, timeout=0.01)
+    await short.acquire()
+    with pytest.raises(Rejected) as exc:
+        await short.acquire()
+    assert exc.value.reason == "timeout"
+    short.release()
+    assert short.active == 0
+
+
+@pytest.mark.asyncio
+async def test_exhausted_budget_returns_503_fast():
+    gate = asyncio.Event()
+
+    async def slow_app(scope, receive, send):
+        if scope["path"] != "/api/todos/events":
+            await gate.wait()
+        await PlainTextResponse("ok")(scope, receive, send)
+
+    config = AdmissionClass(limit=1, queue_size=1, queue_timeout_ms=20)
+    app = AdmissionMiddleware(slow_app, {"read": config}, retry_after=3)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        first = asyncio.create_task(client.get("/api/todos/1/20"))
+        await asyncio.sleep(0.01)
+        rejected = admission_rejected.get("read", "timeout")
+        response = await client.get("/api/todos/1/20")
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "3"
+        assert admission_rejected.get("read", "timeout") == rejected + 1
+
+        # SSE вне лимитов: не ждёт занятое место
+        assert (await client.get("/api/todos/events")).status_code == 200
+        gate.set()
+        assert (await first).status_code == 200
@@ -0,0 +1,182 @@
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+from core.config import settings
+from db.models.enums import TaskStatus
+from db.models.task import TaskArchiveORM, TaskORM, utcnow
+from db.models.user import UserOrm
+from repositories.task_archive_repository import TaskArchiveRepository
+
+
+async def archive_old(test_db_session, chunk_size=2):
+    repo = TaskArchiveRepository(test_db_session)
+    cutoff = utcnow() - timedelta(days=settings.archive.after_days)
+    return await repo.archive_completed(cutoff, chunk_size)
+
+
+@pytest.mark.asyncio
+async def test_completed_at_follows_status(
+    authorized_client, create_task_for_user, test_db_session
+):
+    client, user = authorized_client
+    task = await create_task_for_user(user)
+    assert task.completed_at is None
+
+    response = await client.put(f"/api/todos/{task.id}", json={"status": "completed"})
+    assert response.status_code == 200, response.text
+    await test_db_session.refresh(task)
+    assert task.completed_at is not None
+
+    await client.put(f"/api/todos/{task.id}", json={"status": "active"})
+    await test_db_session.refresh(task)
+    assert task.completed_at is None
+
+
+@pytest.mark.asyncio
+async def test_archive_moves_old_completed_in_chunks(
+    authorized_client, create_task_for_user, test_db_session
+):
+    client, user = authorized_client
+    old = utcnow() - timedelta(days=settings.archive.after_days + 1)
+    archived_ids = []
+    for _ in range(3):
+        task = await create_task_for_user(user, status=TaskStatus.COMPLETED)
+        task.completed_at = old
+        archived_ids.append(task.id)
+    fresh = await create_task_for_user(user, status=TaskStatus.COMPLETED)
+    active = await create_task_for_user(user, status=TaskStatus.ACTIVE)
+    await test_db_session.commit()
+
+    assert await archive_old(test_db_session) == 3
+    assert await test_db_session.scalar(select(func.count(TaskORM.id))) == 2
+    assert await test_db_session.scalar(select(func.count(TaskArchiveORM.id))) == 3
+
+    response = await client.get("/api/todos/1/10")
+    assert [t["id"] for t in response.json()["items"]] == [active.id, fresh.id]
+
+    response = await client.get("/api/todos/1/2", params={"include_archived": "true"})
+    data = response.json()
+    assert data["total"] == 5
+    assert [t["id"] for t in data["items"]] == [active.id, fresh.id]
+    response = await client.get("/api/todos/2/2", params={"include_archived": "true"})
+    assert [t["id"] for t in response.json()["items"]] == archived_ids[::-1][:2]
+
+    response = await client.get("/api/todos/archive/1/10")
+    assert response.status_code == 200, response.text
+    assert [t["id"] for t in response.json()["items"]] == archived_ids[::-1]
+
+
+@pytest.mark.asyncio
+async def test_restore_from_archive(
+    authorized_client, create_task_for_user, user_factory, test_db_session
+):
+    client, user = authorized_client
+    task = await create_task_for_user(
+        user, status=TaskStatus.COMPLETED, description="old notes"
+    )
+    task.completed_at = utcnow() - timedelta(days=settings.archive.after_days + 1)
+    await test_db_session.commit()
+    await archive_old(test_db_session)
+    test_db_session.expunge_all()
+
+    # id без AUTOINCREMENT переиспользуется: пока задача в архиве, его заняли
+    other = await user_factory(email="other@example.com")
+    taken = await create_task_for_user(other)
+    assert taken.id == task.id
+    response = await client.post(f"/api/todos/archive/{task.id}/restore")
+    assert response.status_code == 200, response.text
+    assert response.json()["id"] != task.id
+    assert response.json()["description"] == "old notes"
+
+    response = await client.post(f"/api/todos/archive/{task.id}/restore")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_archive_same_id_twice(
+    authorized_client, create_task_for_user, test_db_session
+):
+    client, user = authorized_client
+    old = utcnow() - timedelta(days=settings.archive.after_days + 1)
+    first = await create_task_for_user(user, status=TaskStatus.COMPLETED, title="first")
+    first.completed_at = old
+    await test_db_session.commit()
+    task_id = first.id
+    assert await archive_old(test_db_session) == 1
+    test_db_session.expunge_all()
+
+    # id освободился и достался новой задаче, которая тоже ушла в архив
+    second = await create_task_for_user(user, status=TaskStatus.COMPLETED, title="second")
+    assert second.id == task_id
+    second.completed_at = old
+    await test_db_session.commit()
+    assert await archive_old(test_db_session) == 1
+
+    response = await client.get("/api/todos/archive/1/10")
+    assert [t["title"] for t in response.json()["items"]] == ["second", "first"]
+
+    response = await client.post(f"/api/todos/archive/{task_id}/restore")
+    assert response.status_code == 200, response.text
+    assert response.json()["title"] == "second"
+    response = await client.post(f"/api/todos/archive/{task_id}/restore")
+    assert response.json()["title"] == "first"
+    assert response.json()["id"] != task_id
+
+
+@pytest.mark.asyncio
+async def test_restored_task_is_not_archived_again(
+    authorized_client, create_task_for_user, test_db_session
+):
+    client, user = authorized_client
+    task = await create_task_for_user(user, status=TaskStatus.COMPLETED)
+    task.completed_at = utcnow() - timedelta(days=settings.archive.after_days + 1)
+    await test_db_session.commit()
+    await archive_old(test_db_session)
+
+    response = await client.post(f"/api/todos/archive/{task.id}/restore")
+    assert response.status_code == 200, response.text
+    assert response.json()["status"] == "completed"
+
+    assert await archive_old(test_db_session) == 0
+    test_db_session.expunge_all()
+    assert await test_db_session.get(TaskORM, task.id) is not None
+
+
+@pytest.mark.asyncio
+async def test_deleted_user_archive_not_inherited(
+    client, user_factory, create_task_for_user, test_db_session
+):
+    user = await user_factory(email="gone@example.com")
+    task = await create_task_for_user(
+        user, status=TaskStatus.COMPLETED, description="private"
+    )
+    task.completed_at = utcnow() - timedelta(days=settings.archive.after_days + 1)
+    await test_db_session.commit()
+    await archive_old(test_db_session)
+    archived_id = task.id
+    test_db_session.expunge_all()
+    await create_task_for_user(user, title="active")
+
+    # как удаление в админке: ORM-delete, архив уходит каскадом в базе
+    await test_db_session.delete(await test_db_session.get(UserOrm, user.id))
+    await test_db_session.commit()
+    assert await test_db_session.scalar(select(func.count(TaskArchiveORM.id))) == 0
+
+    # users без AUTOINCREMENT: новый пользователь получает тот же id
+    response = await client.post(
+        "/api/registration",
+        json={"name": "new", "email": "new@example.com", "password": "123456"},
+    )
+    assert response.status_code == 200, response.text
+    newcomer = await test_db_session.scalar(
+        select(UserOrm).where(UserOrm.email == "new@example.com")
+    )
+    assert newcomer.id == user.id
+    client.headers.update({"Authorization": f"Bearer {response.json()['access_token']}"})
+
+    response = await client.get("/api/todos/archive/1/10")
+    assert response.json()["items"] == []
+    response = await client.post(f"/api/todos/archive/{archived_id}/restore")
+    assert response.status_code == 404
@@ -1,5 +1,7 @@
 import pytest
 
+from core.config import settings
+from core.security import hash_password, hash_rounds, validate_password
 from db.schemas.user import UserCreate
 
 
@@ -47,11 +49,13 @@ async def test_registration_duplicate_email(client, user_factory):
 
 
 @pytest.mark.asyncio
-async def test_authorization(client, user_factory):
+async def test_authorization(client, user_factory, no_loop_blocking):
     user = await user_factory(email="orlovski@gmail.com", password="testpass123")
-    response = await client.post(
-        "/api/login", data={"email": user.email, "password": "testpass123"}
-    )
+    # bcrypt должен считаться в пуле потоков, а не в event loop'е
+    async with no_loop_blocking():
+        response = await client.post(
+            "/api/login", data={"email": user.email, "password": "testpass123"}
+        )
     assert response.status_code == 200, response.text
     data = response.json()
     assert "access_token" in data
@@ -73,3 +77,19 @@ async def test_authorization_invalid(client, user_factory, email, password):
         "/api/login", data={"email": email, "password": password}
     )
     assert response.status_code == 401, response.text
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_outdated_cost(client, user_factory, test_db_session):
+    user = await user_factory(email="rehash@example.com", password="testpass123")
+    user.hashed_password = hash_password("testpass123", rounds=5)
+    await test_db_session.commit()
+
+    response = await client.post(
+        "/api/login", data={"email": user.email, "password": "testpass123"}
+    )
+    assert response.status_code == 200, response.text
+
+    await test_db_session.refresh(user)
+    assert hash_rounds(user.hashed_password) == settings.password_hashing.rounds
+    assert validate_password(user.hashed_password, "testpass123")
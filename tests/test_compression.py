@@ -0,0 +1,115 @@
+import asyncio
+import gzip
+import zlib
+
+import pytest
+from starlette.responses import JSONResponse, StreamingResponse
+
+from core.compression import CompressionMiddleware, choose_encoding
+from core.static import IMMUTABLE, static_files
+
+
+async def call(app, headers: dict) -> list[dict]:
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(k.encode(), v.encode()) for k, v in headers.items()],
+    }
+    messages = []
+    requests = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        # клиент на связи, пока ответ не закончится
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return messages
+
+
+def test_choose_encoding():
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0, deflate") is None
+    assert choose_encoding("br;q=1, gzip;q=0.5", ("br", "gzip")) == "br"
+    assert choose_encoding("*", ("gzip",)) == "gzip"
+    assert choose_encoding("") is None
+
+
+@pytest.mark.asyncio
+async def test_responses_compressed_above_threshold(client):
+    response = await client.get("/metrics", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(response.content)
+    assert "http_request_duration_seconds" in response.text
+
+    response = await client.get("/metrics", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+
+    small = JSONResponse({"ok": True})
+    messages = await call(CompressionMiddleware(small), {"accept-encoding": "gzip"})
+    assert messages[1]["body"] == b'{"ok":true}'
+
+
+@pytest.mark.asyncio
+async def test_streaming_response_flushes_each_chunk():
+    chunks = [b"x" * 2000, b"y" * 2000, b"z" * 10]
+
+    async def body():
+        for chunk in chunks:
+            yield chunk
+
+    app = CompressionMiddleware(StreamingResponse(body(), media_type="text/csv"))
+    messages = await call(app, {"accept-encoding": "gzip"})
+    headers = dict(messages[0]["headers"])
+    assert headers[b"content-encoding"] == b"gzip"
+    assert b"content-length" not in headers
+
+    # каждый кусок декодируется сразу, не дожидаясь конца потока
+    decoder = zlib.decompressobj(31)
+    bodies = [m["body"] for m in messages[1:]]
+    assert [decoder.decompress(b) for b in bodies[:3]] == chunks
+    assert gzip.decompress(b"".join(bodies)) == b"".join(chunks)
+
+    async def events():
+        yield "data: " + "e" * 2000 + "\n\n"
+
+    sse = StreamingResponse(events(), media_type="text/event-stream")
+    messages = await call(CompressionMiddleware(sse), {"accept-encoding": "gzip"})
+    assert b"content-encoding" not in dict(messages[0]["headers"])
+
+
+@pytest.mark.asyncio
+async def test_fingerprinted_static(client):
+    url = static_files.url("styles.css")
+    assert url != "/static/styles.css"
+
+    response = await client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == IMMUTABLE
+    assert response.headers["content-encoding"] == "gzip"
+    # отдана копия, сжатая при старте, а не сжатая middleware на лету
+    asset = static_files.assets["styles.css"]
+    assert int(response.headers["content-length"]) == len(asset.variants["gzip"])
+    assert response.content == asset.body
+
+    etag = response.headers["etag"]
+    response = await client.get(
+        url, headers={"If-None-Match": etag, "Accept-Encoding": "gzip"}
+    )
+    assert response.status_code == 304
+
+    # ETag gzip-копии не подходит несжатому телу
+    response = await client.get(
+        "/static/styles.css",
+        headers={"If-None-Match": etag, "Accept-Encoding": "identity"},
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.headers["cache-control"] == "no-cache"
+    assert "content-encoding" not in response.headers
@@ -0,0 +1,97 @@
+import json
+
+import pytest
+
+from core.invalidation import RESET, invalidation_bus
+from core.pubsub import RESYNC, Broker, events_dropped, task_events
+from db.models.task import TaskORM
+
+
+@pytest.mark.asyncio
+async def test_events_published_after_commit_only(authorized_client, test_db_session):
+    client, user = authorized_client
+    subscription = task_events.subscribe(user.id)
+    try:
+        test_db_session.add(TaskORM(title="rolled back", author_id=user.id))
+        await test_db_session.flush()
+        await test_db_session.rollback()
+        assert subscription.queue.empty()
+
+        response = await client.post("/api/todos", json={"title": "new"})
+        event = subscription.queue.get_nowait()
+        assert event == {"op": "upsert", "task_id": response.json()["id"]}
+
+        await client.delete(f"/api/todos/{event['task_id']}")
+        assert subscription.queue.get_nowait()["op"] == "delete"
+    finally:
+        task_events.unsubscribe(subscription)
+
+
+@pytest.mark.asyncio
+async def test_writes_in_other_workers_resync_subscribers(authorized_client):
+    client, user = authorized_client
+    subscription = task_events.subscribe(user.id)
+    other = task_events.subscribe(user.id + 1)
+    try:
+        # свои записи уже разосланы точными событиями, шина их не дублирует
+        await client.post("/api/todos", json={"title": "local"})
+        assert subscription.queue.get_nowait()["op"] == "upsert"
+        assert subscription.queue.empty()
+
+        # так опрос шины раздаёт строку другого воркера
+        invalidation_bus.dispatch("tasks", str(user.id), remote=True)
+        assert subscription.queue.get_nowait() == {"type": RESYNC}
+        assert other.queue.empty()
+
+        invalidation_bus.dispatch(RESET, None, remote=True)
+        assert subscription.queue.get_nowait() == {"type": RESYNC}
+        assert other.queue.get_nowait() == {"type": RESYNC}
+    finally:
+        task_events.unsubscribe(subscription)
+        task_events.unsubscribe(other)
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_gets_resync():
+    broker = Broker(max_per_user=2, queue_size=3)
+    subscription = broker.subscribe(1)
+    before = events_dropped.get()
+    for task_id in range(10):
+        broker.publish(1, {"op": "upsert", "task_id": task_id})
+
+    # вместо 10 событий — одно resync, память очереди не выросла
+    assert subscription.queue.qsize() == 1
+    assert (await subscription.get())["type"] == RESYNC
+    assert events_dropped.get() == before + 10
+
+    broker.publish(1, {"op": "delete", "task_id": 42})
+    assert await subscription.get() == {"op": "delete", "task_id": 42}
+
+
+@pytest.mark.asyncio
+async def test_sse_stream_heartbeat_and_cleanup():
+    broker = Broker(max_per_user=1, queue_size=10)
+    stream = broker.sse(7, heartbeat=0.01)
+    assert await anext(stream) == "retry: 3000\n\n"
+    assert await anext(stream) == ": ping\n\n"
+    assert broker.subscriber_count(7) == 1
+
+    broker.publish(7, {"op": "upsert", "task_id": 1})
+    chunk = await anext(stream)
+    assert chunk.startswith("event: task\ndata: ")
+    assert json.loads(chunk.split("data: ", 1)[1]) == {"op": "upsert", "task_id": 1}
+
+    await stream.aclose()
+    assert broker.subscriber_count(7) == 0
+
+
+@pytest.mark.asyncio
+async def test_events_connection_cap(authorized_client):
+    client, user = authorized_client
+    held = [task_events.subscribe(user.id) for _ in range(task_events.max_per_user)]
+    try:
+        response = await client.get("/api/todos/events")
+        assert response.status_code == 429
+    finally:
+        for subscription in held:
+            task_events.unsubscribe(subscription)
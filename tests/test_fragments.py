@@ -0,0 +1,49 @@
+import pytest
+
+from api.views import precompile_templates, templates
+from core.fragment_cache import fragment_cache_requests
+
+
+@pytest.mark.asyncio
+async def test_tasks_fragment_cached_by_data_version(
+    authorized_client, create_task_for_user, max_queries
+):
+    client, user = authorized_client
+    await create_task_for_user(user, title="first")
+
+    response = await client.get("/tasks/fragment", params={"limit": 5})
+    assert response.status_code == 200, response.text
+    assert "first" in response.text
+    assert "<html" not in response.text
+    etag = response.headers["etag"]
+
+    hits = fragment_cache_requests.get("hit")
+    # из кеша: только пользователь по токену, задачи не читаются
+    with max_queries(1):
+        again = await client.get("/tasks/fragment", params={"limit": 5})
+    assert again.text == response.text
+    assert fragment_cache_requests.get("hit") == hits + 1
+
+    response = await client.get(
+        "/tasks/fragment", params={"limit": 5}, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 304
+
+    # запись задачи меняет версию данных: старый фрагмент и ETag не подходят
+    await client.post("/api/todos", json={"title": "second"})
+    response = await client.get(
+        "/tasks/fragment", params={"limit": 5}, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert "second" in response.text
+    assert response.headers["etag"] != etag
+
+    response = await client.get("/tasks/fragment", params={"filter": "done"})
+    assert "Пока нет задач" in response.text
+
+
+def test_templates_precompiled_without_reload():
+    assert templates.env.auto_reload is False
+    compiled = precompile_templates()
+    assert compiled >= 4
+    assert len(templates.env.cache) >= compiled
@@ -0,0 +1,116 @@
+import asyncio
+import time
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from core.invalidation import (
+    RESET,
+    DataVersions,
+    InvalidationBus,
+    invalidation_delay,
+    task_versions,
+)
+from db import maintenance
+from db.database import check_schema
+from db.models.task import TaskORM
+from db.models.user import UserOrm
+
+POLL_INTERVAL = 0.02
+
+
+@pytest_asyncio.fixture
+async def shared_db(tmp_path):
+    # файловая база: каждый «воркер» видит её через своё соединение
+    path = tmp_path / "shared.db"
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    await check_schema(engine)
+    yield str(path), async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def wait_for(received: list, timeout: float = 2.0) -> float:
+    started = time.perf_counter()
+    while not received:
+        assert time.perf_counter() - started < timeout, "инвалидация не дошла"
+        await asyncio.sleep(0.001)
+    return time.perf_counter() - started
+
+
+@pytest.mark.asyncio
+async def test_invalidation_reaches_other_worker(shared_db):
+    path, session_maker = shared_db
+    other = InvalidationBus(POLL_INTERVAL)
+    received = []
+    other.subscribe("tasks", received.append)
+    await other.start(path)
+    try:
+        async with session_maker() as session:
+            user = UserOrm(name="u", email="u@example.com", hashed_password=b"x")
+            session.add(user)
+            await session.commit()
+            before = task_versions.get(user.id)
+            observed = invalidation_delay.count()
+
+            session.add(TaskORM(title="t", author_id=user.id))
+            await session.commit()
+            # свой процесс получает событие сразу после коммита
+            assert task_versions.get(user.id) > before
+            delay = await wait_for(received)
+    finally:
+        await other.stop()
+
+    assert received == [str(user.id)]
+    # верхняя граница — интервал опроса плюс SELECT; запас на медленную CI
+    assert delay < POLL_INTERVAL + 0.2
+    assert invalidation_delay.count() == observed + 1
+
+
+@pytest.mark.asyncio
+async def test_rollback_is_not_published_and_lag_resets(shared_db):
+    path, session_maker = shared_db
+    # опрос вручную: фоновый цикл не успеет проснуться
+    other = InvalidationBus(poll_interval=60)
+    received, resets = [], []
+    other.subscribe("tasks", received.append)
+    other.subscribe(RESET, resets.append)
+    async with session_maker() as session:
+        user = UserOrm(name="r", email="r@example.com", hashed_password=b"x")
+        session.add(user)
+        await session.commit()
+    await other.start(path)
+    try:
+        async with session_maker() as session:
+            session.add(TaskORM(title="rolled back", author_id=user.id))
+            await session.flush()
+            await session.rollback()
+        assert await other.poll() == 0
+
+        # воркер отстал дольше срока хранения: его хвост уже удалён
+        async with session_maker() as session:
+            for n in range(3):
+                session.add(TaskORM(title=f"t{n}", author_id=user.id))
+                await session.commit()
+        engine = session_maker.kw["bind"]
+        assert await maintenance.prune_invalidations(engine, time.time() + 1, 2) == 3
+        async with session_maker() as session:
+            session.add(TaskORM(title="last", author_id=user.id))
+            await session.commit()
+        assert await other.poll() == 1
+    finally:
+        await other.stop()
+
+    assert resets == [None]
+    assert len(received) == 1
+
+
+def test_data_versions_are_not_reused_after_eviction():
+    versions = DataVersions(maxsize=2)
+    first = versions.get(1)
+    versions.get(2)
+    versions.get(3)  # вытесняет 1
+    assert versions.get(1) > first
+    bumped = versions.bump(2)
+    versions.invalidate(None)
+    assert versions.get(2) > bumped
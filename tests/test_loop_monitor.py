@@ -0,0 +1,36 @@
+import asyncio
+import time
+
+import pytest
+
+from core.loop_monitor import LoopMonitor, event_loop_blocked
+
+
+def blocking_helper():
+    time.sleep(0.3)
+
+
+@pytest.mark.asyncio
+async def test_loop_monitor_captures_blocking_stack():
+    before = event_loop_blocked.get()
+    monitor = LoopMonitor(interval=0.01, threshold=0.1)
+    monitor.start()
+    await asyncio.sleep(0.05)
+    blocking_helper()
+    await asyncio.sleep(0.05)
+    await monitor.stop()
+
+    assert len(monitor.blocked) == 1
+    assert monitor.blocked[0].seconds > 0.1
+    assert "blocking_helper" in monitor.blocked[0].stack
+    assert event_loop_blocked.get() == before + 1
+
+
+@pytest.mark.asyncio
+async def test_loop_monitor_quiet_loop():
+    monitor = LoopMonitor(interval=0.01, threshold=0.1)
+    monitor.start()
+    await asyncio.sleep(0.2)
+    await monitor.stop()
+
+    assert not monitor.blocked
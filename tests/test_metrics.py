@@ -0,0 +1,44 @@
+import pytest
+
+from core.config import settings
+from core.metrics import Histogram, http_request_duration
+from db.query_stats import QueryBudgetExceeded
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "test", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, "/x")
+
+    lines = histogram.render()
+    assert 'latency_seconds_bucket{route="/x",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/x",le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{route="/x",le="+Inf"} 4' in lines
+    assert 'latency_seconds_count{route="/x"} 4' in lines
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_route_templates(authorized_client):
+    client, user = authorized_client
+    before = http_request_duration.count("GET", "/api/todos/{page}/{limit}")
+    response = await client.get("/api/todos/1/5")
+    assert response.status_code == 200
+
+    assert http_request_duration.count("GET", "/api/todos/{page}/{limit}") == before + 1
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    body = response.text
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert 'route="/api/todos/{page}/{limit}"' in body
+    assert 'http_responses_total{method="POST",route="/api/login",status="200"}' in body
+    assert "password_hash_queue_depth" in body
+
+
+@pytest.mark.asyncio
+async def test_query_budget_exceeded(authorized_client, monkeypatch):
+    client, user = authorized_client
+    monkeypatch.setattr(
+        settings.sql, "route_query_budgets", {"/api/todos/{page}/{limit}": 1}
+    )
+    with pytest.raises(QueryBudgetExceeded):
+        await client.get("/api/todos/1/5")
@@ -0,0 +1,28 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from core.config import settings
+from core.profiling import ProfileStore, ProfilingMiddleware
+from main import app
+
+
+@pytest.mark.asyncio
+async def test_profiling_by_token(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings.profiling, "token", "secret")
+    store = ProfileStore(tmp_path, max_files=2)
+    transport = ASGITransport(app=ProfilingMiddleware(app, store=store))
+
+    async with AsyncClient(transport=transport, base_url="http://test") as profiled:
+        await profiled.get("/metrics")
+        assert store.list() == []
+
+        for _ in range(3):
+            response = await profiled.get(
+                "/metrics", headers={"X-Profile-Token": "secret"}
+            )
+            assert response.status_code == 200
+
+    profiles = store.list()
+    assert len(profiles) == 2
+    assert "GET-metrics" in profiles[0].name
+    assert "function calls" in store.render_text(profiles[0].name)
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from api.auth import WINDOW_SIZE, _requests_count, prune_rate_limits
+from core.scheduler import Scheduler, maintenance_job_runs
+
+
+@pytest.mark.asyncio
+async def test_exclusive_job_runs_once_across_workers(tmp_path):
+    calls = []
+
+    async def job():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+
+    # два воркера с общим каталогом замков
+    workers = [Scheduler(tmp_path), Scheduler(tmp_path)]
+    for worker in workers:
+        worker.add("exclusive_test", job, interval=60, exclusive=True)
+
+    results = await asyncio.gather(*(w.run_job(w.jobs[0]) for w in workers))
+    assert sorted(results) == ["ok", "skipped"]
+    # второй воркер проснулся позже, но интервал ещё не прошёл
+    assert await workers[1].run_job(workers[1].jobs[0]) == "skipped"
+    assert len(calls) == 1
+    assert maintenance_job_runs.get("exclusive_test", "skipped") == 2
+
+
+@pytest.mark.asyncio
+async def test_failing_job_keeps_running(tmp_path):
+    calls = []
+
+    async def job():
+        calls.append(1)
+        raise RuntimeError("boom")
+
+    scheduler = Scheduler(tmp_path)
+    scheduler.add("failing_test", job, interval=0.01, jitter=0)
+    scheduler.start()
+    await asyncio.sleep(0.1)
+    await scheduler.stop()
+
+    assert len(calls) > 1
+    assert maintenance_job_runs.get("failing_test", "error") == len(calls)
+
+
+@pytest.mark.asyncio
+async def test_stop_waits_for_running_job(tmp_path):
+    started = asyncio.Event()
+    finished = []
+
+    async def job():
+        started.set()
+        await asyncio.sleep(0.05)
+        finished.append(1)
+
+    scheduler = Scheduler(tmp_path)
+    scheduler.add("slow_test", job, interval=0.01, jitter=0)
+    scheduler.start()
+    await started.wait()
+    await scheduler.stop(timeout=1)
+
+    assert finished == [1]
+    assert not scheduler._running
+
+
+@pytest.mark.asyncio
+async def test_prune_rate_limits(monkeypatch):
+    _requests_count.clear()
+    _requests_count["user:1"] = (3, 0)
+    _requests_count["user:2"] = (1, 10**12 - 10**12 % WINDOW_SIZE)
+    monkeypatch.setattr("api.auth.time.time", lambda: 10**12)
+
+    assert await prune_rate_limits() == 1
+    assert list(_requests_count) == ["user:2"]
+    _requests_count.clear()
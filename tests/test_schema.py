@@ -0,0 +1,100 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from db.database import Base, SchemaVersionMismatch, check_schema
+from db.migrations import SCHEMA_VERSION, connect, current_version, migrate
+from db.migrations import v0001_baseline as baseline
+from db.migrations._indexes import table_rows
+
+
+def schema_of(path) -> dict:
+    conn = sqlite3.connect(path)
+    try:
+        names = conn.execute(
+            "SELECT type, name, tbl_name FROM sqlite_master "
+            "WHERE name NOT LIKE 'sqlite_%' AND name != 'schema_migrations'"
+        ).fetchall()
+        columns = {
+            table: conn.execute(f"PRAGMA table_info({table})").fetchall()
+            for kind, table, _ in names
+            if kind == "table"
+        }
+    finally:
+        conn.close()
+    return {"objects": sorted(names), "columns": columns}
+
+
+@pytest.mark.asyncio
+async def test_check_schema_creates_once(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'schema.db'}")
+    try:
+        assert await check_schema(engine) is True
+        assert await check_schema(engine) is False
+    finally:
+        await engine.dispose()
+
+    conn = connect(str(tmp_path / "schema.db"))
+    assert current_version(conn) == SCHEMA_VERSION
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    history = conn.execute("SELECT version FROM schema_migrations").fetchall()
+    assert [v for (v,) in history] == list(range(1, SCHEMA_VERSION + 1))
+    conn.close()
+
+
+@pytest.mark.asyncio
+async def test_check_schema_rejects_outdated_database(tmp_path):
+    # база из времён create_all: таблицы есть, user_version = 0
+    path = tmp_path / "legacy.db"
+    conn = sqlite3.connect(path)
+    baseline.upgrade(conn)
+    conn.execute("INSERT INTO users (name, email, hashed_password) VALUES ('u', 'e', x'00')")
+    conn.executemany(
+        "INSERT INTO tasks (title, author_id) VALUES (?, 1)", [("t",)] * 10
+    )
+    conn.commit()
+    conn.close()
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    try:
+        with pytest.raises(SchemaVersionMismatch):
+            await check_schema(engine)
+        lines = []
+        migrate(str(path), dry_run=True, log=lines.append)
+        assert any("ix_tasks_author_id_status: ~10 строк" in line for line in lines)
+        with pytest.raises(SchemaVersionMismatch):
+            await check_schema(engine)
+
+        migrate(str(path))
+        assert await check_schema(engine) is False
+    finally:
+        await engine.dispose()
+
+
+def test_migrations_match_models(tmp_path):
+    migrated = tmp_path / "migrated.db"
+    migrate(str(migrated))
+
+    created = tmp_path / "created.db"
+    sync_engine = create_engine(f"sqlite:///{created}")
+    Base.metadata.create_all(sync_engine)
+    sync_engine.dispose()
+
+    assert schema_of(migrated) == schema_of(created)
+
+
+def test_row_estimate_skips_partial_indexes(tmp_path):
+    path = str(tmp_path / "stats.db")
+    migrate(path)
+    conn = connect(path)
+    conn.execute("INSERT INTO users (name, email, hashed_password) VALUES ('u', 'e', x'00')")
+    # в частичный индекс открытых задач попадёт только одна строка из десяти
+    conn.executemany(
+        "INSERT INTO tasks (title, author_id, status) VALUES ('t', 1, ?)",
+        [("COMPLETED",)] * 9 + [("NEW",)],
+    )
+    conn.execute("ANALYZE")
+    assert table_rows(conn, "tasks") == 10
+    conn.close()
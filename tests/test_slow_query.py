@@ -0,0 +1,34 @@
+import json
+import logging
+
+import pytest
+
+from db.slow_query import _explain_executor, install_slow_query_log, redact
+from repositories.task_repository import TaskRepository
+from tests.conftest import test_engine
+
+
+def test_redact_hides_values():
+    assert redact(("secret@example.com", 5, None)) == ["<str:18>", "<int>", None]
+    assert redact({"email": "a@b.c"}) == {"email": "<str:5>"}
+
+
+@pytest.mark.asyncio
+async def test_slow_query_logged_with_plan(
+    test_db_session, user_factory, create_task_for_user, caplog
+):
+    user = await user_factory()
+    await create_task_for_user(user)
+    slow_log = install_slow_query_log(test_engine.sync_engine, threshold_ms=0)
+    try:
+        with caplog.at_level(logging.WARNING, logger="app.sql.slow"):
+            await TaskRepository(test_db_session).get_by_pages(user.id, 1, 5)
+            _explain_executor.submit(lambda: None).result()
+    finally:
+        slow_log.remove()
+
+    entries = [json.loads(r.getMessage()) for r in caplog.records]
+    page_query = next(e for e in entries if "ORDER BY tasks.id DESC" in e["statement"])
+    assert page_query["caller"] == "repositories.task_repository.TaskRepository.get_by_pages"
+    assert page_query["plan"]
+    assert str(user.id) not in json.dumps(page_query["params"])
@@ -0,0 +1,82 @@
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+from db.models.task import utcnow
+from db.models.task_change import TaskChangeORM
+from repositories.task_change_repository import TaskChangeRepository
+
+
+@pytest.mark.asyncio
+async def test_changes_since(authorized_client, max_queries):
+    client, user = authorized_client
+    first = (await client.post("/api/todos", json={"title": "first"})).json()
+    second = (await client.post("/api/todos", json={"title": "second"})).json()
+    await client.put(f"/api/todos/{first['id']}", json={"title": "renamed"})
+    await client.delete(f"/api/todos/{second['id']}")
+
+    # пользователь по токену + один диапазон по журналу
+    with max_queries(2):
+        response = await client.get("/api/todos/changes", params={"since": 0})
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["full_resync"] is False and data["has_more"] is False
+    changes = {c["task_id"]: c for c in data["changes"]}
+    assert changes[first["id"]]["op"] == "upsert"
+    assert changes[first["id"]]["task"]["title"] == "renamed"
+    assert changes[second["id"]]["op"] == "delete"
+    assert changes[second["id"]]["task"] is None
+
+    since = data["since"]
+    response = await client.get("/api/todos/changes", params={"since": since})
+    assert response.json()["changes"] == []
+
+    await client.put(f"/api/todos/{first['id']}", json={"status": "completed"})
+    data = (await client.get("/api/todos/changes", params={"since": since})).json()
+    assert [(c["task_id"], c["task"]["status"]) for c in data["changes"]] == [
+        (first["id"], "completed")
+    ]
+
+
+@pytest.mark.asyncio
+async def test_compacted_log_requires_full_resync(
+    authorized_client, test_db_session, user_factory
+):
+    client, user = authorized_client
+    task = (await client.post("/api/todos", json={"title": "old"})).json()
+    stale = (await client.get("/api/todos/changes")).json()["since"]
+    await client.put(f"/api/todos/{task['id']}", json={"title": "new"})
+
+    repo = TaskChangeRepository(test_db_session)
+    assert await repo.compact(utcnow() + timedelta(seconds=1), chunk_size=1) == 2
+
+    data = (await client.get("/api/todos/changes", params={"since": stale - 1})).json()
+    assert data["full_resync"] is True
+    assert data["since"] == stale + 1
+
+    # клиент с актуальным since сжатия не замечает
+    data = (await client.get("/api/todos/changes", params={"since": stale + 1})).json()
+    assert data == {"changes": [], "since": stale + 1, "has_more": False, "full_resync": False}
+
+
+@pytest.mark.asyncio
+async def test_deleted_user_changes_not_inherited(
+    client, user_factory, create_task_for_user, test_db_session
+):
+    user = await user_factory(email="gone@example.com")
+    await create_task_for_user(user, title="private")
+    await test_db_session.delete(user)
+    await test_db_session.commit()
+
+    # users без AUTOINCREMENT: новый пользователь получает тот же id, а
+    # журнал прежнего ушёл каскадом вместе с ним
+    response = await client.post(
+        "/api/registration",
+        json={"name": "new", "email": "new@example.com", "password": "123456"},
+    )
+    assert response.status_code == 200, response.text
+    client.headers.update({"Authorization": f"Bearer {response.json()['access_token']}"})
+    data = (await client.get("/api/todos/changes", params={"since": 0})).json()
+    assert data["changes"] == []
+    assert await test_db_session.scalar(select(func.count(TaskChangeORM.seq))) == 0
@@ -1,9 +1,13 @@
+import asyncio
+from datetime import date, timedelta
+
 import pytest
 from starlette.requests import Request
 
 from api.auth import get_token_from_cookie, auth_header
 from db.models.enums import TaskStatus, TaskPriority
 from db.schemas.task import TaskSchema
+from repositories.task_repository import TaskRepository
 from tests.conftest import create_task_for_user
 
 
@@ -195,3 +199,142 @@ def test_get_token_from_cookie():
     assert get_token_from_cookie(request) == "testtoken"
 
 
+@pytest.mark.asyncio
+async def test_get_tasks_from_page_fields(authorized_client, create_task_for_user):
+    client, user = authorized_client
+    await create_task_for_user(user, title="Hellow", description="long " * 1000)
+    response = await client.get("/api/todos/1/5", params={"fields": "id,title,status"})
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["total"] == 1
+    assert data["items"] == [
+        {"id": data["items"][0]["id"], "title": "Hellow", "status": "new"}
+    ]
+
+
+@pytest.mark.parametrize("fields", ["author_id", "title,secret", ","])
+@pytest.mark.asyncio
+async def test_get_tasks_from_page_fields_invalid(authorized_client, fields):
+    client, user = authorized_client
+    response = await client.get("/api/todos/1/5", params={"fields": fields})
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_from_page_preview(authorized_client, create_task_for_user):
+    client, user = authorized_client
+    await create_task_for_user(user, title="Hellow", description="x" * 5000)
+    response = await client.get("/api/todos/1/5", params={"preview": 10})
+    assert response.status_code == 200, response.text
+    item = response.json()["items"][0]
+    assert item["description_preview"] == "x" * 10
+    assert "description" not in item
+    assert item["title"] == "Hellow"
+
+    # preview с fields без description: превью добавляется к проекции
+    response = await client.get(
+        "/api/todos/1/5", params={"fields": "id,title", "preview": 3}
+    )
+    assert response.status_code == 200, response.text
+    item = response.json()["items"][0]
+    assert set(item) == {"id", "title", "description_preview"}
+    assert item["description_preview"] == "xxx"
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_from_page_query_count(
+    authorized_client, create_task_for_user, max_queries
+):
+    client, user = authorized_client
+    for i in range(3):
+        await create_task_for_user(user, title=f"task {i}")
+
+    # пользователь по токену + страница задач + count
+    with max_queries(3):
+        response = await client.get("/api/todos/1/5")
+    assert response.status_code == 200
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_page_requests_share_one_query(
+    authorized_client, create_task_for_user, monkeypatch
+):
+    client, user = authorized_client
+    await create_task_for_user(user, title="shared")
+    calls = []
+    get_by_pages = TaskRepository.get_by_pages
+
+    async def slow_get_by_pages(self, *args, **kwargs):
+        calls.append(1)
+        # остальные запросы успевают прийти, пока первый читает базу
+        await asyncio.sleep(0.05)
+        return await get_by_pages(self, *args, **kwargs)
+
+    monkeypatch.setattr(TaskRepository, "get_by_pages", slow_get_by_pages)
+    responses = await asyncio.gather(*(client.get("/api/todos/1/5") for _ in range(5)))
+    assert [r.status_code for r in responses] == [200] * 5
+    assert len({r.text for r in responses}) == 1
+    assert len(calls) == 1
+
+    # после записи версия данных другая: новый запрос читает базу заново
+    await client.post("/api/todos", json={"title": "fresh"})
+    response = await client.get("/api/todos/1/5")
+    assert "fresh" in response.text
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_due_tasks(authorized_client, create_task_for_user):
+    client, user = authorized_client
+    today = date.today()
+    overdue = await create_task_for_user(user, term_date=today - timedelta(days=3))
+    await create_task_for_user(
+        user, term_date=today - timedelta(days=1), status=TaskStatus.COMPLETED
+    )
+    due_today = await create_task_for_user(user, term_date=today)
+    next_week = await create_task_for_user(user, term_date=today + timedelta(days=7))
+
+    response = await client.get("/api/todos/overdue")
+    assert response.status_code == 200, response.text
+    assert [t["id"] for t in response.json()["items"]] == [overdue.id]
+
+    response = await client.get("/api/todos/due-today")
+    assert [t["id"] for t in response.json()["items"]] == [due_today.id]
+
+    response = await client.get(
+        "/api/todos/due",
+        params={"start": str(today - timedelta(days=7)), "end": str(today + timedelta(days=7))},
+    )
+    data = response.json()
+    assert [t["id"] for t in data["items"]] == [overdue.id, due_today.id, next_week.id]
+    assert data["total"] == 3
+
+    response = await client.get(
+        "/api/todos/due", params={"start": str(today), "end": str(today - timedelta(days=1))}
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_task_stats(authorized_client, create_task_for_user, max_queries):
+    client, user = authorized_client
+    today = date.today()
+    await create_task_for_user(user, term_date=today - timedelta(days=2))
+    await create_task_for_user(user, term_date=today, status=TaskStatus.ACTIVE)
+    await create_task_for_user(
+        user, term_date=today - timedelta(days=2), status=TaskStatus.COMPLETED
+    )
+
+    # пользователь по токену + счётчики по статусам + счётчики по срокам
+    with max_queries(3):
+        response = await client.get("/api/todos/stats")
+    assert response.status_code == 200, response.text
+    assert response.json() == {
+        "total": 3,
+        "new": 1,
+        "active": 1,
+        "completed": 1,
+        "overdue": 1,
+        "due_today": 1,
+    }
@@ -1,6 +1,10 @@
+import time
+
 import pytest
 
-from api.auth import create_refresh_token
+from api.auth import create_access_token, create_refresh_token
+from core.revocation import RevocationList
+from repositories.revoked_token_repository import RevokedTokenRepository
 
 
 @pytest.mark.asyncio
@@ -26,3 +30,56 @@ async def test_refresh_token_invalid(authorized_client, test_db_session):
         "Неправильный тип токена: 'access' когда ожидался 'refresh'"
         == response.json()["detail"]
     )
+
+
+@pytest.mark.asyncio
+async def test_logout_revokes_access_and_refresh(authorized_client, max_queries):
+    client, user = authorized_client
+    refresh_token = await create_refresh_token(user)
+
+    # не отозванный токен отсекается фильтром Блума без запроса к revoked_tokens
+    with max_queries(3) as stats:
+        response = await client.get("/api/todos/1/5")
+    assert response.status_code == 200, response.text
+    assert not any("revoked_tokens" in sql for sql in stats.statements)
+
+    response = await client.post("/api/logout", json={"refresh_token": refresh_token})
+    assert response.status_code == 204, response.text
+
+    response = await client.get("/api/todos/1/5")
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Токен отозван"
+
+    client.headers["Authorization"] = f"Bearer {refresh_token}"
+    response = await client.post("/api/refresh")
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Токен отозван"
+
+
+@pytest.mark.asyncio
+async def test_logout_everywhere(authorized_client):
+    client, user = authorized_client
+    other_token = await create_access_token(user)
+
+    response = await client.post("/api/logout/all")
+    assert response.status_code == 204, response.text
+
+    for token in (client.headers["Authorization"], f"Bearer {other_token}"):
+        response = await client.get("/api/todos/1/5", headers={"Authorization": token})
+        assert response.status_code == 401
+        assert response.json()["detail"] == "Токен отозван"
+
+
+@pytest.mark.asyncio
+async def test_revocation_rebuild_prunes_expired(test_db_session, user_factory):
+    user = await user_factory()
+    repo = RevokedTokenRepository(test_db_session)
+    now = int(time.time())
+    await repo.add("expired", user.id, now - 1)
+    await repo.add("active", user.id, now + 60)
+
+    revocations = RevocationList(capacity=100)
+    assert await revocations.rebuild(repo) == 1
+    assert await revocations.is_revoked("active", repo)
+    assert not await revocations.is_revoked("expired", repo)
+    assert not await repo.exists("expired")